@@ -28,7 +28,7 @@ jobs:
         run: |
           set -euo pipefail
           python -m pip install --upgrade pip
-          pip install intelhex pyyaml
+          pip install numpy pyyaml
 
       - name: Export BIN → HEX
         run: |
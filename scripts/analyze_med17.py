@@ -1,223 +1,365 @@
 # -*- coding: utf-8 -*-
 """
 MED17 VR BIN Analyzer
-- Grundanalyse: Größe, Hashes, 64KiB Block-Checksummen
-- Entropie (4KiB Fenster) + Plot
-- Map-Heuristik: Achsenkandidaten (int16/uint16/float32 LE), 2D/3D Maps
-- Export: CSVs + YAML-Summary
+- Grundanalyse: Größe, Hashes, 64KiB Block-Checksummen (additiv 8/16/32, Wortsummen, CRC32-Varianten, siehe checksums.py)
+- Entropie (4KiB Fenster, optional überlappend via --entropy-stride) + Plot
+- Map-Heuristik: Achsenkandidaten (int16/uint16/float32 LE), 2D/3D Maps (indiziert, siehe map_search.py)
+- Export: CSVs + YAML-Summary (Corpus-Modus: ProcessPool + index.csv/index.json)
+- Ergebnis-Cache je (SHA-256, Parameter, Version), siehe result_cache.py
+- Inkrementell (--incremental-from <alte Analyse>): nur geänderte Blöcke neu auswerten, siehe incremental.py
+- Eingabe auch komprimiert (.gz/.xz/.zst) oder als ZIP-Paket: bin_loader entpackt stückweise in eine Temp-Datei
+  + mmap (Map-Suche braucht wahlfreien Zugriff), Ausgabename nach dem Dump darin
+- Instrumentierung (instrument.py): Zeiten + Peak-RSS-Anstieg je Stufe, Prozess-Peak + Zähler (Achsenkandidaten, Map-Jobs, ausgewertete
+  Fenster) in analysis_summary.yaml (instrumentation), elapsed_s in index.csv; --profile schreibt cProfile-Daten
+- schneller Start: CSVs ohne pandas (table_io.py), matplotlib erst beim Plot, pandas/yaml nur im inkrementellen
+  Lauf; --no-plots importiert matplotlib gar nicht
 
 Usage:
   python analyze_med17.py <input.bin> --out <out_dir>
+  python analyze_med17.py <rev2.bin> --out <out_rev2> --incremental-from <out_rev1>
+  python analyze_med17.py 'rawdata/**/*.bin' --out <out_root> [--jobs N]   # Corpus: <out_root>/<stem>/ + index.csv
 """
-import argparse, hashlib, json
+import argparse, csv, glob, hashlib, json, math, os, sys, time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-
-def shannon_entropy(b: bytes) -> float:
-    if not b: return 0.0
-    arr = np.frombuffer(b, dtype=np.uint8)
-    counts = np.bincount(arr, minlength=256)
-    probs = counts / float(len(arr))
-    nz = probs[probs > 0]
-    return float(-(nz * np.log2(nz)).sum())
-
-def block_additive32(b: bytes) -> int:
-    return int(sum(b) & 0xFFFFFFFF)
-
-def view_as(dtype, b: bytes):
-    itemsize = np.dtype(dtype).itemsize
-    trim = len(b) - (len(b) % itemsize)
-    return np.frombuffer(memoryview(b)[:trim], dtype=dtype)
+from entropy_engine import window_entropy
+from bin_loader import dump_name, dump_stem, load_bin, view_as
+from map_search import search_maps
+from result_cache import DEFAULT_DIR, DEFAULT_MAX_MB, cache_get, cache_key, cache_materialize, cache_put
+from checksums import ALGORITHMS, checksum_rows, parse_range
+from table_io import concat_columns, nrows, records, take, write_csv
+from instrument import count, new_stats, profiled, timed
+from region_index import overlaps
 
 def find_monotonic_runs(arr: np.ndarray, min_len=8, max_len=128):
+    """Streng steigende Läufe als (start, length); arbeitet auf dem nativen dtype (kein Widening)."""
     if arr.size < min_len: return []
-    diffs = np.diff(arr)
-    inc = np.isfinite(diffs) & (diffs > 0)
-    runs, start = [], 0
-    for i in range(len(inc)):
-        if not inc[i]:
-            run_len = (i + 1) - start
-            if min_len <= run_len <= max_len:
-                runs.append((start, run_len))
-            start = i + 1
-    run_len = len(arr) - start
-    if min_len <= run_len <= max_len:
-        runs.append((start, run_len))
-    return runs
-
-def extract_block_stats(data: bytes, start_offset: int, num_items: int, dtype: str):
-    itemsize = 2 if dtype in ("int16_le", "uint16_le") else 4
-    end = start_offset + num_items * itemsize
-    if end > len(data) or start_offset < 0: return None
-    if dtype == "int16_le":
-        arr = np.frombuffer(memoryview(data)[start_offset:end], dtype="<i2")
-    elif dtype == "uint16_le":
-        arr = np.frombuffer(memoryview(data)[start_offset:end], dtype="<u2")
-    elif dtype == "float32_le":
-        arr = np.frombuffer(memoryview(data)[start_offset:end], dtype="<f4")
+    if np.issubdtype(arr.dtype, np.floating):
+        with np.errstate(over="ignore", invalid="ignore"):
+            diffs = np.diff(arr)
+        inc = np.isfinite(diffs) & (diffs > 0)
     else:
-        return None
-    if arr.size == 0 or not np.all(np.isfinite(arr)): return None
-    std = float(np.std(arr)); mean = float(np.mean(arr))
-    if not np.isfinite(std): return None
-    return {"std": std, "mean": mean}
+        inc = arr[1:] > arr[:-1]
+    cuts = np.flatnonzero(~inc) + 1
+    starts = np.concatenate(([0], cuts)); ends = np.concatenate((cuts, [arr.size]))
+    lengths = ends - starts
+    keep = (lengths >= min_len) & (lengths <= max_len)
+    return list(zip(starts[keep].tolist(), lengths[keep].tolist()))
 
-def main():
-    p = argparse.ArgumentParser()
-    p.add_argument("input", help="MED17 VR BIN")
-    p.add_argument("--out", required=True, help="Output directory")
-    p.add_argument("--entropy-window", type=int, default=4096)
-    p.add_argument("--block-size", type=int, default=64*1024)
-    p.add_argument("--axis-min", type=int, default=8)
-    p.add_argument("--axis-max", type=int, default=128)
-    p.add_argument("--gap-candidates", type=str, default="0,16,32,64,128,256")
-    args = p.parse_args()
+AXIS_DTYPES = [("float32_le", "<f4", 4), ("int16_le", "<i2", 2), ("uint16_le", "<u2", 2)]
 
-    in_path = Path(args.input)
-    out_dir = Path(args.out); out_dir.mkdir(parents=True, exist_ok=True)
-    data = in_path.read_bytes(); size = len(data)
+def find_axes(data, axis_min=8, axis_max=128, lo=0, hi=None) -> list:
+    """Achsenkandidaten in data[lo:hi] (lo 4-Byte-aligned), Offsets absolut."""
+    mv = memoryview(data)[lo:hi]; out = []
+    for name, dt, isz in AXIS_DTYPES:
+        arr = view_as(dt, mv)
+        runs = find_monotonic_runs(arr, axis_min, axis_max)
+        if not runs: continue
+        starts, lengths = (np.array(x, dtype=np.int64) for x in zip(*runs))
+        # streng steigend -> min/max sind erstes/letztes Element
+        vmin = arr[starts].astype(np.float64); vmax = arr[starts + lengths - 1].astype(np.float64)
+        keep = np.isfinite(vmin) & np.isfinite(vmax) & ((vmax - vmin) >= 1e-3)
+        for start, length, a, b in zip(starts[keep].tolist(), lengths[keep].tolist(), vmin[keep].tolist(), vmax[keep].tolist()):
+            out.append({"offset": lo + start * isz, "length": length, "dtype": name, "min": a, "max": b})
+    return out
 
-    md5 = hashlib.md5(data).hexdigest()
-    sha1 = hashlib.sha1(data).hexdigest()
-    sha256 = hashlib.sha256(data).hexdigest()
+AXIS_COLUMNS = [("offset", np.int64), ("length", np.int64), ("dtype", object), ("min", np.float64), ("max", np.float64)]
 
-    # Block checksums
-    block_rows = []
-    for i in range(0, size, args.block_size):
-        block = data[i:i + args.block_size]
-        s = block_additive32(block)
-        block_rows.append({"block_start": i, "block_end": min(i + args.block_size, size), "additive32": f"0x{s:08X}"})
-    blocks_df = pd.DataFrame(block_rows)
-    blocks_csv = out_dir / "block_checksums.csv"; blocks_df.to_csv(blocks_csv, index=False)
+def axes_frame(cands) -> dict:
+    """Dedupliziert, stabil sortiert nach (offset, dtype-Reihenfolge) -> gleiche Reihenfolge in Voll- und Inkrementell-Lauf.
+    -> Spalten (table_io) wie axis_candidates.csv"""
+    rank = {n: r for r, (n, _, _) in enumerate(AXIS_DTYPES)}; uniq = {}
+    for c in cands: uniq.setdefault((c["offset"], c["length"], c["dtype"]), c)
+    rows = sorted(uniq.values(), key=lambda c: (c["offset"], rank[c["dtype"]]))
+    return {k: np.array([c[k] for c in rows], dtype=dt) if dt is not object else [c[k] for c in rows] for k, dt in AXIS_COLUMNS}
 
-    # Entropy windows
-    ent_rows = []
-    w = args.entropy_window
-    for i in range(0, size, w):
-        chunk = data[i:i + w]
-        H = shannon_entropy(chunk)
-        ent_rows.append({"offset": i, "length": len(chunk), "entropy_bits_per_byte": H})
-    ent_df = pd.DataFrame(ent_rows)
-    ent_csv = out_dir / "entropy_windows.csv"; ent_df.to_csv(ent_csv, index=False)
+def incremental_axes(data, args, prev_axes, rlo, rhi) -> dict:
+    """Alte Kandidaten außerhalb der Änderungen behalten, in den Änderungen (+ Nachbarelement) neu suchen.
+    Suchfenster je Bereich um axis_max+2 Elemente erweitert: jeder Lauf, der die Änderung berührt und <= axis_max
+    lang ist, liegt samt Nachbarn vollständig darin; an den Fensterrändern abgeschnittene Läufe berühren sie nicht."""
+    import pandas as pd
+    zlo, zhi = rlo - 4, rhi + 4
+    keep = prev_axes[~overlaps(*_axis_span(prev_axes), zlo, zhi)]
+    span = (args.axis_max + 2) * 4; cands = []
+    for a, b in zip(((np.maximum(zlo - span, 0) // 4) * 4).tolist(), np.minimum(zhi + span, len(data)).tolist()):
+        found = pd.DataFrame(find_axes(data, args.axis_min, args.axis_max, a, b), columns=keep.columns)
+        cands.append(found[overlaps(*_axis_span(found), zlo, zhi)])
+    return axes_frame(pd.concat([keep, *cands], ignore_index=True).to_dict(orient="records"))
 
-    # Entropy plot
-    plt.figure()
-    plt.plot([r["offset"]/1024 for r in ent_rows], [r["entropy_bits_per_byte"] for r in ent_rows])
-    plt.xlabel("Offset (KiB)"); plt.ylabel("Shannon entropy (bits/byte)"); plt.title("Windowed Entropy")
-    plt.tight_layout()
-    ent_png = out_dir / "entropy_plot.png"; plt.savefig(ent_png); plt.close()
+def _axis_span(df):
+    offs = df["offset"].to_numpy(np.int64)
+    return offs, offs + df["length"].to_numpy(np.int64) * df["dtype"].map({n: i for n, _, i in AXIS_DTYPES}).to_numpy(np.int64)
 
-    # Axis candidates
-    axis_candidates = []
-    f32 = view_as("<f4", data); i16 = view_as("<i2", data); u16 = view_as("<u2", data)
-    def add_axes(arr, stride, dtype_name):
-        for start, length in find_monotonic_runs(arr, args.axis_min, args.axis_max):
-            off = start * stride
-            vals = arr[start:start+length]
-            if not np.all(np.isfinite(vals)): continue
-            vmin, vmax = float(np.min(vals)), float(np.max(vals))
-            if vmax - vmin < 1e-3: continue
-            axis_candidates.append({"offset": int(off), "length": int(length), "dtype": dtype_name, "min": vmin, "max": vmax})
-    add_axes(f32, 4, "float32_le"); add_axes(i16.astype(np.float64), 2, "int16_le"); add_axes(u16.astype(np.float64), 2, "uint16_le")
-
-    axis_df = pd.DataFrame(axis_candidates)
-    if not axis_df.empty:
-        axis_df = axis_df.drop_duplicates(subset=["offset","length","dtype"]).sort_values("offset").reset_index(drop=True)
-
-    # Map search
-    maps = []; gaps = [int(x) for x in args.gap_candidates.split(',') if x.strip().isdigit()]
-    axis_list = axis_df.to_dict(orient="records") if not axis_df.empty else []
-
-    # 2D
-    for ax in axis_list:
-        axis_bytes = ax["length"] * (4 if ax["dtype"]=="float32_le" else 2)
-        for gap in gaps:
-            for dtype in ("int16_le","uint16_le","float32_le"):
-                start = ax["offset"] + axis_bytes + gap
-                stats = extract_block_stats(data, start, ax["length"], dtype)
-                if stats and stats["std"] > 1e-3:
-                    maps.append({"type":"2D","axis_dtype":ax["dtype"],"data_dtype":dtype,"axis_offset":ax["offset"],"data_offset":start,"shape":[int(ax["length"])],"std":stats["std"],"mean":stats["mean"]})
-                    break
+def dump_yaml(d, indent=0, lines=None):
+    if lines is None: lines = []
+    sp = "  " * indent
+    if isinstance(d, dict):
+        for k, v in d.items():
+            if isinstance(v, (dict, list)):
+                lines.append(f"{sp}{k}:"); dump_yaml(v, indent+1, lines)
             else:
-                continue
-            break
-
-    # 3D
-    for i in range(len(axis_list)-1):
-        ax1 = axis_list[i]
-        for j in range(i+1, min(i+50, len(axis_list))):
-            ax2 = axis_list[j]
-            dist = ax2["offset"] - (ax1["offset"] + ax1["length"] * (4 if ax1["dtype"]=="float32_le" else 2))
-            if dist < 0 or dist > 2048: continue
-            for gap in gaps:
-                for dtype in ("int16_le","uint16_le","float32_le"):
-                    mat_start = ax2["offset"] + ax2["length"] * (4 if ax2["dtype"]=="float32_le" else 2) + gap
-                    num_items = int(ax1["length"]) * int(ax2["length"])
-                    stats = extract_block_stats(data, mat_start, num_items, dtype)
-                    if stats and stats["std"] > 1e-3:
-                        maps.append({"type":"3D","axis1_dtype":ax1["dtype"],"axis2_dtype":ax2["dtype"],"data_dtype":dtype,"axis1_offset":ax1["offset"],"axis2_offset":ax2["offset"],"data_offset":mat_start,"shape":[int(ax1["length"]),int(ax2["length"])],"std":stats["std"],"mean":stats["mean"]})
-                        break
+                if isinstance(v, str) and ":" in v and not v.startswith("/"):
+                    lines.append(f'{sp}{k}: "{v}"')
                 else:
-                    continue
-                break
+                    lines.append(f"{sp}{k}: {v}")
+    elif isinstance(d, list):
+        for item in d:
+            if isinstance(item, (dict, list)):
+                lines.append(f"{sp}-"); dump_yaml(item, indent+1, lines)
+            else:
+                lines.append(f"{sp}- {item}")
+    return lines
 
-    maps_df = pd.DataFrame(maps)
-    maps_csv = out_dir / "maps_summary.csv"
-    if not maps_df.empty:
-        maps_df["score"] = maps_df["std"]
-        maps_df = maps_df.sort_values(["type","score"], ascending=[True,False]).reset_index(drop=True)
-        maps_df.to_csv(maps_csv, index=False)
+ANALYZER_VERSION = "5"  # bei Änderungen an Heuristik oder Artefakten erhöhen (invalidiert den Cache)
+ARTIFACTS = ["block_checksums.csv", "entropy_windows.csv", "entropy_plot.png", "axis_candidates.csv", "maps_summary.csv"]
 
-    # YAML summary
-    def dump_yaml(d, indent=0, lines=None):
-        if lines is None: lines = []
-        sp = "  " * indent
-        if isinstance(d, dict):
-            for k, v in d.items():
-                if isinstance(v, (dict, list)):
-                    lines.append(f"{sp}{k}:"); dump_yaml(v, indent+1, lines)
-                else:
-                    if isinstance(v, str) and ":" in v and not v.startswith("/"):
-                        lines.append(f'{sp}{k}: "{v}"')
-                    else:
-                        lines.append(f"{sp}{k}: {v}")
-        elif isinstance(d, list):
-            for item in d:
-                if isinstance(item, (dict, list)):
-                    lines.append(f"{sp}-"); dump_yaml(item, indent+1, lines)
-                else:
-                    lines.append(f"{sp}- {item}")
-        return lines
+# Gleichstände (z.B. int16/uint16-Zwillinge mit gleicher std) nach Offsets/Dtypes auflösen -> Voll- und
+# Inkrementell-Lauf liefern dieselbe Reihenfolge, unabhängig von der Reihenfolge der Eingangszeilen
+MAP_TIEBREAK = ["data_offset", "axis_offset", "axis1_offset", "axis2_offset", "data_dtype", "axis_dtype", "axis1_dtype", "axis2_dtype"]
+
+def map_sort_keys(maps: dict) -> tuple:
+    """lexsort-Schlüssel: type aufsteigend, score absteigend, dann MAP_TIEBREAK aufsteigend (fehlend zuerst)"""
+    keys = []
+    for c in reversed([c for c in MAP_TIEBREAK if c in maps]):
+        keys.append(_text_ranks(maps[c]) if c.endswith("dtype") else np.nan_to_num(np.asarray(maps[c], np.float64), nan=-1.0))
+    return (*keys, -maps["score"], _text_ranks(maps["type"]))
+
+def _text_ranks(v) -> np.ndarray:
+    """Rang je Wert unter den sortierten Texten (wie np.unique(v.astype(str), return_inverse=True)[1]); wenige
+    verschiedene Werte -> Wörterbuch statt Sortierung aller Zeilen"""
+    s = [str(x) for x in (v.tolist() if isinstance(v, np.ndarray) else v)]
+    rank = {u: i for i, u in enumerate(sorted(set(s)))}
+    return np.fromiter((rank[x] for x in s), np.int64, len(s))
 
+def parse_gaps(spec: str):
+    return [int(x) for x in spec.split(',') if x.strip().isdigit()]
+
+def analysis_params(args) -> dict:
+    return {"entropy_window": args.entropy_window, "entropy_stride": args.entropy_stride or args.entropy_window,
+            "block_size": args.block_size, "axis_min": args.axis_min, "axis_max": args.axis_max,
+            "gaps": parse_gaps(args.gap_candidates), "checksums": parse_algos(args.checksums),
+            "checksum_ranges": [f"0x{a:X}:0x{b:X}" for a, b in args.checksum_range]}
+
+def cache_params(args) -> dict:
+    """Schlüssel-Parameter: ohne Plots ein eigener Eintrag (sonst fehlte späteren Läufen mit Plot das PNG)"""
+    return {**analysis_params(args), **({"plots": False} if args.no_plots else {})}
+
+def parse_algos(spec: str):
+    return [a.strip() for a in spec.split(",") if a.strip()]
+
+def write_summary(in_name: str, out_dir: Path, args, facts: dict) -> dict:
+    has_maps = facts["num_maps_found"] > 0
     yaml_obj = {
         "med17_analysis": {
-            "metadata": {"input_file": in_path.name, "size_bytes": size, "md5": md5, "sha1": sha1, "sha256": sha256},
-            "checksums": {"block_size_bytes": args.block_size, "blocks_csv": str(blocks_csv)},
+            "metadata": {"input_file": in_name, "size_bytes": facts["size_bytes"], "md5": facts["md5"], "sha1": facts["sha1"], "sha256": facts["sha256"]},
+            "parameters": {**analysis_params(args), "analyzer_version": ANALYZER_VERSION},
+            "checksums": {"block_size_bytes": args.block_size, "algorithms": parse_algos(args.checksums),
+                          "blocks_csv": str(out_dir / "block_checksums.csv")},
             "entropy": {
                 "window_bytes": args.entropy_window,
-                "csv": str(ent_csv),
-                "plot_png": str(ent_png),
-                "summary": {
-                    "min": float(ent_df["entropy_bits_per_byte"].min()),
-                    "mean": float(ent_df["entropy_bits_per_byte"].mean()),
-                    "max": float(ent_df["entropy_bits_per_byte"].max()),
-                },
+                "stride_bytes": args.entropy_stride or args.entropy_window,
+                "csv": str(out_dir / "entropy_windows.csv"),
+                "plot_png": None if args.no_plots else str(out_dir / "entropy_plot.png"),
+                "summary": facts["entropy_summary"],
             },
             "maps": {
-                "found_count": int(len(maps)),
-                "csv": str(maps_csv) if not maps_df.empty else None,
-                "top_examples": (maps_df.head(20).to_dict(orient="records") if not maps_df.empty else []),
+                "found_count": facts["num_maps_found"],
+                "csv": str(out_dir / "maps_summary.csv") if has_maps else None,
+                "top_examples": facts["top_examples"],
             },
         }
     }
+    if facts.get("incremental"): yaml_obj["med17_analysis"]["incremental"] = facts["incremental"]
+    if facts.get("instrumentation"): yaml_obj["med17_analysis"]["instrumentation"] = facts["instrumentation"]
     yaml_text = "\n".join(dump_yaml(yaml_obj))
     (out_dir / "analysis_summary.yaml").write_text(yaml_text, encoding="utf-8")
+    return {"file": in_name, **{k: facts[k] for k in ("size_bytes","md5","sha1","sha256","num_axes_candidates","num_maps_found")}}
+
+def entropy_plot(png: Path, off, h):
+    import matplotlib.pyplot as plt
+    plt.figure()
+    plt.plot(off / 1024, h)
+    plt.xlabel("Offset (KiB)"); plt.ylabel("Shannon entropy (bits/byte)"); plt.title("Windowed Entropy")
+    plt.tight_layout()
+    plt.savefig(png); plt.close()
+
+def analyze(in_path: Path, out_dir: Path, args, prev_dir=None) -> dict:
+    """--profile: cProfile des ganzen Laufs -> <out>/profile.pstats + profile.txt"""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with profiled(out_dir / "profile" if args.profile else None):
+        return _analyze(in_path, out_dir, args, prev_dir)
+
+def _analyze(in_path: Path, out_dir: Path, args, prev_dir=None) -> dict:
+    stats = new_stats(); t0 = time.perf_counter()
+    with timed(stats, "load"):
+        data = load_bin(in_path); size = len(data)
+
+    with timed(stats, "hash"):
+        md5 = hashlib.md5(data).hexdigest()
+        sha1 = hashlib.sha1(data).hexdigest()
+        sha256 = hashlib.sha256(data).hexdigest()
+
+    # Cache (Inhalt + Parameter + Version)
+    with timed(stats, "cache_lookup"):
+        key = None if args.no_cache else cache_key(sha256, cache_params(args), ANALYZER_VERSION)
+        hit = cache_get(args.cache_dir, key) if key else None
+        if hit:
+            entry, facts = hit
+            if not cache_materialize(entry, out_dir, ARTIFACTS): hit = None  # Eintrag inzwischen unvollständig
+    if hit:
+        stats["timings_s"]["total"] = round(time.perf_counter() - t0, 4)
+        return {**write_summary(dump_name(in_path), out_dir, args, {**facts, "instrumentation": stats}), "cache_hit": True,
+                "elapsed_s": stats["timings_s"]["total"]}
+
+    # Block checksums (alle Blöcke + eigene Bereiche in einem Durchlauf)
+    with timed(stats, "checksums"):
+        blocks = checksum_rows(data, args.block_size, parse_algos(args.checksums), args.checksum_range)
+    nblocks = -(-size // args.block_size)
+    count(stats, "blocks", nblocks)
+
+    # Vorgänger-Analyse vor dem Schreiben lesen (prev_dir darf == out_dir sein); nur hier pandas/yaml
+    prev = None
+    if prev_dir:
+        with timed(stats, "load_previous"):
+            import pandas as pd
+            from incremental import changed_ranges, load_previous, map_reuse, merge_entropy, merge_maps, top_records
+            blocks_df = pd.DataFrame(blocks)
+            prev = load_previous(prev_dir, analysis_params(args), ANALYZER_VERSION, blocks_df)
+            if prev: rlo, rhi = changed_ranges(prev["blocks"].iloc[:nblocks], blocks_df.iloc[:nblocks])
+    with timed(stats, "write_csv"):
+        write_csv(out_dir / "block_checksums.csv", blocks)
+
+    # Entropy windows
+    with timed(stats, "entropy"):
+        if prev:
+            ent_off, ent_len, ent_h, ent_new = merge_entropy(data, prev["entropy"], args.entropy_window,
+                                                             args.entropy_stride or args.entropy_window, rlo, rhi)
+        else:
+            ent_off, ent_len, ent_h = window_entropy(data, args.entropy_window, args.entropy_stride)
+    count(stats, "entropy_windows", ent_h.size)
+    with timed(stats, "write_csv"):
+        write_csv(out_dir / "entropy_windows.csv", {"offset": ent_off, "length": ent_len, "entropy_bits_per_byte": ent_h})
+
+    # Entropy plot
+    if not args.no_plots:
+        with timed(stats, "entropy_plot"): entropy_plot(out_dir / "entropy_plot.png", ent_off, ent_h)
+
+    # Axis candidates
+    with timed(stats, "axis_search"):
+        if prev:
+            axes = incremental_axes(data, args, prev["axes"], rlo, rhi)
+        else:
+            axes = axes_frame(find_axes(data, args.axis_min, args.axis_max))
+    count(stats, "axis_candidates", nrows(axes))
+    with timed(stats, "write_csv"):
+        write_csv(out_dir / "axis_candidates.csv", axes)
+
+    # Map search (inkrementell: nur Jobs, die eine Änderung berühren oder neu sind)
+    gaps = parse_gaps(args.gap_candidates)
+    with timed(stats, "map_search"):
+        select, reused, inc = map_reuse(pd.DataFrame(axes), prev["axes"], prev["maps"], gaps, rlo, rhi) if prev else (None, [], {})
+        found = search_maps(data, records(axes), gaps, select=select, stats=stats)
+        if prev:  # übernommene Zeilen als Rohtext (raw), nur neue werden formatiert
+            maps, raw = merge_maps(found, reused)
+        else:  # Spalten/Typen wie früher pd.concat (maps_summary.csv unverändert)
+            maps, raw = concat_columns([cols for cols in found.values() if len(cols.get("type", ()))]), None
+        if maps:
+            maps["score"] = maps["std"]
+            order = np.lexsort(map_sort_keys(maps)); maps = take(maps, order)
+            if raw: raw = [raw[i] for i in order.tolist()]
+    count(stats, "maps_found", nrows(maps))
+    if maps:
+        with timed(stats, "write_csv"): write_csv(out_dir / "maps_summary.csv", maps, raw)
+
+    # YAML summary
+    facts = {
+        "size_bytes": size, "md5": md5, "sha1": sha1, "sha256": sha256,
+        "entropy_summary": {
+            "min": float(ent_h.min()) if ent_h.size else math.nan,
+            "mean": float(ent_h.mean()) if ent_h.size else math.nan,
+            "max": float(ent_h.max()) if ent_h.size else math.nan,
+        },
+        "num_axes_candidates": nrows(axes),
+        "num_maps_found": nrows(maps),
+        "top_examples": top_records(maps, raw, 20) if raw else records(maps, 20),
+    }
+    if prev:
+        facts["incremental"] = {"previous": str(prev_dir), "changed_blocks": int(sum((rhi - rlo + args.block_size - 1) // args.block_size)),
+                                "changed_bytes": int((rhi - rlo).sum()), "entropy_windows_recomputed": ent_new, **inc}
+    if key:
+        with timed(stats, "cache_store"):
+            skip = {"maps_summary.csv"} if not maps else set()
+            if args.no_plots: skip.add("entropy_plot.png")
+            cache_put(args.cache_dir, key, [out_dir / n for n in ARTIFACTS if n not in skip],
+                      {k: v for k, v in facts.items() if k != "incremental"}, args.cache_max_mb << 20)
+    stats["timings_s"]["total"] = round(time.perf_counter() - t0, 4)
+    result = write_summary(dump_name(in_path), out_dir, args, {**facts, "instrumentation": stats})
+    return {**result, "cache_hit": False, "elapsed_s": stats["timings_s"]["total"],
+            **({"incremental": facts["incremental"]} if prev else {})}
+
+def corpus_out_dirs(paths, out_root: Path):
+    """Ausgabe je Dump wie analyze_bins.sh: <out>/<stem>; doppelte Stems bekommen -2, -3, ..."""
+    seen, dirs = {}, []
+    for p in paths:
+        stem = dump_stem(p); seen[stem] = seen.get(stem, 0) + 1
+        dirs.append(out_root / (stem if seen[stem] == 1 else f"{stem}-{seen[stem]}"))
+    return dirs
+
+def analyze_one(in_path: str, out_dir: str, args) -> dict:
+    try:
+        prev_dir = Path(args.incremental_from) / Path(out_dir).name if args.incremental_from else None
+        return {"input": in_path, "out_dir": out_dir, "ok": True, **analyze(Path(in_path), Path(out_dir), args, prev_dir)}
+    except Exception as e:
+        return {"input": in_path, "out_dir": out_dir, "ok": False, "error": f"{type(e).__name__}: {e}"}
+
+def run_corpus(pattern: str, out_root: Path, args) -> int:
+    paths = sorted(p for p in glob.glob(pattern, recursive=True) if Path(p).is_file())
+    if not paths:
+        print(f"no input matches {pattern}", file=sys.stderr); return 1
+    out_root.mkdir(parents=True, exist_ok=True)
+    dirs = [str(d) for d in corpus_out_dirs(paths, out_root)]
+    jobs = args.jobs or os.cpu_count() or 1
+    if jobs == 1:
+        rows = [analyze_one(p, d, args) for p, d in zip(paths, dirs)]
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(paths))) as ex:
+            rows = list(ex.map(analyze_one, paths, dirs, [args] * len(paths)))
+    cols = ["input","out_dir","ok","cache_hit","elapsed_s","size_bytes","sha256","num_axes_candidates","num_maps_found","error"]
+    with (out_root / "index.csv").open("w", newline="", encoding="utf-8") as fh:
+        w = csv.DictWriter(fh, fieldnames=cols, extrasaction="ignore"); w.writeheader(); w.writerows(rows)
+    (out_root / "index.json").write_text(json.dumps(rows, indent=2), encoding="utf-8")
+    failed = sum(1 for r in rows if not r["ok"])
+    print(json.dumps({"inputs": len(rows), "failed": failed, "index": str(out_root / "index.csv")}, indent=2))
+    return 1 if failed else 0
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("input", help="MED17 VR BIN oder Glob (z.B. 'rawdata/**/*.bin') für den Corpus-Modus")
+    p.add_argument("--out", required=True, help="Output directory (Corpus-Modus: je Dump <out>/<stem>)")
+    p.add_argument("--jobs", type=int, default=0, help="Worker-Prozesse im Corpus-Modus (Default: CPU-Anzahl)")
+    p.add_argument("--entropy-window", type=int, default=4096)
+    p.add_argument("--entropy-stride", type=int, default=None, help="Fenster-Schrittweite (Default: = Fenster)")
+    p.add_argument("--block-size", type=int, default=64*1024)
+    p.add_argument("--axis-min", type=int, default=8)
+    p.add_argument("--axis-max", type=int, default=128)
+    p.add_argument("--gap-candidates", type=str, default="0,16,32,64,128,256")
+    p.add_argument("--checksums", default=",".join(ALGORITHMS), help=f"Spalten in block_checksums.csv ({','.join(ALGORITHMS)})")
+    p.add_argument("--checksum-range", action="append", default=[], type=parse_range,
+                   help="Zusätzlicher Bereich START:END (hex/dez, END exklusiv) als eigene Zeile in block_checksums.csv")
+    p.add_argument("--cache-dir", default=DEFAULT_DIR, help="Ergebnis-Cache (Default: $ECULIBRE_CACHE_DIR oder .cache/eculibre)")
+    p.add_argument("--cache-max-mb", type=int, default=DEFAULT_MAX_MB, help="LRU-Obergrenze des Caches")
+    p.add_argument("--no-cache", action="store_true", help="Cache weder lesen noch schreiben")
+    p.add_argument("--no-plots", action="store_true", help="Kein entropy_plot.png (matplotlib wird nicht importiert)")
+    p.add_argument("--profile", action="store_true", help="cProfile des Laufs -> <out>/profile.pstats + profile.txt")
+    p.add_argument("--incremental-from", default=None,
+                   help="Frühere Analyse (gleiche Parameter): nur geänderte Blöcke neu auswerten (Corpus-Modus: <dir>/<stem>)")
+    args = p.parse_args()
 
-    print(json.dumps({"file": in_path.name, "size_bytes": size, "md5": md5, "sha1": sha1, "sha256": sha256,
-                      "num_axes_candidates": int(len(axis_df)) if not axis_df.empty else 0,
-                      "num_maps_found": int(len(maps))}, indent=2))
+    if not Path(args.input).is_file() and any(c in args.input for c in "*?["):
+        return run_corpus(args.input, Path(args.out), args)
+    print(json.dumps(analyze(Path(args.input), Path(args.out), args, args.incremental_from), indent=2))
+    return 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
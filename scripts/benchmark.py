@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark der Analyse-CLIs -> JSON (stdout oder --out), zum Vergleich zwischen Commits
+- startup: Wandzeit von `python <tool> --help` in frischen Interpretern (Median über --repeat Läufe), dazu der
+  nackte Interpreter-Start und welche schweren Module (numpy/pandas/matplotlib/yaml) dabei geladen werden
+- stages: je synthetischem Dump (synth_dump.py, --sizes in MiB) Zeit jeder Stufe: Hashes, Block-Checksummen,
+  Entropie, Strings, Marker, Achsen-/Map-Suche, HEX-Export/-Import, mapviz (Extraktion + Rendern von --render-maps
+  Figuren); jede Stufe --stage-repeat mal, bestes Ergebnis
+- Prüfungen: Recall der eingebetteten Maps (map_search), HEX-Rundreise, mapviz.extract_maps == eingebettete Werte
+
+Usage:
+  python scripts/benchmark.py [--sizes 2,4,8,32] [--repeat 5] [--out bench.json]
+  python scripts/benchmark.py --skip-startup --sizes 2 --render-maps 0
+"""
+import argparse, hashlib, json, platform, statistics, subprocess, sys, tempfile, time
+from pathlib import Path
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "tools"))
+from analyze_med17 import axes_frame, find_axes, parse_gaps
+from checksums import ALGORITHMS, checksum_rows
+from entropy_engine import window_entropy
+from ihex import read_hex, write_hex
+from map_search import search_maps
+from marker_scan import compile_markers, scan_markers
+from re_scan import MARKERS
+from string_scan import ascii_strings, utf16le_strings
+from synth_dump import MIB, recall, synth_dump
+from table_io import concat_columns, records
+import mapviz
+
+GAPS = "0,16,32,64,128,256"  # wie analyze_med17 --gap-candidates
+TOOLS = {"analyze_med17": ROOT / "scripts" / "analyze_med17.py",
+         "re_scan": ROOT / "scripts" / "re_scan.py",
+         "mapviz": ROOT / "tools" / "mapviz.py"}
+HEAVY = ("numpy", "pandas", "matplotlib", "yaml")
+
+# Tool wie `python <tool> --help` ausführen, danach geladene schwere Module als JSON auf stderr
+PROBE = """import json, os, runpy, sys
+tool = sys.argv[1]; sys.argv = [tool, "--help"]; sys.path.insert(0, os.path.dirname(tool))
+try: runpy.run_path(tool, run_name="__main__")
+except SystemExit: pass
+print(json.dumps([m for m in %r if m in sys.modules]), file=sys.stderr)""" % (HEAVY,)
+
+def wall(cmd, repeat: int) -> float:
+    ts = []
+    for _ in range(repeat):
+        t = time.perf_counter(); subprocess.run(cmd, capture_output=True, check=True); ts.append(time.perf_counter() - t)
+    return round(statistics.median(ts), 4)
+
+def heavy_modules(tool: Path) -> list:
+    r = subprocess.run([sys.executable, "-c", PROBE, str(tool)], capture_output=True, text=True, check=True)
+    return json.loads(r.stderr.strip().splitlines()[-1])
+
+def bench_startup(repeat: int) -> dict:
+    out = {"interpreter_s": wall([sys.executable, "-c", "pass"], repeat), "tools": {}}
+    for name, tool in TOOLS.items():
+        out["tools"][name] = {"help_s": wall([sys.executable, str(tool), "--help"], repeat),
+                              "help_heavy_modules": heavy_modules(tool)}
+    return out
+
+def mapviz_specs(planted) -> list:
+    """Eingebettete Maps als mapviz-Spec (s16, little endian)"""
+    maps = [{"name": f"m{k}_{p['type']}", "offset": p["data_offset"], "dtype": "s16",
+             "rows": len(p["values"]), "cols": len(p["values"][0])} for k, p in enumerate(planted)]
+    return [{"maps": maps}]
+
+def bench_stages(data: bytes, planted, tmp: Path, repeat=1, render_maps=8, style="heatmap") -> dict:
+    times = {}
+    def stage(name, fn, *args):
+        best = None
+        for _ in range(repeat):
+            t = time.perf_counter(); res = fn(*args); dt = time.perf_counter() - t
+            best = dt if best is None else min(best, dt)
+        times[name] = round(best, 4)
+        return res
+
+    stage("hash", lambda: [hashlib.new(h, data).hexdigest() for h in ("md5", "sha1", "sha256")])
+    stage("checksums", checksum_rows, data, 64 * 1024, ALGORITHMS)
+    stage("entropy", window_entropy, data, 4096)
+    strings = stage("strings", lambda: (ascii_strings(data, 4), utf16le_strings(data, 4)))
+    cm = compile_markers(MARKERS)
+    pidx, _ = stage("markers", scan_markers, data, cm)
+    axes = stage("axis_search", lambda: axes_frame(find_axes(data)))
+    found = stage("map_search", search_maps, data, records(axes), parse_gaps(GAPS))
+    maps = concat_columns([c for c in found.values() if len(c.get("type", ()))])
+    hex_path = tmp / "bench.hex"
+    stage("hex_export", write_hex, hex_path, data)
+    start, buf, _ = stage("hex_import", read_hex, hex_path)
+    index = stage("mapviz_compile", mapviz.compile_maps, mapviz_specs(planted))
+    Z = stage("mapviz_extract", mapviz.extract_maps, data, index)
+    figs = [(str(tmp / f"{m['safe']}.png"), m["name"], m["X"], m["Y"], z)
+            for m, z in list(zip(index["maps"], Z))[:render_maps]]
+    stage(f"mapviz_render_{style}", lambda: [mapviz.RENDERERS[style](*f) for f in figs])
+
+    got = recall(planted, maps)
+    return {"bytes": len(data), "stages": times,
+            "counts": {"ascii_strings": len(strings[0]), "utf16le_strings": len(strings[1]), "markers": int(pidx.size),
+                       "axes": len(axes["offset"]), "map_rows": len(maps.get("type", ())), "rendered_maps": len(figs)},
+            "checks": {"recall": got, "recall_ok": all(r["found"] == r["planted"] for r in got.values()),
+                       "hex_roundtrip_ok": start == 0 and bytes(buf) == data,
+                       "mapviz_extract_ok": all(isinstance(z, np.ndarray) and z.tolist() == p["values"]
+                                                for z, p in zip(Z, planted))}}
+
+def git_rev() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=5, help="Läufe je Startzeit-Messung (Median)")
+    ap.add_argument("--sizes", default="2,4,8,32", help="Synthetische Dumps in MiB (leer: keine Stufen-Messung)")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--stage-repeat", type=int, default=1, help="Läufe je Stufe (bestes Ergebnis)")
+    ap.add_argument("--render-maps", type=int, default=8, help="Anzahl gerenderter Map-Figuren je Dump")
+    ap.add_argument("--style", choices=sorted(mapviz.RENDERERS), default="heatmap")
+    ap.add_argument("--skip-startup", action="store_true")
+    ap.add_argument("--keep-dumps", default=None, help="Synthetische Dumps + planted.json hier ablegen")
+    ap.add_argument("--out", default=None, help="JSON-Datei (Default: stdout)")
+    a = ap.parse_args()
+    res = {"python": platform.python_version(), "numpy": np.__version__, "commit": git_rev(), "seed": a.seed}
+    if not a.skip_startup: res["startup"] = {"repeat": a.repeat, **bench_startup(a.repeat)}
+    sizes = [int(x) for x in a.sizes.split(",") if x.strip()]
+    if sizes and a.render_maps:  # einmaliger Import nicht in der ersten Render-Stufe mitzählen
+        t = time.perf_counter(); mapviz._plt(); res["matplotlib_import_s"] = round(time.perf_counter() - t, 4)
+    if sizes: res["stages"] = {}
+    for mib in sizes:
+        data, planted = synth_dump(mib * MIB, a.seed)
+        if a.keep_dumps:
+            keep = Path(a.keep_dumps); keep.mkdir(parents=True, exist_ok=True)
+            (keep / f"synth_{mib}m.bin").write_bytes(data)
+            (keep / f"synth_{mib}m.planted.json").write_text(json.dumps(planted), encoding="utf-8")
+        with tempfile.TemporaryDirectory() as tmp:
+            res["stages"][f"{mib}MiB"] = bench_stages(data, planted, Path(tmp), a.stage_repeat, a.render_maps, a.style)
+        print(f"{mib} MiB: {sum(res['stages'][f'{mib}MiB']['stages'].values()):.2f} s", file=sys.stderr)
+    text = json.dumps(res, indent=2)
+    if a.out: Path(a.out).write_text(text + "\n", encoding="utf-8")
+    else: print(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
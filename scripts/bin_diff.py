@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+Binär-Diff zweier ECU-Dumps (z.B. Kalibrier-Revisionen) mit Zuordnung zu Maps
+- diff_ranges: Vergleich als uint64-Wörter (bin_loader.view_as, zero-copy über mmap) in großen Stücken, nur
+  abweichende Wörter bytegenau; Läufe mit Abstand <= --merge-gap zusammengefasst; Größenunterschied = Bereich am Ende
+- Map-Quellen: mapviz-Specs (--specs), Kandidaten einer analyze_med17-Ausgabe (--analysis, maps_summary.csv) und
+  lokal erkannte Kandidaten (Achsen + Map-Suche nur im Umfeld der Änderungen, in beiden Dumps; --no-detect aus)
+- Zuordnung Bereich -> Maps über region_index (Ausdehnung Achse(n) .. Matrixende), je Map Zell-Deltas
+  (geänderte Zellen, max. |Delta| über endliche Deltas bzw. null, erste --max-cells Zellen alt/neu, NaN/inf -> null)
+  und geänderte Achsen
+- Ausgabe JSON (stdout oder --out), Zeiten je Stufe (instrument.py)
+
+Usage:
+  python bin_diff.py old.bin new.bin [--specs 'mapspecs/**/*.yaml'] [--analysis out/old] [--out diff.json]
+"""
+import argparse, csv, hashlib, json, math, sys, time
+from pathlib import Path
+import numpy as np
+from analyze_med17 import axes_frame, find_axes, parse_gaps
+from bin_loader import CHUNK, load_bin, view_as
+from instrument import new_stats, timed
+from map_search import ITEMSIZE, NP_DTYPES, search_maps
+from region_index import build_index, overlaps, query_range
+from table_io import records
+
+GAPS = "0,16,32,64,128,256"  # wie analyze_med17 --gap-candidates
+AXIS_MIN, AXIS_MAX, MAX_DIST = 8, 128, 2048
+
+def _merge(lo, hi, gap: int):
+    """Sortierte Läufe [lo, hi) mit Abstand <= gap zusammenfassen."""
+    if lo.size == 0: return lo, hi
+    cut = np.flatnonzero(lo[1:] - hi[:-1] > gap) + 1
+    return lo[np.r_[0, cut]], hi[np.r_[cut - 1, hi.size - 1]]
+
+def _runs(pos, gap: int):
+    """Sortierte Byte-Positionen -> Läufe [lo, hi)"""
+    return _merge(pos, pos + 1, gap)
+
+def diff_ranges(a, b, merge_gap: int = 0, chunk: int = CHUNK):
+    """-> lo, hi (int64, sortiert, disjunkt) aller Bereiche, in denen a und b sich unterscheiden."""
+    n = min(len(a), len(b)); words = n // 8
+    A, B = view_as("<u8", a)[:words], view_as("<u8", b)[:words]
+    los, his = [], []; step = max(1, chunk // 8)
+    for i in range(0, words, step):
+        w = np.flatnonzero(A[i:i + step] != B[i:i + step])
+        if not w.size: continue
+        w += i
+        m = A[w].view(np.uint8).reshape(-1, 8) != B[w].view(np.uint8).reshape(-1, 8)
+        lo, hi = _runs((w[:, None] * 8 + np.arange(8))[m], merge_gap); los.append(lo); his.append(hi)
+    ta = np.frombuffer(memoryview(a)[words * 8:n], np.uint8); tb = np.frombuffer(memoryview(b)[words * 8:n], np.uint8)
+    lo, hi = _runs(np.flatnonzero(ta != tb) + words * 8, merge_gap); los.append(lo); his.append(hi)
+    if len(a) != len(b):
+        los.append(np.array([n], np.int64)); his.append(np.array([max(len(a), len(b))], np.int64))
+    return _merge(np.concatenate(los).astype(np.int64), np.concatenate(his).astype(np.int64), merge_gap)
+
+def _map_entry(source, name, kind, data_off, dtype, shape, axes, scale=1.0, add=0.0):
+    """axes: [(offset, np-dtype, n)]; Ausdehnung = erste Achse (bzw. Matrix) .. Matrixende"""
+    nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+    return {"source": source, "name": name, "type": kind, "offset": int(data_off), "dtype": np.dtype(dtype).str,
+            "shape": [int(x) for x in shape], "axes": axes, "scale": scale, "add": add,
+            "extent": (min([int(data_off)] + [o for o, _, _ in axes]), int(data_off) + nbytes)}
+
+def _rows_to_maps(source, rows):
+    """maps_summary-Zeilen (Spalten wie search_maps/maps_summary.csv, als dicts) -> Map-Einträge"""
+    out = []
+    for r in rows:
+        shape = json.loads(r["shape"]) if isinstance(r["shape"], str) else list(r["shape"])
+        dt = NP_DTYPES[r["data_dtype"]]
+        if r["type"] == "2D":
+            axes = [(int(float(r["axis_offset"])), NP_DTYPES[r["axis_dtype"]], shape[0])]
+            shape = [1, shape[0]]
+        else:
+            axes = [(int(float(r["axis1_offset"])), NP_DTYPES[r["axis1_dtype"]], shape[0]),
+                    (int(float(r["axis2_offset"])), NP_DTYPES[r["axis2_dtype"]], shape[1])]
+        name = f"{r['type']}@0x{int(float(r['data_offset'])):X}[{'x'.join(map(str, shape[-2 if r['type'] == '3D' else -1:]))}]"
+        out.append(_map_entry(source, name, r["type"], int(float(r["data_offset"])), dt, shape, axes))
+    return out
+
+def spec_maps(patterns) -> list:
+    """mapviz-Specs (YAML) -> Map-Einträge (ohne Achsen, mit scale/add)"""
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tools"))
+    import mapviz
+    index = mapviz.compile_maps(mapviz.load_specs(patterns))
+    return [_map_entry("spec", m["name"], "spec", m["off"], m["rec"].base, m["rec"].shape, [], m["scale"], m["add"])
+            for m in index["maps"] if not m["error"]]
+
+def analysis_maps(out_dir, rlo, rhi) -> list:
+    """maps_summary.csv einer analyze_med17-Ausgabe; nur Zeilen, deren Ausdehnung eine Änderung berührt"""
+    p = Path(out_dir) / "maps_summary.csv"
+    if not p.is_file(): return []
+    with p.open(newline="", encoding="utf-8") as fh:
+        rows = list(csv.DictReader(fh))
+    if not rows: return []
+    num = lambda k: np.array([float(r.get(k) or "nan") for r in rows])
+    data = num("data_offset"); first = np.fmin(np.fmin(num("axis_offset"), num("axis1_offset")), data)
+    cells = np.array([math.prod(json.loads(r["shape"])) for r in rows])
+    nb = cells * np.array([ITEMSIZE[r["data_dtype"]] for r in rows])
+    keep = overlaps(first.astype(np.int64), (data + nb).astype(np.int64), rlo, rhi)
+    return _rows_to_maps("analysis", [rows[i] for i in np.flatnonzero(keep).tolist()])
+
+def detect_maps(data, rlo, rhi, gaps) -> list:
+    """Map-Kandidaten, deren Ausdehnung eine Änderung berührt: Achsen nur in [lo - REACH, hi + FWD) suchen
+    (Suchfenster um axis_max+2 Elemente erweitert -> Läufe dort vollständig), Map-Suche nur für berührende Jobs."""
+    if rlo.size == 0 or not gaps: return []
+    g = max(gaps); mat = AXIS_MAX * AXIS_MAX * 4
+    reach = AXIS_MAX * 4 + MAX_DIST + AXIS_MAX * 4 + g + mat  # erste Achse .. Matrixende (3D, schlimmster Fall)
+    fwd = MAX_DIST + AXIS_MAX * 4; span = (AXIS_MAX + 2) * 4
+    wlo, whi = _merge(np.maximum(rlo - reach, 0), np.minimum(rhi + fwd, len(data)), 2 * span)
+    cands = []
+    for a, b in zip(wlo.tolist(), whi.tolist()):
+        found = find_axes(data, AXIS_MIN, AXIS_MAX, (max(a - span, 0) // 4) * 4, min(b + span, len(data)))
+        cands += [c for c in found if a <= c["offset"] < b]
+    axes = axes_frame(cands)
+    if not axes["offset"].size: return []
+    offs, lens = axes["offset"], axes["length"]
+    ends = offs + lens * np.array([ITEMSIZE[d] for d in axes["dtype"]], dtype=np.int64)
+    def select(kind, idx):
+        if kind == "2D":
+            i = idx[0]; return overlaps(offs[i], ends[i] + g + 4 * lens[i], rlo, rhi)
+        pi, pj = idx; return overlaps(offs[pi], ends[pj] + g + 4 * lens[pi] * lens[pj], rlo, rhi)
+    found = search_maps(data, records(axes), gaps, max_dist=MAX_DIST, select=select)
+    return _rows_to_maps("detected", [r for cols in found.values() if len(cols.get("type", ())) for r in records(cols)])
+
+def _values(data, m):
+    nb = int(np.prod(m["shape"])) * np.dtype(m["dtype"]).itemsize
+    if m["offset"] + nb > len(data): return None
+    z = np.frombuffer(memoryview(data)[m["offset"]:m["offset"] + nb], dtype=m["dtype"]).reshape(m["shape"])
+    return z.astype(float) * m["scale"] + m["add"]
+
+def _axes_changed(a, b, m) -> list:
+    out = []
+    for off, dt, n in m["axes"]:
+        nb = n * np.dtype(dt).itemsize
+        out.append(bytes(memoryview(a)[off:off + nb]) != bytes(memoryview(b)[off:off + nb]))
+    return out
+
+def map_deltas(a, b, m, max_cells: int) -> dict:
+    za, zb = _values(a, m), _values(b, m)
+    res = {"source": m["source"], "name": m["name"], "type": m["type"], "offset": f"0x{m['offset']:X}",
+           "dtype": m["dtype"], "shape": m["shape"], "axes_changed": _axes_changed(a, b, m)}
+    if za is None or zb is None:
+        return {**res, "changed_cells": None, "error": "map outside one of the dumps"}
+    with np.errstate(invalid="ignore"):
+        ch = (za != zb) & ~(np.isnan(za) & np.isnan(zb))
+    rr, cc = np.nonzero(ch)
+    with np.errstate(invalid="ignore", over="ignore"):
+        d = (zb - za)[ch]
+    fin = np.isfinite(d)  # NaN/inf (float32-Maps, NaN-Trenner) zählen als Änderung, aber nicht zum Delta
+    cell = lambda z: [x if math.isfinite(x) else None for x in z[ch][:max_cells].tolist()]  # JSON ohne NaN/Infinity
+    return {**res, "changed_cells": int(ch.sum()), "cells": int(ch.size),
+            "max_abs_delta": float(np.abs(d[fin]).max()) if fin.any() else None,
+            "changes": [[r, c, x, y] for r, c, x, y in zip(rr[:max_cells].tolist(), cc[:max_cells].tolist(), cell(za), cell(zb))]}
+
+def diff_dumps(a, b, args) -> dict:
+    stats = new_stats(); t0 = time.perf_counter()
+    with timed(stats, "compare"):
+        rlo, rhi = diff_ranges(a, b, args.merge_gap)
+    maps = []
+    with timed(stats, "candidates"):
+        if args.specs: maps += spec_maps([args.specs])
+        if args.analysis: maps += analysis_maps(args.analysis, rlo, rhi)
+        if not args.no_detect:
+            seen = {(m["offset"], tuple(m["shape"]), m["dtype"]) for m in maps}
+            for data in (a, b):  # Änderungen können Achsen zerstören oder erzeugen
+                for m in detect_maps(data, rlo, rhi, parse_gaps(args.gap_candidates)):
+                    k = (m["offset"], tuple(m["shape"]), m["dtype"])
+                    if k not in seen: seen.add(k); maps.append(m)
+    with timed(stats, "attribute"):
+        idx = build_index([(*m["extent"], k) for k, m in enumerate(maps)])
+        hit = [query_range(idx, lo, hi) for lo, hi in zip(rlo.tolist(), rhi.tolist())]
+        per_range = [sorted(idx["labels"][i] for i in h.tolist()) for h in hit]
+        touched = sorted({k for ks in per_range for k in ks})
+        deltas = {k: map_deltas(a, b, maps[k], args.max_cells) for k in touched}
+        order = sorted(touched, key=lambda k: (-(deltas[k]["changed_cells"] or 0), maps[k]["source"] != "spec", k))
+    rank = {k: r for r, k in enumerate(order[:args.max_maps])}
+    ranges = [{"start": f"0x{lo:X}", "end": f"0x{hi:X}", "length": hi - lo,
+               "maps": [maps[k]["name"] for k in sorted(ks, key=lambda k: rank.get(k, len(rank)))[:10]], "maps_total": len(ks)}
+              for lo, hi, ks in zip(rlo.tolist(), rhi.tolist(), per_range)]
+    stats["timings_s"]["total"] = round(time.perf_counter() - t0, 4)
+    return {"size_a": len(a), "size_b": len(b), "changed_bytes": int((rhi - rlo).sum()), "ranges_count": len(ranges),
+            "unattributed_bytes": int(sum(hi - lo for lo, hi, ks in zip(rlo.tolist(), rhi.tolist(), per_range) if not ks)),
+            "maps_touched": len(touched), "ranges": ranges[:args.max_ranges],
+            "maps": [deltas[k] for k in order[:args.max_maps]], "instrumentation": stats}
+
+def main():
+    ap = argparse.ArgumentParser(description="Binär-Diff zweier Dumps mit Map-Zuordnung")
+    ap.add_argument("a", help="Alter Dump (.bin, auch .gz/.xz/.zst/.zip)")
+    ap.add_argument("b", help="Neuer Dump")
+    ap.add_argument("--specs", default=None, help="mapviz-Specs (Glob), z.B. 'mapspecs/**/*.yaml'")
+    ap.add_argument("--analysis", default=None, help="analyze_med17-Ausgabe (maps_summary.csv) als Kandidatenquelle")
+    ap.add_argument("--no-detect", action="store_true", help="Keine lokale Achsen-/Map-Suche um die Änderungen")
+    ap.add_argument("--gap-candidates", default=GAPS)
+    ap.add_argument("--merge-gap", type=int, default=16, help="Bereiche mit höchstens so vielen gleichen Bytes dazwischen zusammenfassen")
+    ap.add_argument("--max-cells", type=int, default=32, help="Zell-Änderungen je Map im Report")
+    ap.add_argument("--max-maps", type=int, default=50)
+    ap.add_argument("--max-ranges", type=int, default=1000)
+    ap.add_argument("--out", default=None, help="JSON-Datei (Default: stdout)")
+    args = ap.parse_args()
+    a, b = load_bin(args.a), load_bin(args.b)
+    res = {"a": args.a, "b": args.b, "sha256_a": hashlib.sha256(a).hexdigest(), "sha256_b": hashlib.sha256(b).hexdigest(),
+           **diff_dumps(a, b, args)}
+    text = json.dumps(res, indent=2, allow_nan=False)
+    if args.out: Path(args.out).write_text(text + "\n", encoding="utf-8")
+    else: print(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+Gemeinsamer Dump-Loader (zero-copy)
+- load_bin: Datei einmal per mmap (read-only) öffnen -> memoryview für alle Stufen
+  (hashlib, np.frombuffer, Slices ohne Kopie; die Abbildung lebt so lange wie ihre Views)
+- komprimierte Dumps (.gz/.xz/.zst) und ZIP-Pakete (import_hex_to_bins.package_zip, genau ein .bin darin)
+  transparent: load_bin entpackt stückweise in eine anonyme Temp-Datei und mappt diese (Speicher bleibt begrenzt),
+  iter_dump liefert den Inhalt sequentiell in Stücken für Streaming-Stufen (stream_scan.py)
+- .zst braucht das Paket zstandard (nur wenn solche Dateien gelesen werden)
+- view_as: typisierte NumPy-Sicht (z.B. "<i2", "<f4") ohne Kopie, Rest-Bytes abgeschnitten
+"""
+import gzip, lzma, mmap, os, shutil, tempfile, zipfile
+from pathlib import Path
+import numpy as np
+
+CHUNK = 1 << 20
+COMPRESSED = (".gz", ".xz", ".zst")
+DUMP_SUFFIXES = (".bin", *COMPRESSED, ".zip")
+
+def _zip_member(z: zipfile.ZipFile) -> str:
+    bins = [n for n in z.namelist() if n.lower().endswith(".bin")]
+    if len(bins) != 1: raise ValueError(f"{z.filename}: expected exactly one .bin member, found {len(bins)}")
+    return bins[0]
+
+def open_dump(path):
+    """Dump als binärer Datei-Stream öffnen (entpackt bei .gz/.xz/.zst/.zip)."""
+    p = Path(path); suf = p.suffix.lower()
+    if suf == ".gz": return gzip.open(p, "rb")
+    if suf == ".xz": return lzma.open(p, "rb")
+    if suf == ".zst":
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError(f"{p}: reading .zst needs the 'zstandard' package") from None
+        return zstandard.ZstdDecompressor().stream_reader(p.open("rb"), closefd=True)
+    if suf == ".zip":
+        z = zipfile.ZipFile(p)
+        try:
+            fh = z.open(_zip_member(z))
+        except Exception:
+            z.close(); raise
+        z.close()  # ZipExtFile hält die Datei selbst offen
+        return fh
+    return p.open("rb")
+
+def dump_name(path) -> str:
+    """Dateiname des eigentlichen Dumps: 'x.bin.gz' -> 'x.bin', ZIP -> Name des .bin darin."""
+    p = Path(path)
+    if p.suffix.lower() == ".zip":
+        with zipfile.ZipFile(p) as z: return Path(_zip_member(z)).name
+    return p.stem if p.suffix.lower() in COMPRESSED else p.name
+
+def dump_stem(path) -> str:
+    return Path(dump_name(path)).stem
+
+def iter_dump(path, chunk: int = CHUNK):
+    """Dump-Inhalt in Stücken zu genau chunk Bytes (letztes ggf. kürzer), auch für komprimierte Eingaben."""
+    with open_dump(path) as fh:
+        while True:
+            buf = fh.read(chunk)
+            while buf and len(buf) < chunk:  # Dekompressoren dürfen kürzer liefern
+                more = fh.read(chunk - len(buf))
+                if not more: break
+                buf += more
+            if not buf: return
+            yield buf
+
+def load_bin(path) -> memoryview:
+    p = Path(path)
+    if p.suffix.lower() in (*COMPRESSED, ".zip"):
+        with open_dump(p) as src, tempfile.TemporaryFile() as tmp:
+            shutil.copyfileobj(src, tmp, CHUNK); tmp.flush()
+            if tmp.tell() == 0: return memoryview(b"")
+            mm = mmap.mmap(tmp.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(mm)
+    with p.open("rb") as f:
+        if os.fstat(f.fileno()).st_size == 0: return memoryview(b"")
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return memoryview(mm)
+
+def view_as(dtype, b, offset=0):
+    mv = memoryview(b)[offset:]
+    itemsize = np.dtype(dtype).itemsize
+    trim = len(mv) - (len(mv) % itemsize)
+    return np.frombuffer(mv[:trim], dtype=dtype)
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Checksummen über Blöcke und beliebige Bereiche (alle Bereiche auf einmal)
+- additive8/16/32: Bytesumme mod 2^8/2^16/2^32 (additive32 = bisheriges block_additive32)
+- word16_le/be, word32_le/be: Summe der 16/32-Bit-Wörter ab Bereichsanfang (Restbytes mit 0 aufgefüllt)
+- crc32 (zlib/IEEE), crc32_bzip2 (nicht reflektiert), crc32_mpeg2 (wie bzip2, ohne Final-XOR)
+- Gleich lange, lückenlose Blöcke: reshape + sum(axis=1); sonstige Bereiche einzeln über memoryviews
+- Nicht reflektierte CRCs über zlib: Bytes bitgespiegelt einmal vorab (Tabelle), Ergebnis 32-Bit-gespiegelt
+- CLI ohne --range: Blöcke im Streaming über bin_loader.iter_dump (auch .gz/.xz/.zst/.zip), Speicher ~ Stückgröße
+
+Usage:
+  python checksums.py <dump.bin|glob> [--block-size 65536] [--range 0x0:0x8000 ...] [--algos crc32,additive16] [--out x.csv]
+"""
+import argparse, csv, glob, sys, zlib
+from pathlib import Path
+import numpy as np
+from bin_loader import CHUNK, iter_dump, load_bin, view_as
+
+SUMS = {  # name -> (Element-dtype, Bits)
+    "additive8": ("<u1", 8), "additive16": ("<u1", 16), "additive32": ("<u1", 32),
+    "word16_le": ("<u2", 16), "word16_be": (">u2", 16), "word32_le": ("<u4", 32), "word32_be": (">u4", 32),
+}
+CRCS = ("crc32", "crc32_bzip2", "crc32_mpeg2")
+ALGORITHMS = list(SUMS) + list(CRCS)
+BITS = {**{k: b for k, (_, b) in SUMS.items()}, **{k: 32 for k in CRCS}}
+
+_BITREV8 = np.array([int(f"{i:08b}"[::-1], 2) for i in range(256)], dtype=np.uint8)
+
+def block_ranges(size: int, block: int):
+    starts = np.arange(0, size, block, dtype=np.int64)
+    return starts, np.minimum(starts + block, size)
+
+def parse_range(spec: str):
+    """'START:END' (dezimal oder 0x..), END exklusiv."""
+    a, b = spec.split(":")
+    return int(a, 0), int(b, 0)
+
+def _uniform_prefix(starts, ends) -> int:
+    """Anzahl führender Bereiche gleicher Länge, die lückenlos aufeinander folgen."""
+    L = ends - starts
+    ok = (L == L[0]) & (starts == starts[0] + np.arange(starts.size) * L[0])
+    return int(starts.size if ok.all() else ok.argmin())
+
+def _range_sums(data, starts, ends, dt) -> np.ndarray:
+    isz = np.dtype(dt).itemsize; mv = memoryview(data)
+    out = np.zeros(starts.size, dtype=np.uint64)
+    m = _uniform_prefix(starts, ends)
+    if m and (ends[0] - starts[0]) % isz == 0:
+        per = int(ends[0] - starts[0]) // isz
+        out[:m] = view_as(dt, data, int(starts[0]))[:m * per].reshape(m, per).sum(axis=1, dtype=np.uint64)
+    else:
+        m = 0
+    for i in range(m, starts.size):
+        s, e = int(starts[i]), int(ends[i])
+        a = view_as(dt, mv[s:e]); t = int(a.sum(dtype=np.uint64))
+        rem = (e - s) % isz
+        if rem:  # Restbytes als auf Wortbreite mit 0 aufgefülltes Wort
+            t += int.from_bytes(mv[e - rem:e].tobytes() + b"\0" * (isz - rem), "big" if dt[0] == ">" else "little")
+        out[i] = t
+    return out
+
+def _bitrev32(x: int) -> int:
+    return int(f"{x:032b}"[::-1], 2)
+
+def compute_checksums(data, starts, ends, algos=ALGORITHMS) -> dict:
+    """-> {algo: uint64-Array je Bereich}"""
+    starts = np.asarray(starts, dtype=np.int64); ends = np.asarray(ends, dtype=np.int64)
+    out, byte_sum = {}, None
+    if starts.size == 0: return {a: np.zeros(0, dtype=np.uint64) for a in algos}
+    mv = memoryview(data)
+    rev = None
+    for a in algos:
+        if a in SUMS:
+            dt, bits = SUMS[a]
+            if dt == "<u1":
+                if byte_sum is None: byte_sum = _range_sums(data, starts, ends, dt)
+                s = byte_sum
+            else:
+                s = _range_sums(data, starts, ends, dt)
+            out[a] = s & np.uint64((1 << bits) - 1)
+        elif a == "crc32":
+            out[a] = np.array([zlib.crc32(mv[s:e]) for s, e in zip(starts.tolist(), ends.tolist())], dtype=np.uint64)
+        elif a in CRCS:
+            if rev is None: rev = memoryview(_BITREV8[np.frombuffer(data, dtype=np.uint8)])
+            xorout = 0xFFFFFFFF if a == "crc32_mpeg2" else 0
+            out[a] = np.array([_bitrev32(zlib.crc32(rev[s:e])) ^ xorout for s, e in zip(starts.tolist(), ends.tolist())],
+                              dtype=np.uint64)
+        else:
+            raise ValueError(f"unknown checksum algorithm: {a}")
+    return out
+
+def checksum_rows(data, block: int, algos=ALGORITHMS, ranges=()) -> dict:
+    """Spalten für block_checksums.csv: erst alle Blöcke, dann die eigenen Bereiche (block_start/block_end + je Algorithmus Hex)."""
+    bs, be = block_ranges(len(data), block)
+    if ranges:
+        rs, re_ = (np.array(x, dtype=np.int64) for x in zip(*ranges))
+        if (rs < 0).any() or (re_ > len(data)).any() or (rs > re_).any():
+            raise ValueError(f"checksum range outside dump (size 0x{len(data):X})")
+        bs, be = np.concatenate((bs, rs)), np.concatenate((be, re_))
+    sums = compute_checksums(data, bs, be, algos)
+    cols = {"block_start": bs, "block_end": be}
+    for a in algos:
+        w = BITS[a] // 4
+        cols[a] = [f"0x{v:0{w}X}" for v in sums[a].tolist()]
+    return cols
+
+def stream_checksum_rows(chunks, block: int, algos=ALGORITHMS) -> dict:
+    """wie checksum_rows ohne eigene Bereiche, über Stücke (Vielfache von block) statt über den ganzen Dump"""
+    cols, pos = {}, 0
+    for chunk in chunks:
+        part = checksum_rows(chunk, block, algos)
+        part["block_start"] = part["block_start"] + pos; part["block_end"] = part["block_end"] + pos
+        for k, v in part.items(): cols.setdefault(k, []).append(v)
+        pos += len(chunk)
+    if not cols: return checksum_rows(b"", block, algos)
+    return {k: np.concatenate(v) if k in ("block_start", "block_end") else [x for part in v for x in part] for k, v in cols.items()}
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("input", help="Dump oder Glob")
+    p.add_argument("--block-size", type=int, default=64*1024)
+    p.add_argument("--range", action="append", default=[], type=parse_range, help="Eigener Bereich START:END (mehrfach)")
+    p.add_argument("--algos", default=",".join(ALGORITHMS))
+    p.add_argument("--out", default=None, help="CSV (Default: stdout)")
+    args = p.parse_args()
+    algos = [a.strip() for a in args.algos.split(",") if a.strip()]
+    paths = [args.input] if Path(args.input).is_file() else sorted(glob.glob(args.input, recursive=True))
+    fh = open(args.out, "w", newline="", encoding="utf-8") if args.out else sys.stdout
+    w = csv.writer(fh); w.writerow(["file", "block_start", "block_end", *algos])
+    for path in paths:
+        if args.range:
+            cols = checksum_rows(load_bin(path), args.block_size, algos, args.range)
+        else:
+            cols = stream_checksum_rows(iter_dump(path, args.block_size * max(1, CHUNK // args.block_size)), args.block_size, algos)
+        w.writerows([path, *row] for row in zip(*cols.values()))
+    if args.out: fh.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
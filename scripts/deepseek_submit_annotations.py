@@ -1,7 +1,28 @@
 #!/usr/bin/env python3
-import os, json, time, textwrap, re, sys
+"""
+HEX-Chunks an DeepSeek senden und Annotationen je Datei zusammenführen (reports/china-boeller/<stem>.json)
+- alle Chunks aller Dateien parallel (--concurrency Threads, eine requests.Session mit Connection-Pool)
+- Token-Bucket (--rate Anfragen/s, --burst) vor jedem Request, auch bei Retries
+- Retries mit exponentiellem Backoff + Jitter, Retry-After bei 429 wird beachtet
+- Antwort-Cache auf Platte je Chunk (SHA-256 über Modell, Prompt, max_tokens, Chunk-Text) -> Wiederholungsläufe
+  und abgebrochene Läufe senden nur neue/geänderte Chunks; Einträge atomar geschrieben
+- Chunking binär statt nach Zeichen: HEX dekodiert (ihex.read_hex), an re_scan.segment_entropy-Segmente angelehnt;
+  Hoch-Entropie (Code/komprimiert, --keep-high) und gelöschter Flash (256-Byte-Blöcke nur 0xFF, --keep-erased)
+  werden nicht gesendet; Bereiche auf 16-Byte-Sätze ausgerichtet, zu Chunks <= CHUNK_CHARS gepackt und als
+  vollständige Intel-HEX-Sätze (mit Typ-04-Satz je Bereich) neu kodiert
+- jeder Chunk kennt seine Adressbereiche: Regionen aus der Antwort werden auf diese Bereiche geklippt,
+  Regionen außerhalb verworfen; Ergebnis-Regionen nach Startadresse sortiert
+- Test gegen lokalen Stand-in-Server (tools/deepseek_standin.py): DEEPSEEK_BASE_URL=http://127.0.0.1:<port>
+"""
+import argparse, hashlib, os, json, random, threading, time, textwrap, re, sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import requests
+from requests.adapters import HTTPAdapter
+import numpy as np
+from ihex import iter_records, read_hex
+from re_scan import segment_entropy
+from region_index import parse_regions
 
 BASE_URL = os.getenv("DEEPSEEK_BASE_URL", "https://api.deepseek.com")
 API_KEY  = os.getenv("DEEPSEEK_API_KEY", "")
@@ -9,9 +30,9 @@ MODEL    = os.getenv("DEEPSEEK_MODEL", "deepseek-reasoner")  # oder deepseek-cha
 IN_DIR   = Path("dist/deepseek/incoming")
 OUT_DIR  = Path("reports/china-boeller")
 CHUNK_CHARS = 180000  # < 128k Tokens bleibt safe; konservativ splitten
-
-if not API_KEY:
-    print("DEEPSEEK_API_KEY missing", file=sys.stderr); sys.exit(2)
+RECORD = 16; LINE_CHARS = 1 + 2 * (5 + RECORD) + 1  # Zeichen je Datensatz-Zeile
+ERASED_BLOCK = 256
+CACHE_DIR = Path(os.getenv("DEEPSEEK_CACHE_DIR", ".cache/deepseek"))
 
 SYSTEM = (
   "You are an ECU firmware data annotator. The user will send Intel HEX text chunks.\n"
@@ -26,71 +47,210 @@ SYSTEM = (
   '  ],\n'
   '  "hashes": {"hex_lines": <int>}\n'
   "}\n"
+  "Each chunk contains only the listed address ranges (absolute addresses from the records);\n"
+  "high-entropy code/compressed data and erased 0xFF flash are omitted. Report regions only within these ranges.\n"
 )
 
-def call_ds(messages, max_tokens=1000, retries=3):
+def make_bucket(rate: float, burst: int) -> dict:
+    return {"rate": rate, "burst": max(1, burst), "tokens": float(max(1, burst)), "t": time.monotonic(), "lock": threading.Lock()}
+
+def take_token(bucket: dict):
+    """Blockiert, bis ein Token frei ist (rate <= 0: unbegrenzt)."""
+    if bucket["rate"] <= 0: return
+    while True:
+        with bucket["lock"]:
+            now = time.monotonic()
+            bucket["tokens"] = min(bucket["burst"], bucket["tokens"] + (now - bucket["t"]) * bucket["rate"]); bucket["t"] = now
+            if bucket["tokens"] >= 1:
+                bucket["tokens"] -= 1; return
+            wait = (1 - bucket["tokens"]) / bucket["rate"]
+        time.sleep(wait)
+
+def make_session(pool: int) -> requests.Session:
+    sess = requests.Session()
+    sess.mount("http://", HTTPAdapter(pool_connections=pool, pool_maxsize=pool))
+    sess.mount("https://", HTTPAdapter(pool_connections=pool, pool_maxsize=pool))
+    sess.headers.update({"Authorization": f"Bearer {API_KEY}", "Content-Type": "application/json"})
+    return sess
+
+def backoff(i: int, retry_after=None) -> float:
+    try:
+        if retry_after is not None: return min(60.0, float(retry_after))
+    except ValueError:
+        pass
+    return min(60.0, 2 ** i) * (0.5 + random.random() / 2)
+
+def call_ds(sess, bucket, messages, max_tokens=1000, retries=5):
     url = f"{BASE_URL}/chat/completions"
-    headers = {"Authorization": f"Bearer {API_KEY}", "Content-Type":"application/json"}
     body = {"model": MODEL, "messages": messages,
             "response_format":{"type":"json_object"},
             "max_tokens": max_tokens}
     for i in range(retries):
-        r = requests.post(url, headers=headers, json=body, timeout=120)
+        take_token(bucket)
+        try:
+            r = sess.post(url, json=body, timeout=120)
+        except requests.RequestException:
+            time.sleep(backoff(i)); continue
         if r.status_code == 200:
             try:
                 content = r.json()["choices"][0]["message"]["content"]
                 return json.loads(content)
             except Exception:
-                time.sleep(2); continue
-        elif r.status_code in (429, 500, 503):
-            time.sleep(2*(i+1)); continue
+                time.sleep(backoff(i)); continue
+        elif r.status_code in (429, 500, 502, 503, 504):
+            time.sleep(backoff(i, r.headers.get("Retry-After"))); continue
         else:
             raise RuntimeError(f"DeepSeek error {r.status_code}: {r.text[:500]}")
     raise RuntimeError("DeepSeek no valid JSON after retries")
 
-def chunk_text(t, size):
-    for i in range(0, len(t), size):
-        yield t[i:i+size], i//size+1, (len(t)+size-1)//size
+def cache_key(messages, max_tokens: int) -> str:
+    return hashlib.sha256(json.dumps({"model": MODEL, "max_tokens": max_tokens, "messages": messages},
+                                     sort_keys=True).encode("utf-8")).hexdigest()
+
+def cached_call(sess, bucket, messages, max_tokens, cache_dir):
+    """-> (Antwort, aus Cache?); neue Antworten werden sofort (atomar) gespeichert."""
+    if cache_dir is None: return call_ds(sess, bucket, messages, max_tokens), False
+    p = cache_dir / f"{cache_key(messages, max_tokens)}.json"
+    try:
+        return json.loads(p.read_text(encoding="utf-8")), True
+    except (OSError, ValueError):
+        pass
+    js = call_ds(sess, bucket, messages, max_tokens)
+    tmp = p.with_name(f".{p.name}.{os.getpid()}.{threading.get_ident()}")
+    tmp.write_text(json.dumps(js), encoding="utf-8"); os.replace(tmp, p)
+    return js, False
+
+def kept_ranges(data, start: int, segments, keep_high=False, keep_erased=False, win=4096):
+    """-> ([(lo, hi)] absolut, end exklusiv, auf Satzgrenzen ausgerichtet; nur Bytes aus der HEX-Datei),
+    {"high_entropy": Bytes, "erased": Bytes} nicht gesendet"""
+    buf = np.frombuffer(data, dtype=np.uint8); n = buf.size
+    infile = np.zeros(n, dtype=bool)
+    for a, b in segments: infile[a - start:b - start] = True
+    high = np.zeros(n, dtype=bool)
+    if n:
+        _, segs = segment_entropy(data, win)
+        sel = segs["label"] == "high"
+        for lo, hi in zip(segs["start"][sel].tolist(), segs["end"][sel].tolist()):
+            high[lo:hi] = True
+    pad = -n % ERASED_BLOCK
+    erased = np.repeat((np.r_[buf, np.full(pad, 0xFF, np.uint8)].reshape(-1, ERASED_BLOCK) == 0xFF).all(axis=1), ERASED_BLOCK)[:n]
+    skipped = {"high_entropy": int(np.count_nonzero(infile & high)),
+               "erased": int(np.count_nonzero(infile & erased & ~high))}
+    keep = infile.copy()
+    if not keep_high: keep &= ~high
+    if not keep_erased: keep &= ~erased
+    # auf 16-Byte-Sätze (absolute Adressen) erweitern, Lücken der Datei bleiben draußen
+    lead = start % RECORD
+    rec = np.r_[np.zeros(lead, bool), keep, np.zeros(-(lead + n) % RECORD, bool)].reshape(-1, RECORD).any(axis=1)
+    keep = np.repeat(rec, RECORD)[lead:lead + n] & infile
+    d = np.diff(np.r_[0, keep.astype(np.int8), 0])
+    return [(start + lo, start + hi) for lo, hi in zip(np.flatnonzero(d == 1).tolist(), np.flatnonzero(d == -1).tolist())], skipped
+
+def pack_chunks(ranges, budget: int):
+    """Bereiche der Reihe nach zu Chunks mit <= budget Datenbytes packen; lange Bereiche an Satzgrenzen teilen."""
+    budget = max(RECORD, budget // RECORD * RECORD)
+    chunks, cur, used = [], [], 0
+    for lo, hi in ranges:
+        while lo < hi:
+            cut = min(hi, lo + budget - used)
+            if cut < hi: cut = cut // RECORD * RECORD
+            if cut <= lo:
+                chunks.append(cur); cur, used = [], 0; continue
+            cur.append((lo, cut)); used += cut - lo; lo = cut
+    if cur: chunks.append(cur)
+    return chunks
+
+def file_jobs(hp: Path, keep_high=False, keep_erased=False, win=4096):
+    """-> (HEX-Sätze (beim Parsen gezählt), Jobs [(messages, Bereiche)], übersprungene Bytes)"""
+    st = {}; start, data, segments = read_hex(hp, stats=st)
+    ranges, skipped = kept_ranges(data, start, segments, keep_high, keep_erased, win)
+    mv = memoryview(data)
+    chunks = pack_chunks(ranges, int(CHUNK_CHARS * 0.95) // LINE_CHARS * RECORD)
+    jobs = []
+    for idx, rs in enumerate(chunks, 1):
+        body = b"".join(b"".join(iter_records(mv[lo - start:hi - start], lo)) for lo, hi in rs).decode("ascii")
+        user = (
+          f"FILE: {hp.name}\n"
+          f"CHUNK {idx}/{len(chunks)}\n"
+          "RANGES: " + ", ".join(f"0x{lo:X}-0x{hi - 1:X}" for lo, hi in rs) + "\n"
+          "CONTENT (Intel HEX lines):\n" + body
+        )
+        jobs.append(([
+            {"role":"system", "content": SYSTEM},
+            {"role":"user", "content": user}
+        ], rs))
+    return st["records"], jobs, skipped
+
+def clip_regions(regions, rs):
+    """Regionen einer Chunk-Antwort auf die gesendeten Bereiche klippen -> (Regionen, verworfen)"""
+    out, dropped = [], 0
+    items = [r for r in regions or [] if isinstance(r, dict)]
+    for r in items:
+        p = (parse_regions([r])[0] or [None])[0]  # unlesbare Adressen -> None
+        hit = [(max(p[0], lo), min(p[1], hi)) for lo, hi in rs if p[0] < hi and lo < p[1]] if p else []
+        if not hit:
+            dropped += 1; continue
+        out.append({**r, "start_addr": f"0x{min(h[0] for h in hit):X}", "end_addr": f"0x{max(h[1] for h in hit) - 1:X}"})
+    return out, dropped
+
+def merge_chunks(hp: Path, hex_lines: int, answers, skipped=None):
+    """answers: [(Antwort, Bereiche)] in Chunk-Reihenfolge"""
+    merged = {"file": str(hp), "summary": "", "regions": [], "hashes":{"hex_lines": hex_lines},
+              "ranges_sent": [], "skipped_bytes": skipped or {}, "dropped_regions": 0}
+    for js, rs in answers:  # merge conservatively
+        merged["ranges_sent"] += [[f"0x{lo:X}", f"0x{hi - 1:X}"] for lo, hi in rs]
+        if "summary" in js and js["summary"]:
+            merged["summary"] = js["summary"][:5000]
+        if "regions" in js:
+            regs, dropped = clip_regions(js["regions"], rs)
+            merged["regions"] += regs; merged["dropped_regions"] += dropped
+    merged["regions"].sort(key=lambda r: int(r["start_addr"], 16))
+    return merged
 
 def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--concurrency", type=int, default=int(os.getenv("DEEPSEEK_CONCURRENCY", "4")))
+    ap.add_argument("--rate", type=float, default=float(os.getenv("DEEPSEEK_RATE", "1.0")), help="Anfragen pro Sekunde (0 = unbegrenzt)")
+    ap.add_argument("--burst", type=int, default=int(os.getenv("DEEPSEEK_BURST", "4")))
+    ap.add_argument("--cache-dir", default=str(CACHE_DIR))
+    ap.add_argument("--no-cache", action="store_true")
+    ap.add_argument("--keep-high", action="store_true", help="Hoch-Entropie-Bereiche (Code/komprimiert) mitsenden")
+    ap.add_argument("--keep-erased", action="store_true", help="gelöschten Flash (0xFF) mitsenden")
+    ap.add_argument("--entropy-window", type=int, default=4096)
+    args = ap.parse_args()
+    if not API_KEY:
+        print("DEEPSEEK_API_KEY missing", file=sys.stderr); return 2
+
     OUT_DIR.mkdir(parents=True, exist_ok=True)
     hex_files = sorted(IN_DIR.rglob("*.hex"))
     if not hex_files:
         print("No HEX inputs in dist/deepseek/incoming", file=sys.stderr)
         return 0
+    cache_dir = None if args.no_cache else Path(args.cache_dir)
+    if cache_dir: cache_dir.mkdir(parents=True, exist_ok=True)
 
+    files = []; failed = 0
     for hp in hex_files:
-        txt = hp.read_text(encoding="utf-8", errors="ignore")
-        # Basic sanity: keep only Intel HEX lines
-        lines = [ln for ln in txt.splitlines() if ln.strip().startswith(":")]
-        payload = "\n".join(lines)
-        merged = {"file": str(hp), "summary": "", "regions": [], "hashes":{"hex_lines": len(lines)}}
-
-        # First chunk asks for global summary; subsequent chunks may add regions
-        for chunk, idx, total in chunk_text(payload, CHUNK_CHARS):
-            user = (
-              f"FILE: {hp.name}\n"
-              f"CHUNK {idx}/{total}\n"
-              "CONTENT (Intel HEX lines):\n" + chunk
-            )
-            messages = [
-                {"role":"system", "content": SYSTEM},
-                {"role":"user", "content": user}
-            ]
-            js = call_ds(messages, max_tokens=1500)
-            # merge conservatively
-            if "summary" in js and js["summary"]:
-                merged["summary"] = js["summary"][:5000]
-            if "regions" in js:
-                for r in js["regions"]:
-                    if isinstance(r, dict) and "start_addr" in r and "end_addr" in r:
-                        merged["regions"].append(r)
-
-        outp = OUT_DIR / (hp.stem + ".json")
-        outp.write_text(json.dumps(merged, indent=2), encoding="utf-8")
-        print(f"annotated: {hp} -> {outp}")
-
-    return 0
+        try:
+            files.append((hp, *file_jobs(hp, args.keep_high, args.keep_erased, args.entropy_window)))
+        except (OSError, ValueError) as e:
+            failed += 1; print(f"failed: {hp}: {e}", file=sys.stderr)
+    sess = make_session(args.concurrency); bucket = make_bucket(args.rate, args.burst)
+    stats = {"sent": 0, "cached": 0}
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as ex:
+        futs = [[ex.submit(cached_call, sess, bucket, m, 1500, cache_dir) for m, _ in jobs] for _, _, jobs, _ in files]
+        for (hp, hex_lines, jobs, skipped), fl in zip(files, futs):
+            try:
+                res = [f.result() for f in fl]
+            except Exception as e:
+                failed += 1; print(f"failed: {hp}: {e}", file=sys.stderr); continue
+            for _, hit in res: stats["cached" if hit else "sent"] += 1
+            merged = merge_chunks(hp, hex_lines, [(js, rs) for (js, _), (_, rs) in zip(res, jobs)], skipped)
+            outp = OUT_DIR / (hp.stem + ".json")
+            outp.write_text(json.dumps(merged, indent=2), encoding="utf-8")
+            print(f"annotated: {hp} -> {outp}")
+    print(f"chunks sent: {stats['sent']}, from cache: {stats['cached']}, failed files: {failed}")
+    return 1 if failed else 0
 
 if __name__ == "__main__":
     sys.exit(main())
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Sliding-Window-Entropie (gemeinsam für analyze_med17.py und re_scan.py)
+- Histogramme aller Fenster in einem gebatchten NumPy-Durchlauf (kein Python-Loop pro Fenster)
+- Überlappende Fenster (z.B. 4 KiB alle 256 B): Block-Histogramme der Größe gcd(window, stride),
+  Fenster-Histogramme per Präfixsumme (add/subtract der ein-/austretenden Blöcke)
+- Batches nach Histogramm-Zeilen begrenzt; besteht ein Fenster aus mehr als MAX_BLOCKS_PER_WINDOW Blöcken (z.B.
+  teilerfremde Schrittweite 4096/4095 -> gcd 1), Fenster einzeln per bincount über eine Strided-View
+- Fenster wie bisher bei range(0, size, stride), letztes Fenster ggf. kürzer
+
+Usage:
+  from entropy_engine import window_entropy
+  offsets, lengths, H = window_entropy(data, 4096, 256)
+"""
+from math import gcd
+import numpy as np
+
+BATCH_BYTES = 1 << 20     # Bytes pro bincount-Batch (begrenzt den Index-Puffer)
+BATCH_WINDOWS = 4096      # Fenster pro Präfixsummen-Batch
+BATCH_ROWS = 1 << 15      # Block-Histogramm-Zeilen pro Batch (x 256 x int64 = 64 MiB)
+MAX_BLOCKS_PER_WINDOW = 64  # darüber Fenster einzeln zählen (Strided-View + bincount)
+
+def as_u8(data) -> np.ndarray:
+    if isinstance(data, np.ndarray): return data.reshape(-1).view(np.uint8)
+    return np.frombuffer(data, dtype=np.uint8)
+
+def shannon_entropy(b) -> float:
+    arr = as_u8(b)
+    if arr.size == 0: return 0.0
+    return float(entropy_from_counts(np.bincount(arr, minlength=256)[None, :], np.array([arr.size]))[0])
+
+def entropy_from_counts(counts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """counts: (n, 256) Histogramme, lengths: (n,) Bytes je Fenster -> Bits/Byte.
+    Summiert wie die frühere Einzelfenster-Version nur die belegten Bytewerte (gleiche Anzahl -> gleiche paarweise
+    Summationsreihenfolge in NumPy) -> bitgleiche Werte statt Abweichungen im letzten ulp."""
+    p = counts / lengths.astype(np.float64)[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = p * np.log2(p)
+    nz = counts > 0; m = nz.sum(axis=1); out = np.zeros(counts.shape[0])
+    for k in np.unique(m).tolist():  # Fenster gleicher Anzahl belegter Werte gemeinsam
+        r = np.flatnonzero(m == k)
+        out[r] = t[r][nz[r]].reshape(r.size, k).sum(axis=1)
+    return -out
+
+def block_histograms(u8: np.ndarray, block: int) -> np.ndarray:
+    """(ceil(n/block), 256) Histogramme aufeinanderfolgender Blöcke; letzter Block ggf. kürzer."""
+    n = u8.size; nb = -(-n // block)
+    out = np.empty((nb, 256), dtype=np.int64)
+    step = max(1, BATCH_BYTES // block)
+    for b0 in range(0, nb, step):
+        b1 = min(nb, b0 + step)
+        seg = u8[b0 * block:b1 * block]
+        ids = np.repeat(np.arange(b1 - b0, dtype=np.intp) * 256, block)[:seg.size]
+        ids += seg
+        out[b0:b1] = np.bincount(ids, minlength=(b1 - b0) * 256).reshape(-1, 256)
+    return out
+
+def _strided_histograms(u8: np.ndarray, offsets: np.ndarray, window: int):
+    """Fenster einzeln per bincount über eine Strided-View (für Fenster, die aus vielen gcd-Blöcken bestehen);
+    Batches zu ~BATCH_BYTES, letzte (kürzere) Fenster einzeln."""
+    n = u8.size; full = offsets[offsets + window <= n]
+    step = max(1, BATCH_BYTES // window)
+    if full.size:
+        view = np.lib.stride_tricks.sliding_window_view(u8, window)
+        for w0 in range(0, full.size, step):
+            offs = full[w0:w0 + step]
+            ids = view[offs].astype(np.intp); ids += (np.arange(offs.size, dtype=np.intp) * 256)[:, None]
+            yield offs, np.full(offs.size, window, dtype=np.int64), np.bincount(ids.ravel(), minlength=offs.size * 256).reshape(-1, 256)
+    for o in offsets[full.size:].tolist():
+        yield np.array([o], np.int64), np.array([n - o], np.int64), np.bincount(u8[o:], minlength=256)[None, :].astype(np.int64)
+
+def window_histograms(data, window=4096, stride=None):
+    """Generator über (offsets, lengths, counts)-Batches aller Fenster."""
+    u8 = as_u8(data); n = u8.size
+    stride = stride or window
+    if window <= 0 or stride <= 0: raise ValueError("window/stride must be > 0")
+    offsets = np.arange(0, n, stride, dtype=np.int64)
+    if offsets.size == 0: return
+    g = gcd(window, stride); k = window // g; ks = stride // g
+    if k > MAX_BLOCKS_PER_WINDOW:  # z.B. teilerfremde Schrittweite (g = 1): Block-Histogramme wären ~n x 256 int64
+        yield from _strided_histograms(u8, offsets, window); return
+    nb = -(-n // g)
+    per = max(1, min(BATCH_WINDOWS, (BATCH_ROWS - k) // ks + 1))  # Fenster je Batch, begrenzt durch hist-Zeilen
+    for w0 in range(0, offsets.size, per):
+        w1 = min(offsets.size, w0 + per)
+        b0 = w0 * ks; b1 = min(nb, (w1 - 1) * ks + k)
+        hist = block_histograms(u8[b0 * g:b1 * g], g)
+        csum = np.zeros((hist.shape[0] + 1, 256), dtype=np.int64)
+        np.cumsum(hist, axis=0, out=csum[1:])
+        lo = np.arange(w0, w1, dtype=np.int64) * ks - b0
+        hi = np.minimum(lo + k, hist.shape[0])
+        offs = offsets[w0:w1]
+        yield offs, np.minimum(window, n - offs), csum[hi] - csum[lo]
+
+def window_entropy(data, window=4096, stride=None):
+    """-> (offsets, lengths, entropy_bits_per_byte) als NumPy-Arrays."""
+    parts = [(o, l, entropy_from_counts(c, l)) for o, l, c in window_histograms(data, window, stride)]
+    if not parts:
+        return np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.float64)
+    return tuple(np.concatenate(x) for x in zip(*parts))
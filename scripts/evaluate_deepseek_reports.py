@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
-import os, sys, json, binascii
+import os, sys, json
 from pathlib import Path
+from ihex import load_hex
+from region_index import build_index, coverage, overlap_count, parse_regions
 
 ANN_DIR = Path("reports/china-boeller")
 HEX_DIR = Path("dist/deepseek/incoming")
@@ -8,22 +10,6 @@ MIN_SCORE = int(os.getenv("MIN_SCORE", "60"))
 FAIL_ON_LOW = os.getenv("FAIL_ON_LOW_SCORE", "0") == "1"
 SUMMARY_PATH = os.getenv("GITHUB_STEP_SUMMARY")
 
-def parse_hex_bytes(text: str) -> bytes:
-    data = bytearray()
-    for ln in text.splitlines():
-        ln = ln.strip()
-        if not ln.startswith(":"):
-            continue
-        try:
-            reclen = int(ln[1:3], 16)
-            rectyp = int(ln[7:9], 16)
-            if rectyp == 0x00:
-                bytestr = ln[9:9+2*reclen*2]
-                data.extend(binascii.unhexlify(bytestr))
-        except Exception:
-            continue
-    return bytes(data)
-
 def eval_one(report_path: Path):
     try:
         rep = json.loads(report_path.read_text(encoding="utf-8"))
@@ -35,41 +21,24 @@ def eval_one(report_path: Path):
     if not hex_path.exists():
         return {"file": report_path.name, "ok": False, "error": f"missing HEX: {hex_path}", "score": 0}
 
-    data = parse_hex_bytes(hex_path.read_text(encoding="utf-8", errors="ignore"))
+    try:
+        base, data, _ = load_hex(hex_path)  # einmal je HEX-Datei geparst, auch bei mehreren Reports
+    except ValueError as e:
+        return {"file": report_path.name, "ok": False, "error": f"invalid HEX: {e}", "score": 0}
     nbytes = len(data)
 
     summary = rep.get("summary","") or ""
     regions = rep.get("regions",[]) or []
 
     # validations
-    invalid_addr = 0
-    norm_regions = []
-    for r in regions:
-        try:
-            s = int(r["start_addr"], 16)
-            e = int(r["end_addr"], 16)
-            if s > e or s < 0 or (nbytes and e >= nbytes):
-                invalid_addr += 1
-            norm_regions.append((s, e, str(r.get("label","region"))))
-        except Exception:
-            invalid_addr += 1
-
-    # overlaps & coverage
-    overlaps = 0
-    covered = 0
-    if norm_regions:
-        norm_regions.sort(key=lambda x: (x[0], x[1]))
-        merged = []
-        cs, ce = norm_regions[0][0], norm_regions[0][1]
-        for s,e,_ in norm_regions[1:]:
-            if s <= ce:
-                overlaps += 1
-                ce = max(ce, e)
-            else:
-                merged.append((cs,ce))
-                cs, ce = s, e
-        merged.append((cs,ce))
-        covered = sum((e - s + 1) for s,e in merged if e >= s)
+    norm_regions, invalid_addr = parse_regions(regions)
+    # Adressen wie in den HEX-Sätzen (absolut): gültig in [base, base + nbytes)
+    invalid_addr += sum(1 for s, e, _ in norm_regions if s >= e or s < base or (nbytes and e > base + nbytes))
+
+    # overlaps & coverage (sortierter Intervall-Index, siehe region_index.py)
+    idx = build_index(norm_regions)
+    overlaps = overlap_count(idx)
+    covered = coverage(idx)
 
     coverage_pct = (covered / nbytes * 100.0) if nbytes else 0.0
 
@@ -101,6 +70,7 @@ def eval_one(report_path: Path):
         "ok": ok,
         "score": score,
         "bytes": nbytes,
+        "base_addr": f"0x{base:X}",
         "regions": len(regions),
         "overlaps": overlaps,
         "invalid_addr": invalid_addr,
@@ -1,7 +1,16 @@
 #!/usr/bin/env python3
-import os, re, csv, hashlib, sys, json
+"""
+BIN -> Intel-HEX Export (rawdata/**/validated/*.bin -> dist/deepseek/incoming/...)
+- parallel (ProcessPool, --jobs), jede BIN einmal gelesen (mmap) und einmal gehasht
+- idempotent: Sidecar mit gleichem sha256_bin/base_addr + vorhandene HEX -> übersprungen (--force: neu schreiben)
+- HEX/Sidecar atomar (tmp + os.replace); manifest-hex.csv wird je Lauf aus allen Sidecars neu geschrieben
+  (eine Zeile je hex_rel, sortiert, atomar) statt angehängt
+"""
+import argparse, os, re, csv, hashlib, sys, json
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from intelhex import IntelHex
+from bin_loader import load_bin
+from ihex import write_hex
 
 ROOT = Path(".").resolve()
 OUTDIR = ROOT / "dist" / "deepseek" / "incoming"
@@ -13,11 +22,19 @@ def slug(s:str)->str:
     s=re.sub(r"-{2,}","-",s).strip("-")
     return s or "na"
 
-def sha256(p:Path)->str:
-    h=hashlib.sha256()
-    with p.open("rb") as f:
-        for chunk in iter(lambda:f.read(1<<20), b""): h.update(chunk)
-    return h.hexdigest()
+def write_atomic(path:Path, write):
+    tmp=path.with_name(f".{path.name}.tmp-{os.getpid()}")
+    try:
+        write(tmp); os.replace(tmp, path)
+    finally:
+        if tmp.exists(): tmp.unlink()
+
+def up_to_date(sidecar:Path, hex_path:Path, digest:str, base:int)->bool:
+    try:
+        j=json.loads(sidecar.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return False
+    return j.get("sha256_bin")==digest and int(j.get("base_addr",0))==base and hex_path.exists()
 
 def tiny_meta(meta:Path):
     d={k:"" for k in ["brand","model","generation","ecu_vendor","ecu_model","firmware","region"]}
@@ -30,7 +47,8 @@ def tiny_meta(meta:Path):
             pass
     return d
 
-def export_bin(b:Path, base:int=0):
+def export_bin(b:Path, base:int=0, force:bool=False):
+    """-> (hex_path, neu geschrieben?) oder None (nicht unter rawdata/)"""
     parts=b.resolve().parts
     try: i=parts.index("rawdata")
     except ValueError: return None
@@ -48,7 +66,8 @@ def export_bin(b:Path, base:int=0):
     fw_s=slug(mi["firmware"] or (fwreg.split("-")[0] if "-" in fwreg else fwreg))
     reg_s=slug(mi["region"]   or (fwreg.split("-")[1] if "-" in fwreg else ""))
 
-    short=sha256(b)[:8]
+    data=load_bin(b)
+    digest=hashlib.sha256(data).hexdigest(); short=digest[:8]
     base_name="-".join([x for x in [brand_s,model_s,gen_s,ecu_s,fw_s,reg_s] if x]) or "dataset"
 
     outdir=OUTDIR/brand_s/model_s/gen_s/ecu_s/(fw_s + (f"-{reg_s}" if reg_s else ""))
@@ -56,36 +75,59 @@ def export_bin(b:Path, base:int=0):
     hex_path=outdir/f"{base_name}-{short}.hex"
     sidecar =outdir/f"{base_name}-{short}.json"
 
-    data=b.read_bytes()
-    ih=IntelHex(); ih.frombytes(data, offset=base); ih.tofile(hex_path, format="hex")
+    if not force and up_to_date(sidecar, hex_path, digest, base):
+        return hex_path, False
 
-    sidecar.write_text(json.dumps({
+    write_atomic(hex_path, lambda p: write_hex(p, data, base))
+    side=json.dumps({
         "bin_rel": str(b.relative_to(ROOT)),
         "meta_rel": str(Path(meta).relative_to(ROOT)) if Path(meta).exists() else "",
         "hex_rel": str(hex_path.relative_to(ROOT)),
         "base_addr": base,
-        "sha256_bin": sha256(b),
-    }, indent=2), encoding="utf-8")
-    return hex_path
+        "sha256_bin": digest,
+    }, indent=2)
+    write_atomic(sidecar, lambda p: p.write_text(side, encoding="utf-8"))
+    return hex_path, True
+
+def write_manifest():
+    """Alle Sidecars -> eine Zeile je hex_rel (sortiert), atomar ersetzt."""
+    rows={}
+    for sc in OUTDIR.rglob("*.json"):
+        try:
+            j=json.loads(sc.read_text(encoding="utf-8"))
+            rows[j["hex_rel"]]=[j["hex_rel"], j["bin_rel"], j.get("meta_rel",""), j.get("base_addr",0), j["sha256_bin"]]
+        except (OSError, ValueError, KeyError):
+            print(f"skipping unreadable sidecar {sc}", file=sys.stderr)
+    def write(p:Path):
+        with p.open("w", newline="", encoding="utf-8") as f:
+            w=csv.writer(f)
+            w.writerow(["hex_rel","bin_rel","meta_rel","base_addr","sha256_bin"])
+            w.writerows(rows[k] for k in sorted(rows))
+    write_atomic(MANIFEST, write)
+    return len(rows)
 
 def main():
-    created=[]
-    for p in ROOT.glob("rawdata/**/validated/*.bin"):
-        hp=export_bin(p)
-        if hp: created.append(hp)
-    if not created:
+    ap=argparse.ArgumentParser()
+    ap.add_argument("--jobs", type=int, default=0, help="Worker-Prozesse (Default: CPU-Anzahl)")
+    ap.add_argument("--force", action="store_true", help="auch unveränderte BINs neu exportieren")
+    args=ap.parse_args()
+
+    bins=sorted(ROOT.glob("rawdata/**/validated/*.bin"))
+    if not bins:
         print("No .bin under rawdata/**/validated/", file=sys.stderr)
         return 0
+    jobs=min(args.jobs or os.cpu_count() or 1, len(bins))
+    if jobs==1:
+        results=[export_bin(p, force=args.force) for p in bins]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as ex:
+            results=list(ex.map(export_bin, bins, [0]*len(bins), [args.force]*len(bins)))
+    done=[r for r in results if r]
+    written=sum(1 for _, new in done if new)
 
     OUTDIR.mkdir(parents=True, exist_ok=True)
-    new=not MANIFEST.exists()
-    with MANIFEST.open("a", newline="", encoding="utf-8") as f:
-        w=csv.writer(f)
-        if new: w.writerow(["hex_rel","bin_rel","meta_rel","base_addr","sha256_bin"])
-        for sc in sorted(OUTDIR.rglob("*.json")):
-            j=json.loads(sc.read_text(encoding="utf-8"))
-            w.writerow([j["hex_rel"], j["bin_rel"], j.get("meta_rel",""), j.get("base_addr",0), j["sha256_bin"]])
-    print(f"Exported {len(created)} HEX files → {OUTDIR}")
+    n=write_manifest()
+    print(f"Exported {written} HEX files, {len(done)-written} unchanged → {OUTDIR} (manifest: {n} entries)")
     return 0
 
 if __name__=="__main__": sys.exit(main())
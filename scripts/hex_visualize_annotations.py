@@ -1,84 +1,138 @@
 #!/usr/bin/env python3
-import json, html, binascii
+"""
+HEX-Viewer für DeepSeek-Annotationen (reports/china-boeller/*.json -> *.html)
+- Dump als base64-Blob + Regionsliste [start, end_excl, label] im HTML, keine Tabelle pro Zeile
+- virtualisiert: JS rendert nur die sichtbaren Zeilen (16 Byte) beim Scrollen; sehr große Dumps -> Scrollhöhe
+  gedeckelt und skaliert (Browser-Limit für Elementhöhen)
+- Regionen über sortierten Intervall-Index (region_index.py: geklippt, nach start sortiert; im Browser Binärsuche
+  + Präfix-Maximum der Enden) statt Byte-Dict
+- Sprung zu Offset / Region über Eingabefeld bzw. Regionsliste
+- Dump über ihex.load_hex (adressbewusst, Lücken = 0xFF, Memo je Pfad/mtime); angezeigte Adressen absolut ab
+  Startadresse des HEX, Regionen im Blob relativ dazu
+"""
+import json, html, base64, re, sys
 from pathlib import Path
+from ihex import load_hex
+from region_index import build_index, parse_regions, to_list
 
 IN_DIR = Path("dist/deepseek/incoming")
 ANN_DIR = Path("reports/china-boeller")
 OUT_DIR = ANN_DIR
 
-def parse_hex_lines(text):
-    data = bytearray()
-    for ln in text.splitlines():
-        if not ln.startswith(":"): continue
-        try:
-            reclen = int(ln[1:3], 16)
-            addr   = int(ln[3:7], 16)
-            rectyp = int(ln[7:9], 16)
-            if rectyp == 0x00:  # data
-                bytestr = ln[9:9+2*reclen]
-                data.extend(binascii.unhexlify(bytestr))
-        except Exception:
-            continue
-    return bytes(data)
+VIEWER_HTML = """<!doctype html>
+<html><head><meta charset="utf-8">
+<title>__TITLE__ – DeepSeek annotations</title>
+<style>
+body{font-family:ui-monospace,Consolas,monospace}
+#view{height:75vh;overflow-y:auto;position:relative;border:1px solid #ddd}
+#rows{position:absolute;left:0;right:0;top:0}
+.row{height:18px;line-height:18px;white-space:pre}
+.off{color:#888}
+.mark{background:#ffe08a;border-radius:3px}
+summary{font-weight:600}
+#regions td{padding:1px 8px}
+#regions a{cursor:pointer;color:#06c}
+</style></head>
+<body>
+<h1>__TITLE__</h1>
+<details open><summary>Summary</summary><pre>__SUMMARY__</pre></details>
+<details><summary>Regions (__NREG__)</summary><table id="regions"></table></details>
+<h2>Hexdump (regions highlighted)</h2>
+<p>Offset: <input id="goto" size="12" placeholder="0x..."> <span id="info"></span></p>
+<div id="view"><div id="spacer"></div><div id="rows"></div></div>
+<script id="blob" type="application/octet-stream">__BLOB__</script>
+<script id="regdata" type="application/json">__REGIONS__</script>
+<script>
+(function(){
+const ROW = 18, MAXH = 8000000;  // Pixel je Zeile, Obergrenze der Scrollhöhe
+const BASE = __BASE__;  // Startadresse des Dumps (Anzeige/Sprung absolut, intern relativ)
+const raw = atob(document.getElementById("blob").textContent.trim());
+const data = new Uint8Array(raw.length);
+for (let i = 0; i < raw.length; i++) data[i] = raw.charCodeAt(i);
+const regs = JSON.parse(document.getElementById("regdata").textContent);  // [start, end_excl, label], nach start sortiert
+const maxEnd = []; let m = -1;
+for (const r of regs) { m = Math.max(m, r[1]); maxEnd.push(m); }
+function esc(s){ return s.replace(/[&<>"]/g, c => ({"&":"&amp;","<":"&lt;",">":"&gt;",'"':"&quot;"}[c])); }
+function hex2(b){ return (b < 16 ? "0" : "") + b.toString(16).toUpperCase(); }
+// Regionen, die [lo, hi) schneiden: letzte mit start < hi per Binärsuche, rückwärts solange Präfix-Max(end) > lo
+function overlapping(lo, hi){
+  let a = 0, b = regs.length;
+  while (a < b) { const c = (a + b) >> 1; if (regs[c][0] < hi) a = c + 1; else b = c; }
+  const out = [];
+  for (let k = a - 1; k >= 0 && maxEnd[k] > lo; k--) if (regs[k][1] > lo) out.push(regs[k]);
+  return out.reverse();
+}
+const view = document.getElementById("view"), rowsEl = document.getElementById("rows");
+const nrows = Math.ceil(data.length / 16), total = nrows * ROW, H = Math.min(total, MAXH);
+document.getElementById("spacer").style.height = H + "px";
+function firstRow(){
+  const vis = Math.ceil(view.clientHeight / ROW), maxScroll = Math.max(1, H - view.clientHeight);
+  return total <= MAXH ? Math.floor(view.scrollTop / ROW)
+                       : Math.round(view.scrollTop / maxScroll * Math.max(0, nrows - vis));
+}
+function render(){
+  const vis = Math.ceil(view.clientHeight / ROW) + 1, first = firstRow(), last = Math.min(nrows, first + vis);
+  const top = total <= MAXH ? first * ROW : view.scrollTop;
+  const lines = [];
+  for (let r = first; r < last; r++) {
+    const o = r * 16, end = Math.min(o + 16, data.length), hits = overlapping(o, end);
+    let hx = "", asc = "";
+    for (let i = o; i < end; i++) {
+      const b = data[i], labs = hits.filter(h => h[0] <= i && i < h[1]).map(h => h[2]);
+      hx += (i > o ? " " : "") + (labs.length ? '<span class="mark" title="' + esc(labs.join(", ")) + '">' + hex2(b) + "</span>" : hex2(b));
+      asc += b >= 32 && b < 127 ? String.fromCharCode(b) : ".";
+    }
+    lines.push('<div class="row"><span class="off">0x' + (BASE + o).toString(16).toUpperCase().padStart(8, "0") + "</span>  " + hx
+               + "   ".repeat(16 - (end - o)) + "  " + esc(asc) + "</div>");
+  }
+  rowsEl.style.transform = "translateY(" + top + "px)";
+  rowsEl.innerHTML = lines.join("");
+  document.getElementById("info").textContent = "rows " + first + "-" + (last - 1) + " of " + nrows + ", " + data.length + " bytes";
+}
+function jump(off){
+  const r = Math.floor(Math.max(0, Math.min(off, data.length - 1)) / 16);
+  view.scrollTop = total <= MAXH ? r * ROW : r / Math.max(1, nrows - 1) * (H - view.clientHeight);
+  render();
+}
+document.getElementById("goto").addEventListener("keydown", e => {
+  if (e.key === "Enter") { const v = parseInt(e.target.value, e.target.value.startsWith("0x") ? 16 : 10); if (!isNaN(v)) jump(v - BASE); }
+});
+document.getElementById("regions").innerHTML = regs.map((r, k) =>
+  '<tr><td><a data-k="' + k + '">0x' + (BASE + r[0]).toString(16).toUpperCase() + "</a></td><td>" + (r[1] - r[0]) + " B</td><td>" + esc(r[2]) + "</td></tr>").join("");
+document.getElementById("regions").addEventListener("click", e => { const k = e.target.dataset.k; if (k !== undefined) jump(regs[+k][0]); });
+view.addEventListener("scroll", () => requestAnimationFrame(render));
+window.addEventListener("resize", render);
+render();
+})();
+</script>
+</body></html>
+"""
 
-def highlight(data: bytes, regions):
-    # regions: [{"start_addr":"0x..","end_addr":"0x..","label": "..."}]
-    marks = {}
-    for r in regions:
-        try:
-            s = int(r["start_addr"], 16); e = int(r["end_addr"],16)
-            for i in range(max(0,s), min(len(data), e+1)):
-                marks[i] = r.get("label","region")
-        except Exception:
-            pass
-    rows=[]
-    for i in range(0, len(data), 16):
-        chunk=data[i:i+16]
-        hexpart=" ".join(f"{b:02X}" for b in chunk)
-        asc="".join(chr(b) if 32<=b<127 else "." for b in chunk)
-        # wrap spans
-        def span(j,b):
-            lab = marks.get(i+j)
-            if lab:
-                return f'<span class="mark" title="{html.escape(lab)}">{b:02X}</span>'
-            return f"{b:02X}"
-        hexspan=" ".join(span(j,b) for j,b in enumerate(chunk))
-        rows.append(f"<tr><td>0x{i:08X}</td><td class='hex'>{hexspan}</td><td>{html.escape(asc)}</td></tr>")
-    return "\n".join(rows)
+def _json_script(obj) -> str:
+    return json.dumps(obj, ensure_ascii=False).replace("</", "<\\/")
+
+def render_viewer(title: str, summary: str, data: bytes, regions, base: int = 0) -> str:
+    """regions mit absoluten Adressen; base = Adresse von data[0]"""
+    regs = to_list(build_index([(s - base, e - base, l) for s, e, l in parse_regions(regions)[0]], len(data)))
+    vals = {"TITLE": html.escape(title), "SUMMARY": html.escape(summary), "NREG": str(len(regs)), "BASE": str(base),
+            "REGIONS": _json_script(regs), "BLOB": base64.b64encode(data).decode("ascii")}
+    return re.sub(r"__(TITLE|SUMMARY|NREG|BASE|REGIONS|BLOB)__", lambda m: vals[m.group(1)], VIEWER_HTML)
 
 def main():
     OUT_DIR.mkdir(parents=True, exist_ok=True)
     for ann in sorted(ANN_DIR.glob("*.json")):
+        if ann.name.endswith(".eval.json"): continue  # Ergebnisse von evaluate_deepseek_reports.py
         meta = json.loads(ann.read_text(encoding="utf-8"))
         # read original HEX text
         hex_path = IN_DIR / Path(meta["file"]).name
         if not hex_path.exists():
             continue
-        text = hex_path.read_text(encoding="utf-8", errors="ignore")
-        data = parse_hex_lines(text)
-        table = highlight(data, meta.get("regions",[]))
-        html_out = f"""<!doctype html>
-<html><head><meta charset="utf-8">
-<title>{html.escape(hex_path.name)} – DeepSeek annotations</title>
-<style>
-body{{font-family:ui-monospace,Consolas,monospace}}
-table{{border-collapse:collapse;width:100%}}
-td{{border-bottom:1px solid #eee;padding:2px 6px;vertical-align:top}}
-td.hex{{white-space:pre}}
-.mark{{background: #ffe08a; border-radius:3px; padding:1px 2px}}
-summary{{font-weight:600}}
-</style></head>
-<body>
-<h1>{html.escape(hex_path.name)}</h1>
-<details open><summary>Summary</summary><pre>{html.escape(meta.get("summary",""))}</pre></details>
-<h2>Hexdump (regions highlighted)</h2>
-<table>
-<tr><th>Offset</th><th>Hex</th><th>ASCII</th></tr>
-{table}
-</table>
-</body></html>"""
+        try:
+            base, data, _ = load_hex(hex_path)
+        except ValueError as e:
+            print(f"skip {hex_path}: {e}", file=sys.stderr); continue
         out = OUT_DIR / (hex_path.stem + ".html")
-        out.write_text(html_out, encoding="utf-8")
+        out.write_text(render_viewer(hex_path.name, meta.get("summary", ""), data, meta.get("regions", []), base), encoding="utf-8")
         print(f"html: {out}")
     return 0
 
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming Intel-HEX Codec (ersetzt IntelHex in Export/Import)
+- write_hex/iter_records: Datensätze direkt aus einem memoryview, je 64-KiB-Segment als NumPy-Batch kodiert
+  (Länge/Adresse/Typ/Daten/Checksumme -> hexlify -> ':' + Zeile + '\\n'); Typ-04-Sätze (Extended Linear Address)
+  bei Wechsel der oberen 16 Bit, Sätze an 64-KiB-Grenzen geteilt -> gleiche Ausgabe wie IntelHex.tofile
+- read_hex: zwei Durchläufe über die Datei (1-MiB-Textstücke, konstanter Speicher): erst Adressbereich + Segmente
+  (nur Kopfzeichen dekodiert), dann je Stück ein bytes.fromhex, Checksummen per add.reduceat, Datensätze
+  direkt in ein vorab alloziertes bytearray; Lücken mit fill (Default 0xFF wie IntelHex.tobinfile)
+- load_hex: read_hex mit Memo je (Pfad, mtime, Größe) -> mehrere Reports/Viewer gegen denselben Export parsen einmal
+- Satztypen 00/01/02/04 ausgewertet, 03/05 (Startadressen) ignoriert; Checksummenfehler -> ValueError mit Zeilennummer
+"""
+import binascii
+from pathlib import Path
+import numpy as np
+
+RECORD_LEN = 16
+EOF_RECORD = b":00000001FF\n"
+
+def _record(rtype: int, addr16: int, payload=b"") -> bytes:
+    rec = bytes((len(payload), addr16 >> 8, addr16 & 0xFF, rtype)) + bytes(payload)
+    return b":" + binascii.hexlify(rec + bytes(((-sum(rec)) & 0xFF,))).upper() + b"\n"
+
+def _data_records(chunk, addr16: int, record_len=RECORD_LEN) -> bytes:
+    """Typ-00-Sätze für ein Stück innerhalb eines 64-KiB-Segments, als fertige Zeilen."""
+    n = len(chunk); R = n // record_len; out = b""
+    if R:
+        rec = np.empty((R, record_len + 5), dtype=np.uint8)
+        addrs = addr16 + np.arange(R, dtype=np.int64) * record_len
+        rec[:, 0] = record_len; rec[:, 1] = addrs >> 8; rec[:, 2] = addrs & 0xFF; rec[:, 3] = 0
+        rec[:, 4:-1] = np.frombuffer(chunk[:R * record_len], dtype=np.uint8).reshape(R, record_len)
+        rec[:, -1] = (-rec[:, :-1].sum(axis=1, dtype=np.int64)) & 0xFF
+        hx = np.frombuffer(binascii.hexlify(rec.tobytes()).upper(), dtype=np.uint8).reshape(R, -1)
+        lines = np.empty((R, hx.shape[1] + 2), dtype=np.uint8)
+        lines[:, 0] = ord(":"); lines[:, 1:-1] = hx; lines[:, -1] = ord("\n")
+        out = lines.tobytes()
+    if n % record_len:
+        out += _record(0, addr16 + R * record_len, chunk[R * record_len:])
+    return out
+
+def iter_records(data, base: int = 0, record_len: int = RECORD_LEN, hi=None):
+    """Intel-HEX-Zeilen (bytes je 64-KiB-Segment, ohne EOF-Satz) für data ab Adresse base.
+    hi: obere 16 Bit, die beim Leser schon gelten (None -> Typ-04-Satz vor dem ersten Datensatz)."""
+    if not 0 < record_len <= 255: raise ValueError("record_len must be 1..255")
+    mv = memoryview(data); n = len(mv)
+    if base < 0 or base + n > 1 << 32: raise ValueError("address range exceeds 32 bit")
+    pos = 0
+    while pos < n:
+        addr = base + pos
+        if addr >> 16 != hi:
+            hi = addr >> 16; yield _record(4, 0, hi.to_bytes(2, "big"))
+        end = min(n, pos + 0x10000 - (addr & 0xFFFF))
+        yield _data_records(mv[pos:end], addr & 0xFFFF, record_len)
+        pos = end
+
+def write_hex(path, data, base: int = 0, record_len: int = RECORD_LEN):
+    """data (bytes/memoryview/mmap) ab Adresse base als Intel-HEX schreiben; Speicherbedarf ~ ein 64-KiB-Segment."""
+    hi = None if base + len(memoryview(data)) > 0x10000 else 0  # IntelHex: Typ 04 ab dem ersten Satz, sobald > 64 KiB adressiert wird
+    with Path(path).open("wb") as fh:
+        fh.writelines(iter_records(data, base, record_len, hi))
+        fh.write(EOF_RECORD)
+
+_HEXVAL = np.full(256, 255, dtype=np.uint8)
+for _i, _c in enumerate(b"0123456789ABCDEF"): _HEXVAL[_c] = _HEXVAL[ord(chr(_c).lower())] = _i
+_WS = np.zeros(256, dtype=bool); _WS[[9, 10, 13, 32]] = True
+
+def _text_chunks(path, chunk_bytes):
+    """Dateiinhalt in Stücken, jeweils an einem Zeilenende geschnitten -> (text, Zeilen davor)."""
+    lines_before, rest = 0, b""
+    with Path(path).open("rb") as fh:
+        while True:
+            blk = fh.read(chunk_bytes)
+            text = rest + blk
+            cut = text.rfind(b"\n") + 1 if blk else len(text)
+            if cut == 0 and blk: rest = text; continue
+            if text[:cut]: yield text[:cut], lines_before
+            lines_before += text.count(b"\n", 0, cut); rest = text[cut:]
+            if not blk: return
+
+def _decode(chunk: bytes, path, lines_before: int, base: int, full: bool):
+    """Alle Sätze eines Text-Stücks dekodieren: Kopf (Länge/Adresse/Typ) per Hex-Tabelle, komplette Sätze mit einem
+    bytes.fromhex über das Stück ohne ':' (Whitespace wird übersprungen), Checksummen per add.reduceat.
+    -> Datensatz-Gruppen [(abs_addr, n, payload (k, n) | None)], neue Basis, EOF gesehen, Sätze (bis einschl. EOF)"""
+    arr = np.frombuffer(chunk, dtype=np.uint8)
+    def fail(pos, why):
+        raise ValueError(f"{path}:{lines_before + int(np.count_nonzero(arr[:pos] == 10)) + 1}: {why}")
+    s = np.flatnonzero(arr == 58)  # ':'
+    if s.size and s[-1] + 9 > arr.size: fail(int(s[-1]), "bad record length")
+    h = _HEXVAL[arr[s[:, None] + 1 + np.arange(8)]]
+    if (h > 15).any(): fail(int(s[(h > 15).any(axis=1).argmax()]), "invalid hex digits")
+    h = h.astype(np.int64)
+    rlen = h[:, 0] * 16 + h[:, 1]; addr = (h[:, 2] << 12) | (h[:, 3] << 8) | (h[:, 4] << 4) | h[:, 5]
+    rtype = h[:, 6] * 16 + h[:, 7]; e = s + 11 + 2 * rlen
+    # Sätze dürfen sich nicht überlappen, dazwischen nur Whitespace (sonst fehlt ':' oder die Länge stimmt nicht)
+    ovl = np.flatnonzero(e[:-1] > s[1:])
+    if ovl.size or (s.size and e[-1] > arr.size): fail(int(s[ovl[0]] if ovl.size else s[-1]), "bad record length")
+    g0 = np.r_[0, e]; g = np.r_[s, arr.size] - g0  # Lücken vor/zwischen/nach den Sätzen (meist nur "\n")
+    gap = np.arange(g.sum()) + np.repeat(g0 - (np.cumsum(g) - g), g)
+    bad = np.flatnonzero(~_WS[arr[gap]])
+    if bad.size: fail(int(gap[bad[0]]), "not an Intel HEX record")
+    wrong = (rtype > 5) | ((rtype == 1) & (rlen != 0))
+    if wrong.any(): fail(int(s[wrong.argmax()]), "unknown record type")
+    eof = np.flatnonzero(rtype == 1); records = int(eof[0]) + 1 if eof.size else int(s.size)
+    if eof.size: s, e, rlen, addr, rtype = (x[:eof[0]] for x in (s, e, rlen, addr, rtype))
+
+    # Basis (Typ 02: Segment << 4, Typ 04: linear << 16) je Satz vorwärts auffüllen
+    isbase = (rtype == 2) | (rtype == 4)
+    bases = np.array([base] + [int(chunk[i + 9:i + 13], 16) << (4 if t == 2 else 16)
+                               for i, t in zip(s[isbase].tolist(), rtype[isbase].tolist())], dtype=np.int64)
+    absaddr = bases[np.cumsum(isbase)] + addr
+    data = rtype == 0
+    if not full:
+        return [(absaddr[data & (rlen == n)], n, None) for n in np.unique(rlen[data]).tolist()], int(bases[-1]), bool(eof.size), records
+
+    body = chunk[:int(e[-1])] if s.size else b""
+    off = np.cumsum(rlen + 5) - (rlen + 5)
+    try:
+        dec = np.frombuffer(bytes.fromhex(body.translate(None, b":").decode("ascii")), dtype=np.uint8)
+    except ValueError:
+        dec = None
+    if dec is None or dec.size != int((rlen + 5).sum()):  # ungültige Zeichen oder Whitespace innerhalb eines Satzes
+        bad = [i for i in range(s.size) if not all(c in b"0123456789ABCDEFabcdef" for c in chunk[s[i] + 1:e[i]])]
+        fail(int(s[bad[0]]) if bad else 0, "invalid hex digits")
+    if s.size:
+        ck = np.add.reduceat(dec, off, dtype=np.int64) & 0xFF
+        if ck.any(): fail(int(s[ck.astype(bool).argmax()]), "checksum mismatch")
+    groups = []
+    for n in np.unique(rlen[data]).tolist():
+        sel = np.flatnonzero(data & (rlen == n))
+        if sel.size == s.size:  # nur Datensätze gleicher Länge: Blockform ohne Index-Arrays
+            payload = dec.reshape(-1, n + 5)[:, 4:-1]
+        else:
+            payload = dec[off[sel, None] + 4 + np.arange(n)]
+        groups.append((absaddr[sel], n, payload))
+    return groups, int(bases[-1]), bool(eof.size), records
+
+def _iter_groups(path, full: bool, chunk_bytes=1 << 20, stats=None):
+    """stats (dict): "records" = Anzahl gelesener Sätze aller Typen bis einschl. EOF"""
+    base = 0
+    if stats is not None: stats["records"] = 0
+    for chunk, lines_before in _text_chunks(path, chunk_bytes):
+        groups, base, eof, records = _decode(chunk, path, lines_before, base, full)
+        if stats is not None: stats["records"] += records
+        yield from groups
+        if eof: return
+
+def hex_segments(path, stats=None):
+    """-> sortierte, zusammengefasste (start, end) aller Datenbereiche (end exklusiv)."""
+    starts, ends = [], []
+    for a, n, _ in _iter_groups(path, full=False, stats=stats):
+        if n: starts.append(a); ends.append(a + n)
+    if not starts: return []
+    a = np.concatenate(starts); b = np.concatenate(ends); o = np.argsort(a, kind="stable"); a, b = a[o], b[o]
+    reach = np.maximum.accumulate(b)
+    new = np.r_[True, a[1:] > reach[:-1]]
+    seg_end = np.maximum.reduceat(b, np.flatnonzero(new))
+    return list(zip(a[new].tolist(), seg_end.tolist()))
+
+def read_hex(path, fill: int = 0xFF, stats=None):
+    """-> (start_addr, bytearray min..max, segments); Lücken zwischen den Segmenten = fill.
+    stats (dict): bekommt "records" (Anzahl Sätze, wie beim Parsen gezählt)."""
+    segments = hex_segments(path, stats)
+    if not segments: return 0, bytearray(), []
+    start = segments[0][0]
+    buf = bytearray([fill]) * (segments[-1][1] - start)
+    out = np.frombuffer(buf, dtype=np.uint8)
+    for a, n, payload in _iter_groups(path, full=True, stats=stats):
+        if not n or not a.size: continue
+        if (np.diff(a) == n).all():  # lückenlose Sätze: ein zusammenhängender Block
+            out[a[0] - start:a[0] - start + a.size * n] = payload.reshape(-1)
+        else:
+            out[(a - start)[:, None] + np.arange(n)] = payload
+    return start, buf, segments
+
+_LOADED = {}
+
+def load_hex(path, fill: int = 0xFF):
+    """read_hex mit Memo je (Pfad, mtime, Größe, fill) -> (start_addr, bytes, segments); geänderte Datei -> neu parsen."""
+    p = Path(path).resolve(); st = p.stat()
+    key = (str(p), st.st_mtime_ns, st.st_size, fill)
+    hit = _LOADED.get(key)
+    if hit is None:
+        for k in [k for k in _LOADED if k[0] == key[0]]: del _LOADED[k]
+        start, buf, segments = read_hex(p, fill)
+        hit = _LOADED[key] = (start, bytes(buf), segments)
+    return hit
@@ -1,12 +1,7 @@
 #!/usr/bin/env python3
 import os, re, csv, json, hashlib, sys, time, zipfile
 from pathlib import Path
-
-try:
-    from intelhex import IntelHex
-except ImportError:
-    print("Missing dependency: intelhex (pip install intelhex)", file=sys.stderr)
-    sys.exit(2)
+from ihex import read_hex
 
 ROOT = Path(".").resolve()
 IN_DIR  = ROOT / "dist" / "deepseek" / "output"       # hier legt DeepSeek seine HEX-Files ab
@@ -76,11 +71,15 @@ def main():
         base = hex_file.stem  # enthält brand-model-…-sha8
         sha8 = base.split("-")[-1] if "-" in base else "unknown"
 
-        # HEX -> BIN
-        ih = IntelHex(str(hex_file))
+        # HEX -> BIN (Lücken mit 0xFF aufgefüllt, Start = kleinste Adresse wie bisher)
+        start, data, segments = read_hex(hex_file)
+        if len(segments) > 1:
+            print(f"{hex_file.name}: {len(segments)} segments, gaps filled with 0xFF", file=sys.stderr)
+        if start != base_addr:
+            print(f"{hex_file.name}: start 0x{start:X} != base_addr 0x{base_addr:X} from sidecar", file=sys.stderr)
         OUT_BIN.mkdir(parents=True, exist_ok=True)
         bin_out = OUT_BIN / f"{base}.bin"
-        ih.tobinfile(str(bin_out))
+        bin_out.write_bytes(data)
 
         # ZIP
         zip_path = package_zip(bin_out, meta_rel, base, sha8)
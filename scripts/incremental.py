@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+Inkrementelle Re-Analyse gegen ein früheres Analyse-Verzeichnis (gleiche Parameter + Analyzer-Version)
+- load_previous: analysis_summary.yaml (Abschnitt parameters) prüfen, CSVs der Vorgänger-Analyse laden
+- changed_ranges: geänderte Blöcke per Vergleich aller gemeinsamen Checksummen-Spalten, benachbarte zusammengefasst
+- overlaps (region_index.py): Intervalle [lo, hi) gegen die geänderten Bereiche (searchsorted statt Schleife)
+- merge_entropy: nur Fenster neu rechnen, die geänderte Bytes berühren; Rest aus entropy_windows.csv
+- map_reuse: 2D-/3D-Jobs, deren Achsen/Paare schon vorher existierten und deren Ausdehnung
+  (Achse .. Ende der größten Matrix hinter dem größten Gap) keine Änderung berührt -> alte Zeilen übernehmen;
+  Zuordnung alte Zeile -> Job über int64-Schlüssel (offset, Länge, dtype) per searchsorted, aus der alten
+  maps_summary.csv nur Schlüsselspalten geparst
+- merge_maps/top_records: übernommene Zeilen werden unverändert als Text kopiert (table_io.write_csv raw=),
+  nur neu berechnete formatiert -> Aufwand wächst mit der Änderung, nicht mit der Zahl der alten Maps
+"""
+import csv, io, json, math, sys
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from entropy_engine import window_entropy
+from map_search import ITEMSIZE, MAP_COLUMNS, axis_pairs
+from region_index import overlaps
+from table_io import concat_columns, nrows, records
+
+def _read_csv(path) -> pd.DataFrame:
+    return pd.read_csv(path, float_precision="round_trip")
+
+def load_previous(prev_dir, params: dict, version: str, blocks_df: pd.DataFrame):
+    """-> {"blocks", "entropy", "axes", "maps"} oder None (Grund auf stderr), wenn ein Vollauf nötig ist."""
+    prev_dir = Path(prev_dir)
+    def skip(why):
+        print(f"incremental: {why} -> full analysis", file=sys.stderr)
+        return None
+    try:
+        import yaml
+        meta = yaml.safe_load((prev_dir / "analysis_summary.yaml").read_text(encoding="utf-8"))["med17_analysis"]
+        # dump_yaml schreibt leere Listen als leeren Wert -> None
+        prev_params = {k: [] if v is None else v for k, v in (meta.get("parameters") or {}).items()}
+        found = int(meta["maps"]["found_count"])
+        prev = {n: _read_csv(prev_dir / f"{n}.csv") for n in ("block_checksums", "entropy_windows", "axis_candidates")}
+        maps_csv = prev_dir / "maps_summary.csv"
+        if found and not maps_csv.is_file(): raise FileNotFoundError(maps_csv)
+        prev["maps"] = maps_csv if found else None  # erst map_reuse liest davon nur, was es braucht
+    except Exception as e:
+        return skip(f"no usable previous analysis in {prev_dir} ({type(e).__name__}: {e})")
+    if str(prev_params.pop("analyzer_version", None)) != version or prev_params != params:
+        return skip("parameters or analyzer version differ")
+    blocks = prev["block_checksums"]
+    if len(blocks) != len(blocks_df) or not (blocks[["block_start", "block_end"]].to_numpy()
+                                              == blocks_df[["block_start", "block_end"]].to_numpy()).all():
+        return skip("dump size or block layout differs")
+    if not [c for c in blocks_df.columns if c in blocks.columns and c not in ("block_start", "block_end")]:
+        return skip("no common checksum column")
+    return {"blocks": blocks, "entropy": prev["entropy_windows"], "axes": prev["axis_candidates"], "maps": prev["maps"]}
+
+def changed_ranges(prev_blocks: pd.DataFrame, blocks_df: pd.DataFrame):
+    """-> rlo, rhi (sortiert, disjunkt) der Blöcke, in denen sich mindestens eine Checksumme unterscheidet."""
+    cols = [c for c in blocks_df.columns if c in prev_blocks.columns and c not in ("block_start", "block_end")]
+    diff = (prev_blocks[cols].astype(str).to_numpy() != blocks_df[cols].astype(str).to_numpy()).any(axis=1)
+    lo = blocks_df["block_start"].to_numpy()[diff]; hi = blocks_df["block_end"].to_numpy()[diff]
+    if lo.size == 0: return lo, hi
+    cut = np.flatnonzero(lo[1:] != hi[:-1]) + 1  # aneinanderliegende Blöcke zusammenfassen
+    return lo[np.r_[0, cut]], hi[np.r_[cut - 1, hi.size - 1]]
+
+def merge_entropy(data, prev_ent: pd.DataFrame, window: int, stride: int, rlo, rhi):
+    """-> offsets, lengths, H, recomputed (Anzahl neu berechneter Fenster)"""
+    off = prev_ent["offset"].to_numpy(np.int64); ln = prev_ent["length"].to_numpy(np.int64)
+    H = prev_ent["entropy_bits_per_byte"].to_numpy(np.float64).copy()
+    dirty = np.flatnonzero(overlaps(off, off + ln, rlo, rhi))
+    if dirty.size:
+        # zusammenhängende Läufe schmutziger Fenster je Slice rechnen (Fensterlängen wie im Vollauf)
+        cut = np.flatnonzero(np.diff(dirty) != 1) + 1
+        for run in np.split(dirty, cut):
+            a = int(off[run[0]]); b = int(off[run[-1]] + ln[run[-1]])
+            _, _, h = window_entropy(memoryview(data)[a:b], window, stride)
+            H[run] = h[:run.size]
+    return off, ln, H, int(dirty.size)
+
+def _axis_arrays(df: pd.DataFrame):
+    offs = df["offset"].to_numpy(np.int64); lens = df["length"].to_numpy(np.int64)
+    isz = df["dtype"].map(ITEMSIZE).to_numpy(np.int64)
+    return offs, lens, offs + lens * isz
+
+def _axis_codes(offs, lens, dtypes) -> np.ndarray:
+    """(offset, length, dtype) -> int64-Schlüssel (offset < 2^40, length < 2^20, unbekannter dtype -> 7)"""
+    dt = np.asarray(dtypes, dtype=object); ids = np.full(dt.size, 7, np.int64)
+    for i, n in enumerate(ITEMSIZE): ids[dt == n] = i
+    return (np.asarray(offs, np.int64) << 23) | (np.asarray(lens, np.int64) << 3) | ids
+
+def _lookup(keys: np.ndarray, q: np.ndarray) -> np.ndarray:
+    """Index von q in keys (eindeutig) oder -1"""
+    if keys.size == 0: return np.full(q.size, -1, np.int64)
+    o = np.argsort(keys, kind="stable"); sk = keys[o]
+    pos = np.minimum(np.searchsorted(sk, q), sk.size - 1)
+    return np.where(sk[pos] == q, o[pos], -1)
+
+def _member(q: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """np.isin für int64-Schlüssel: einmal sortieren, dann searchsorted"""
+    if keys.size == 0: return np.zeros(q.size, bool)
+    sk = np.sort(keys); pos = np.minimum(np.searchsorted(sk, q), sk.size - 1)
+    return sk[pos] == q
+
+def _read_maps(path):
+    """maps_summary.csv -> (Kopfzeile als Liste, Datenzeilen roh mit Zeilenende, Schlüsselspalten als DataFrame).
+    Nur Spalten für Zuordnung und Sortierung werden geparst (std exakt), shape/mean/score bleiben Text."""
+    with open(path, newline="", encoding="utf-8") as fh:
+        lines = fh.readlines()
+    header = next(csv.reader(lines[:1]))
+    use = [c for c in header if c not in ("mean", "score")]
+    df = pd.read_csv(path, usecols=use, dtype={c: str for c in use if c in ("type", "shape", "std") or c.endswith("dtype")})
+    df["std"] = df["std"].to_numpy().astype(np.float64)  # exakt wie round_trip, schneller als float_precision="round_trip"
+    return header, lines[1:], df
+
+def _lens(shape: pd.Series, k: int) -> np.ndarray:
+    """shape-Texte "[a]" / "[a, b]" -> (n, k) int64 ohne json je Zeile"""
+    if shape.empty: return np.empty((0, k), np.int64)
+    text = ",".join(shape.tolist()).replace("[", "").replace("]", "")
+    return np.fromstring(text, dtype=np.int64, sep=",").reshape(-1, k)
+
+def _reused_part(kind, header, lines, df, rows):
+    """Übernommene Zeilen einer Art: Schlüsselspalten geparst, shape/mean Platzhalter (Zeilen werden roh kopiert)"""
+    cols = {}
+    for c in header:
+        if c not in MAP_COLUMNS[kind]: continue
+        if c in ("shape", "mean"): cols[c] = [math.nan] * rows.size if c == "shape" else np.full(rows.size, np.nan)
+        elif c.endswith("offset"): cols[c] = df[c].to_numpy()[rows].astype(np.int64)
+        elif c == "std": cols[c] = df[c].to_numpy(np.float64)[rows]
+        else: cols[c] = df[c].to_numpy(object)[rows].tolist()
+    return {"kind": kind, "header": header, "cols": cols, "lines": [lines[i] for i in rows.tolist()]}
+
+def map_reuse(axis_df: pd.DataFrame, prev_axes: pd.DataFrame, prev_maps, gaps, rlo, rhi,
+              max_dist=2048, max_followers=50):
+    """prev_maps: Pfad der alten maps_summary.csv (oder None).
+    -> select (für search_maps), wiederverwendete Zeilen [{"kind", "header", "cols", "lines"}], Zähler"""
+    offs, lens, ends = _axis_arrays(axis_df)
+    code = _axis_codes(offs, lens, axis_df["dtype"].to_numpy(object)); n = code.size
+    oo, ol, oe = _axis_arrays(prev_axes)
+    old_id = _lookup(_axis_codes(oo, ol, prev_axes["dtype"].to_numpy(object)), code)
+    reach = max(gaps, default=0)  # Matrix liegt höchstens max(gaps) hinter der (letzten) Achse, max. 4 Byte/Element
+
+    clean2d = (old_id >= 0) & ~overlaps(offs, ends + reach + 4 * lens, rlo, rhi)
+    pi, pj = axis_pairs(offs, ends, max_dist, max_followers)
+    n_old = len(prev_axes)
+    opi, opj = axis_pairs(oo, oe, max_dist, max_followers)
+    known = (old_id[pi] >= 0) & (old_id[pj] >= 0) & _member(old_id[pi] * n_old + old_id[pj], opi * n_old + opj)
+    clean3d = known & ~overlaps(offs[pi], ends[pj] + reach + 4 * lens[pi] * lens[pj], rlo, rhi)
+
+    def select(kind, idx):
+        return ~clean2d[idx[0]] if kind == "2D" else ~clean3d[np.searchsorted(pi * n + pj, idx[0] * n + idx[1])]
+
+    reused = []
+    if prev_maps is not None:
+        header, lines, df = _read_maps(prev_maps)
+        typ = df["type"].to_numpy(object)
+        r2 = np.flatnonzero(typ == "2D")
+        if r2.size:  # alte 2D-Zeile übernehmen, wenn ihre Achse (offset, Länge, dtype) ein sauberer Job ist
+            c2 = _axis_codes(df["axis_offset"].to_numpy()[r2], _lens(df["shape"].iloc[r2], 1)[:, 0], df["axis_dtype"].to_numpy(object)[r2])
+            keep = r2[_member(c2, code[clean2d])]
+            if keep.size: reused.append(_reused_part("2D", header, lines, df, keep))
+        r3 = np.flatnonzero(typ == "3D")
+        if r3.size:  # 3D: beide Achsen auf neue Indizes abbilden, Paar muss ein sauberer Job sein
+            l = _lens(df["shape"].iloc[r3], 2)
+            a1 = _lookup(code, _axis_codes(df["axis1_offset"].to_numpy()[r3], l[:, 0], df["axis1_dtype"].to_numpy(object)[r3]))
+            a2 = _lookup(code, _axis_codes(df["axis2_offset"].to_numpy()[r3], l[:, 1], df["axis2_dtype"].to_numpy(object)[r3]))
+            keep = r3[(a1 >= 0) & (a2 >= 0) & _member(a1 * n + a2, pi[clean3d] * n + pj[clean3d])]
+            if keep.size: reused.append(_reused_part("3D", header, lines, df, keep))
+    stats = {"jobs_2d_recomputed": int((~clean2d).sum()), "jobs_3d_recomputed": int((~clean3d).sum()),
+             "maps_reused": int(sum(len(r["lines"]) for r in reused))}
+    return select, reused, stats
+
+def _parsed_part(r) -> dict:
+    """Übernommene Zeilen vollständig parsen (nur wenn das Spaltenlayout sich geändert hat)"""
+    df = pd.read_csv(io.StringIO("".join([",".join(r["header"]) + "\n", *r["lines"]])), float_precision="round_trip",
+                     dtype={c: str for c in r["header"] if c in ("type", "shape") or c.endswith("dtype")})
+    cols = {}
+    for c in r["cols"]:
+        if c == "shape": cols[c] = [json.loads(x) for x in df[c].tolist()]
+        elif c.endswith("offset"): cols[c] = df[c].to_numpy().astype(np.int64)
+        elif c in ("std", "mean"): cols[c] = df[c].to_numpy(np.float64)
+        else: cols[c] = df[c].tolist()
+    return cols
+
+def merge_maps(found: dict, reused: list):
+    """Neue (search_maps) und übernommene Zeilen -> (Spalten wie im Vollauf, Rohzeile je Zeile oder None = formatieren).
+    Rohzeilen nur, wenn das Spaltenlayout der alten Datei dem neuen entspricht, sonst werden sie geparst (raw None)."""
+    def build(parts_reused):
+        parts, raw = [], []
+        for kind in ("2D", "3D"):  # Teile nach Art wie im Vollauf -> gleiche Spaltenreihenfolge und -typen
+            if nrows(found.get(kind, {})): parts.append(found[kind]); raw += [None] * nrows(found[kind])
+            for r, cols in parts_reused:
+                if r["kind"] == kind: parts.append(cols); raw += r["lines"]
+        return concat_columns(parts), raw
+    maps, raw = build([(r, r["cols"]) for r in reused])
+    if reused and list(maps) + ["score"] != reused[0]["header"]:
+        maps, _ = build([(r, _parsed_part(r)) for r in reused]); raw = None
+    return maps, (raw if reused else None)
+
+def _value(col, v: str, name: str):
+    if v == "": return math.nan
+    if name == "shape": return json.loads(v)
+    if isinstance(col, np.ndarray) and col.dtype.kind in "iu": return int(v)
+    if isinstance(col, np.ndarray) and col.dtype.kind == "f": return float(v)
+    return v
+
+def top_records(maps: dict, raw, n: int) -> list:
+    """records(maps, n); übernommene Zeilen (Platzhalter für shape/mean) aus ihrer Rohzeile"""
+    out = records(maps, n)
+    for rec, line in zip(out, raw or []):
+        if line is None: continue
+        for c, v in zip(maps, next(csv.reader([line]))): rec[c] = _value(maps[c], v, c)
+    return out
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Leichtgewichtige Instrumentierung für die Analyse-CLIs (Ergebnis als dict -> analysis_summary.yaml / re_summary.json)
+- new_stats: {"timings_s", "maxrss_delta_mb", "peak_rss_mb", "counters"}
+- timed(stats, name): Kontextmanager, Wandzeit je Stufe (mehrfach betretene Stufen summiert) und
+  maxrss_delta_mb[name] = Anstieg des Prozess-Peak-RSS (ru_maxrss nachher - vorher) während der Stufe, bei mehrfach
+  betretenen Stufen das Maximum der Anstiege; 0 = Stufe blieb unter dem bisherigen Peak (ihr Speicherbedarf ist damit
+  nicht gemessen, nur dass sie keinen neuen Höchststand verursacht hat); peak_rss_mb = Prozess-Peak nach der letzten Stufe
+- count(stats, name, n): Zähler erhöhen (z.B. Achsenkandidaten, ausgewertete Fenster der Map-Suche)
+- profiled(path): optional cProfile für einen Abschnitt -> <path>.pstats + Text-Top-Liste <path>.txt
+"""
+import cProfile, io, pstats, sys, time
+from contextlib import contextmanager
+from pathlib import Path
+
+def new_stats() -> dict:
+    return {"timings_s": {}, "maxrss_delta_mb": {}, "peak_rss_mb": None, "counters": {}}
+
+def peak_rss_mb():
+    """Peak-RSS des Prozesses in MiB (None ohne resource-Modul, z.B. Windows)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(kb / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)  # macOS: Bytes, sonst KiB
+
+@contextmanager
+def timed(stats, name: str):
+    if stats is None:
+        yield; return
+    t = time.perf_counter(); rss0 = peak_rss_mb()
+    try:
+        yield
+    finally:
+        tm = stats["timings_s"]; tm[name] = round(tm.get(name, 0.0) + time.perf_counter() - t, 4)
+        rss = stats["peak_rss_mb"] = peak_rss_mb()
+        if rss is not None:
+            d = stats["maxrss_delta_mb"]; d[name] = round(max(d.get(name, 0.0), rss - rss0), 1)
+
+def count(stats, name: str, n=1):
+    if stats is not None: stats["counters"][name] = stats["counters"].get(name, 0) + int(n)
+
+@contextmanager
+def profiled(path, top: int = 40):
+    """path None -> kein Profiling"""
+    if path is None:
+        yield; return
+    prof = cProfile.Profile(); prof.enable()
+    try:
+        yield
+    finally:
+        prof.disable(); path = Path(path)
+        prof.dump_stats(path.with_suffix(".pstats"))
+        buf = io.StringIO(); pstats.Stats(prof, stream=buf).sort_stats("cumulative").print_stats(top)
+        path.with_suffix(".txt").write_text(buf.getvalue(), encoding="utf-8")
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Map-Suche (2D/3D) über Achsenkandidaten – indiziert statt verschachtelter Schleifen
+- Achsen als sortierter Offset-Index; 3D-Paare per Intervall-Lookup (searchsorted, Abstand <= 2 KiB)
+- Fensterstatistik aller Kandidaten auf einmal aus Präfixsummen von x und x² (int16-Wörter, beide Byte-Paritäten)
+- "Konstant?" exakt über Präfixzähler der Wortwechsel -> O(1) je Kandidat
+- float32 nur als Ersatz (16-Bit-Fenster konstant): gebatcht, gleiche float32-Arithmetik wie extract_block_stats
+- Ergebnis: gleiche Datensätze wie die bisherige Schleife (Reihenfolge 2D je Achse, dann 3D je Paar), spaltenweise
+- optional stats (instrument.py): Zähler für Jobs und ausgewertete int16-/float32-Fenster
+"""
+import numpy as np
+from bin_loader import view_as
+from instrument import count
+
+ITEMSIZE = {"int16_le": 2, "uint16_le": 2, "float32_le": 4}
+NP_DTYPES = {"int16_le": "<i2", "uint16_le": "<u2", "float32_le": "<f4"}
+MAP_COLUMNS = {"2D": ("type", "axis_dtype", "data_dtype", "axis_offset", "data_offset", "shape", "std", "mean"),
+               "3D": ("type", "axis1_dtype", "axis2_dtype", "data_dtype", "axis1_offset", "axis2_offset", "data_offset",
+                      "shape", "std", "mean")}  # Spalten je Art, wie search_maps sie liefert
+
+def extract_block_stats(data, start_offset: int, num_items: int, dtype: str):
+    if dtype not in NP_DTYPES: return None
+    end = start_offset + num_items * ITEMSIZE[dtype]
+    if end > len(data) or start_offset < 0: return None
+    arr = np.frombuffer(memoryview(data)[start_offset:end], dtype=NP_DTYPES[dtype])
+    with np.errstate(over="ignore", invalid="ignore"):
+        if arr.size == 0 or not np.all(np.isfinite(arr)): return None
+        std = float(np.std(arr)); mean = float(np.mean(arr))
+    if not np.isfinite(std): return None
+    return {"std": std, "mean": mean}
+
+def word_index(data) -> dict:
+    """Präfixsummen über int16-Wörter für Parität 0 und 1: s1 (x), s2 (x²), ch (Wortwechsel)."""
+    idx = {"size": len(data)}
+    for parity in (0, 1):
+        w = view_as("<i2", data, parity).astype(np.int64)
+        s1 = np.zeros(w.size + 1, np.int64); np.cumsum(w, out=s1[1:])
+        s2 = np.zeros(w.size + 1, np.int64); np.cumsum(w * w, out=s2[1:])
+        ch = np.zeros(w.size + 1, np.int64); np.cumsum(np.diff(w, prepend=w[:1]) != 0, out=ch[1:])
+        idx[parity] = (s1, s2, ch)
+    return idx
+
+def int16_stats(idx, starts, counts):
+    """-> valid, std, mean (gleiche Form wie starts) für int16-Fenster."""
+    valid = np.zeros(starts.shape, dtype=bool)
+    std = np.zeros(starts.shape); mean = np.zeros(starts.shape)
+    inb = (starts >= 0) & (starts + 2 * counts <= idx["size"]) & (counts > 0)
+    for parity in (0, 1):
+        sel = inb & ((starts % 2) == parity)
+        n = counts[sel]; i0 = (starts[sel] - parity) // 2; i1 = i0 + n
+        s1, s2, ch = idx[parity]
+        S1 = s1[i1] - s1[i0]; S2 = s2[i1] - s2[i0]
+        if n.size and n.max() <= 65536:
+            var = (n * S2 - S1 * S1) / (n.astype(np.float64) ** 2)
+        else:
+            var = S2 / n - (S1 / n) ** 2
+        sd = np.sqrt(np.maximum(var, 0.0))
+        nonconst = (ch[i1] - ch[i0 + 1]) > 0
+        valid[sel] = nonconst & (sd > 1e-3); std[sel] = sd; mean[sel] = S1 / n
+    return valid, std, mean
+
+def float32_stats(data, starts, counts, max_elems=1 << 22):
+    """extract_block_stats für viele float32-Fenster auf einmal (gruppiert nach Länge, zeilenweise Reduktion
+    wie im 1D-Fall). -> valid, std, mean"""
+    valid = np.zeros(starts.size, dtype=bool); std = np.zeros(starts.size); mean = np.zeros(starts.size)
+    views = [view_as("<f4", data, a) for a in range(4)]
+    for n in np.unique(counts).tolist():
+        grp = np.flatnonzero(counts == n); step = max(1, max_elems // n)
+        for a in range(4):
+            sel = grp[(starts[grp] % 4) == a]
+            for c0 in range(0, sel.size, step):
+                rows = sel[c0:c0 + step]
+                W = views[a][((starts[rows] - a) // 4)[:, None] + np.arange(n)]
+                with np.errstate(over="ignore", invalid="ignore"):
+                    fin = np.isfinite(W).all(axis=1)
+                    sd = np.std(W, axis=1).astype(np.float64); mu = np.mean(W, axis=1).astype(np.float64)
+                valid[rows] = fin & np.isfinite(sd) & (sd > 1e-3); std[rows] = sd; mean[rows] = mu
+    return valid, std, mean
+
+def resolve_jobs(data, idx, starts, counts, stats=None):
+    """starts: (J, G) Byte-Offsets je Gap, counts: (J,) Elemente.
+    Pro Job erster Gap mit gültigem int16- (ersatzweise float32-)Fenster wie in der Original-Schleife.
+    -> jobs, starts, dtypes, std, mean (Arrays, nach Job sortiert)"""
+    J, G = starts.shape
+    cnt = np.broadcast_to(counts[:, None], starts.shape)
+    v16, sd16, mu16 = int16_stats(idx, starts, cnt)
+    first16 = np.where(v16.any(axis=1), v16.argmax(axis=1), G)
+    # float32 nur vor dem ersten int16-Treffer und im Puffer (int16 dort konstant bzw. ungültig)
+    inb32 = (starts >= 0) & (starts + 4 * cnt <= idx["size"]) & (cnt > 0)
+    need = inb32 & (np.arange(G)[None, :] < first16[:, None])
+    v32 = np.zeros(starts.shape, dtype=bool); sd32 = np.zeros(starts.shape); mu32 = np.zeros(starts.shape)
+    count(stats, "int16_windows", starts.size); count(stats, "float32_windows", need.sum())
+    if need.any():
+        v32[need], sd32[need], mu32[need] = float32_stats(data, starts[need], cnt[need])
+    first32 = np.where(v32.any(axis=1), v32.argmax(axis=1), G)
+    use32 = first32 < first16
+    first = np.minimum(first16, first32)
+    jobs = np.flatnonzero(first < G); g = first[jobs]; f32 = use32[jobs]
+    return (jobs, starts[jobs, g], np.where(f32, "float32_le", "int16_le"),
+            np.where(f32, sd32[jobs, g], sd16[jobs, g]), np.where(f32, mu32[jobs, g], mu16[jobs, g]))
+
+def axis_pairs(offs, ends, max_dist=2048, max_followers=50):
+    """Alle (i, j) mit 0 <= offs[j] - ends[i] <= max_dist und i < j < i + max_followers (offs sortiert)."""
+    n = offs.size; i = np.arange(n)
+    lo = np.maximum(np.searchsorted(offs, ends, "left"), i + 1)
+    hi = np.minimum(np.searchsorted(offs, ends + max_dist, "right"), np.minimum(i + max_followers, n))
+    cnt = np.maximum(hi - lo, 0)
+    pi = np.repeat(i, cnt)
+    pj = np.repeat(lo, cnt) + (np.arange(cnt.sum()) - np.repeat(np.cumsum(cnt) - cnt, cnt))
+    return pi, pj
+
+def search_maps(data, axis_list, gaps, max_dist=2048, max_followers=50, select=None, stats=None):
+    """axis_list: Dicts mit offset/length/dtype, nach offset sortiert.
+    select: optional callable(kind, idx) -> Bool-Maske der zu rechnenden Jobs (idx = (i,) für 2D, (pi, pj) für 3D)
+    -> {"2D": Spalten, "3D": Spalten} (Spalten wie maps_summary.csv, Zeilen in der Reihenfolge der alten Schleife)"""
+    out = {"2D": {}, "3D": {}}
+    if not axis_list or not gaps: return out
+    idx = word_index(data)
+    offs = np.array([a["offset"] for a in axis_list], dtype=np.int64)
+    lens = np.array([a["length"] for a in axis_list], dtype=np.int64)
+    dts = np.array([a["dtype"] for a in axis_list], dtype=object)
+    isz = np.array([ITEMSIZE[d] for d in dts], dtype=np.int64)
+    ends = offs + lens * isz; g = np.array(gaps, dtype=np.int64)
+
+    # 2D: Matrix direkt hinter der Achse
+    a = np.arange(offs.size)
+    if select is not None: a = a[select("2D", (a,))]
+    count(stats, "map_jobs_2d", a.size)
+    j, start, dtype, std, mean = resolve_jobs(data, idx, ends[a][:, None] + g[None, :], lens[a], stats); j = a[j]
+    out["2D"] = {"type": ["2D"] * j.size, "axis_dtype": dts[j], "data_dtype": dtype, "axis_offset": offs[j],
+                 "data_offset": start, "shape": [[n] for n in lens[j].tolist()], "std": std, "mean": mean}
+
+    # 3D: Achse 1, Achse 2 (<= max_dist dahinter), dann Matrix len1 x len2
+    pi, pj = axis_pairs(offs, ends, max_dist, max_followers)
+    if select is not None:
+        m = select("3D", (pi, pj)); pi, pj = pi[m], pj[m]
+    count(stats, "map_jobs_3d", pi.size)
+    k, start, dtype, std, mean = resolve_jobs(data, idx, ends[pj][:, None] + g[None, :], lens[pi] * lens[pj], stats)
+    pi, pj = pi[k], pj[k]
+    out["3D"] = {"type": ["3D"] * k.size, "axis1_dtype": dts[pi], "axis2_dtype": dts[pj], "data_dtype": dtype,
+                 "axis1_offset": offs[pi], "axis2_offset": offs[pj], "data_offset": start,
+                 "shape": [[a, b] for a, b in zip(lens[pi].tolist(), lens[pj].tolist())], "std": std, "mean": mean}
+    return out
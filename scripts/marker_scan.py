@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+Multi-Pattern Marker-Suche (ein Durchlauf für alle Marker, ASCII + UTF-16LE)
+- compile_markers: Präfix-Index (erste L Bytes je Pattern als uint64, sortiert) + Pattern-Gruppen
+- scan_markers: ein vektorisierter Durchlauf über alle Positionen (searchsorted im Präfix-Index),
+  danach Verifikation nur der Kandidaten -> Kosten ~ O(n log k) statt O(n * k)
+- load_marker_file: eigene Markerlisten (eine Zeile je Marker, '#' = Kommentar, 'hex:..' = Rohbytes)
+"""
+from pathlib import Path
+import numpy as np
+
+MAX_KEY = 8  # Präfixlänge in Bytes (uint64)
+
+def load_marker_file(path) -> list:
+    out = []
+    for ln in Path(path).read_text(encoding="utf-8").splitlines():
+        ln = ln.strip()
+        if not ln or ln.startswith("#"): continue
+        out.append(bytes.fromhex(ln[4:]) if ln.lower().startswith("hex:") else ln.encode("latin-1"))
+    return out
+
+def compile_markers(markers, utf16le=True) -> dict:
+    pats, names, seen = [], [], set()
+    variants = [(m, m.decode("latin-1")) for m in markers]
+    if utf16le:
+        variants += [(m.decode("latin-1").encode("utf-16-le"), m.decode("latin-1") + "_utf16le") for m in markers]
+    for pat, name in variants:
+        if not pat or pat in seen: continue
+        seen.add(pat); pats.append(pat); names.append(name)
+    if not pats: raise ValueError("no markers")
+    L = min(MAX_KEY, min(len(p) for p in pats))
+    by_key = {}
+    for i, p in enumerate(pats):
+        by_key.setdefault(int.from_bytes(p[:L], "big"), []).append(i)
+    keys = np.array(sorted(by_key), dtype=np.uint64)
+    return {"L": L, "keys": keys, "groups": [by_key[int(k)] for k in keys], "patterns": pats, "names": names}
+
+def prefix_keys(u8: np.ndarray, L: int) -> np.ndarray:
+    m = u8.size - L + 1
+    keys = np.zeros(max(m, 0), dtype=np.uint64)
+    for j in range(L):
+        keys <<= np.uint64(8); keys |= u8[j:j + m]
+    return keys
+
+def scan_markers(data, cm: dict):
+    """-> (pattern_index, offset) als Arrays, sortiert nach Pattern-Reihenfolge, dann Offset."""
+    u8 = np.frombuffer(data, dtype=np.uint8)
+    keys = prefix_keys(u8, cm["L"])
+    if keys.size == 0: return np.empty(0, np.int64), np.empty(0, np.int64)
+    idx = np.minimum(np.searchsorted(cm["keys"], keys), cm["keys"].size - 1)
+    cand = np.flatnonzero(cm["keys"][idx] == keys)
+    mv = memoryview(data); pats = cm["patterns"]; groups = cm["groups"]
+    hit_p, hit_o = [], []
+    for pos, k in zip(cand.tolist(), idx[cand].tolist()):
+        for pi in groups[k]:
+            if mv[pos:pos + len(pats[pi])] == pats[pi]:
+                hit_p.append(pi); hit_o.append(pos)
+    hit_p = np.array(hit_p, dtype=np.int64); hit_o = np.array(hit_o, dtype=np.int64)
+    order = np.lexsort((hit_o, hit_p))
+    return hit_p[order], hit_o[order]
@@ -1,15 +1,24 @@
 #!/usr/bin/env python3
 # Reverse-Engineering Scanner (safe, read-only)
-# - ASCII & UTF-16LE strings
-# - Marker-Suche (Bosch/MED/MG1/UDS/XCP/ASAM/A2L/...)
-# - Entropy-Segmente (4KiB Fenster) + Labels
+# - ASCII & UTF-16LE strings (mit Offsets)
+# - Marker-Suche (Bosch/MED/MG1/UDS/XCP/ASAM/A2L/... + eigene Listen via --markers-file), ein Durchlauf
+# - Entropy-Segmente (4KiB Fenster, optional überlappend) + Labels
 # - Byte-Histogramm (PNG)
 # - JSON/CSV Summary
-import argparse, json, math, re, zlib
+# - Eingabe auch komprimiert (.gz/.xz/.zst) oder als ZIP-Paket; alle Stufen in einem Streaming-Durchlauf
+#   (stream_scan.py, Speicher ~ Stückgröße statt Dumpgröße)
+# - Instrumentierung (instrument.py): Zeiten + Peak-RSS-Anstieg je Stufe, Prozess-Peak + Zähler in re_summary.json (instrumentation),
+#   --profile -> <out>/profile.pstats + profile.txt
+# - Tabellen als Spalten-Dicts + csv (table_io.py) statt pandas; matplotlib erst beim Histogramm, --no-plots ohne
+import argparse, csv, json, math, re, time, zlib
 from pathlib import Path
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
+from bin_loader import dump_name, iter_dump
+from entropy_engine import window_entropy
+from marker_scan import compile_markers, load_marker_file, scan_markers
+from stream_scan import stream_scan
+from table_io import nrows, records, take, write_csv
+from instrument import count, new_stats, profiled, timed
 
 MARKERS = [
     b"BOSCH", b"MED", b"MG1", b"ME17", b"ME7",
@@ -18,90 +27,38 @@ MARKERS = [
     b"SWFL", b"SWUP", b"BOOT", b"CBOOT", b"FLASH", b"CAL", b"MAP"
 ]
 
-def ascii_strings(b: bytes, minlen=4):
-    out=[]; cur=[]
-    for x in b:
-        if 32 <= x < 127:
-            cur.append(x)
-        else:
-            if len(cur) >= minlen: out.append(bytes(cur).decode('ascii','ignore'))
-            cur=[]
-    if len(cur) >= minlen: out.append(bytes(cur).decode('ascii','ignore'))
-    return out
+def segment_entropy(b: bytes, win=4096, stride=None):
+    return entropy_segments(*window_entropy(b, win, stride))
 
-def utf16le_strings(b: bytes, minlen=4):
-    out=[]; cur=[]
-    # read 2-byte units
-    for i in range(0, len(b)-1, 2):
-        ch = int.from_bytes(b[i:i+2], 'little', signed=False)
-        if 32 <= ch < 127:
-            cur.append(ch)
-        else:
-            if len(cur) >= minlen: out.append("".join(map(chr, cur)))
-            cur=[]
-    if len(cur) >= minlen: out.append("".join(map(chr, cur)))
-    return out
+def entropy_segments(off, length, ent):
+    """-> (Fenster, Segmente) als Spalten (table_io)"""
+    # simple run-length merge into segments (adjacent windows with label)
+    lab = np.where(ent < 4.5, "low", np.where(ent < 6.5, "med", "high"))
+    df = {"offset": off, "length": length, "entropy_bits_per_byte": ent, "label": lab}
+    if not len(off):
+        return df, {k: np.empty(0, dt) for k, dt in (("start", np.int64), ("end", np.int64), ("length", np.int64),
+                                                        ("label", lab.dtype), ("entropy_mean", np.float64))}
+    starts = np.concatenate(([0], np.flatnonzero(lab[1:] != lab[:-1]) + 1))
+    ends = np.append(starts[1:], len(off))
+    means = np.array([ent[a:b].sum() for a, b in zip(starts.tolist(), ends.tolist())]) / (ends - starts)  # paarweise Summe wie Series.mean
+    seg_end = np.append(off[starts[1:]], off[-1] + length[-1])
+    segs = {"start": off[starts], "end": seg_end, "length": seg_end - off[starts],
+            "label": lab[starts], "entropy_mean": means}
+    return df, segs
 
-def shannon_entropy(arr_u8: np.ndarray):
-    if arr_u8.size == 0: return 0.0
-    counts = np.bincount(arr_u8, minlength=256)
-    p = counts / float(arr_u8.size)
-    nz = p[p>0]
-    return float(-(nz*np.log2(nz)).sum())
+def find_markers(b: bytes, cm=None):
+    cm = cm or compile_markers(MARKERS)
+    return markers_frame(*scan_markers(b, cm), cm)
 
-def segment_entropy(b: bytes, win=4096):
-    rows=[]
-    arr = np.frombuffer(b, dtype=np.uint8)
-    for off in range(0, len(b), win):
-        chunk = arr[off:off+win]
-        H = shannon_entropy(chunk)
-        rows.append((off, len(chunk), H))
-    df = pd.DataFrame(rows, columns=["offset","length","entropy_bits_per_byte"])
-    # simple run-length merge into segments (adjacent windows with label)
-    def label(h):
-        return "low" if h<4.5 else ("med" if h<6.5 else "high")
-    df["label"] = df["entropy_bits_per_byte"].apply(label)
-    segs=[]
-    start=0; cur_label=df.iloc[0]["label"] if not df.empty else "low"
-    for i in range(len(df)):
-        lab = df.iloc[i]["label"]
-        if lab != cur_label:
-            off0 = int(df.iloc[start]["offset"])
-            off1 = int(df.iloc[i]["offset"])
-            seg = arr[off0:off1]
-            segs.append({"start":off0, "end":off1, "length":off1-off0,
-                         "label":cur_label, "entropy_mean":float(df.iloc[start:i]["entropy_bits_per_byte"].mean())})
-            start=i; cur_label=lab
-    if not df.empty:
-        off0 = int(df.iloc[start]["offset"])
-        off1 = int(df.iloc[len(df)-1]["offset"] + df.iloc[len(df)-1]["length"])
-        seg = arr[off0:off1]
-        segs.append({"start":off0, "end":off1, "length":off1-off0,
-                     "label":cur_label, "entropy_mean":float(df.iloc[start:]["entropy_bits_per_byte"].mean())})
-    return df, pd.DataFrame(segs)
+def markers_frame(pidx, offs, cm):
+    return {"marker": np.array(cm["names"], dtype=object)[pidx], "offset": offs}
 
-def find_markers(b: bytes):
-    hits=[]
-    for m in MARKERS:
-        start=0
-        while True:
-            idx = b.find(m, start)
-            if idx==-1: break
-            hits.append({"marker": m.decode('ascii','ignore'), "offset": idx})
-            start = idx+1
-    # crude UTF-16LE marker search (letters + zero)
-    for m in MARKERS:
-        pat = b"".join(x.to_bytes(2,'little') for x in m)
-        start=0
-        while True:
-            idx = b.find(pat, start)
-            if idx==-1: break
-            hits.append({"marker": m.decode('ascii','ignore')+"_utf16le", "offset": idx})
-            start = idx+1
-    return pd.DataFrame(hits)
+def markers_json(dfm) -> str:
+    """wie DataFrame.to_json(orient="records"): kompakt, ASCII, "/" maskiert"""
+    return json.dumps(records(dfm), separators=(",", ":")).replace("/", "\\/")
 
-def byte_histogram_png(arr_u8: np.ndarray, out_png: Path):
-    counts = np.bincount(arr_u8, minlength=256)
+def byte_histogram_png(counts: np.ndarray, out_png: Path):
+    import matplotlib.pyplot as plt
     plt.figure()
     plt.bar(range(256), counts)
     plt.xlabel("Byte value")
@@ -113,49 +70,75 @@ def byte_histogram_png(arr_u8: np.ndarray, out_png: Path):
 
 def main():
     ap = argparse.ArgumentParser()
+    ap.add_argument("--profile", action="store_true", help="cProfile des Laufs -> <out>/profile.pstats + profile.txt")
     ap.add_argument("--bin", required=True)
     ap.add_argument("--out", required=True)
+    ap.add_argument("--markers-file", action="append", default=[], help="Zusätzliche Marker (eine Zeile je Marker, hex:.. für Rohbytes)")
+    ap.add_argument("--entropy-stride", type=int, default=None, help="Fenster-Schrittweite (Default: 4096)")
+    ap.add_argument("--no-plots", action="store_true", help="Kein byte_histogram.png (matplotlib wird nicht importiert)")
     args = ap.parse_args()
-    p = Path(args.bin); out = Path(args.out); out.mkdir(parents=True, exist_ok=True)
-    b = p.read_bytes()
-    u8 = np.frombuffer(b, dtype=np.uint8)
+    out = Path(args.out); out.mkdir(parents=True, exist_ok=True)
+    with profiled(out / "profile" if args.profile else None):
+        scan(args, out)
+
+def scan(args, out: Path):
+    stats = new_stats(); t0 = time.perf_counter()
+    p = Path(args.bin)
+    markers = MARKERS + [m for f in args.markers_file for m in load_marker_file(f)]
+    cm = compile_markers(markers)
+    res = stream_scan(iter_dump(p), 4096, args.entropy_stride, cm, 4, stats)
 
     # Strings
-    asc = ascii_strings(b, 4)
-    (out/"strings_ascii.txt").write_text("\n".join(asc), encoding="utf-8")
-    u16 = utf16le_strings(b, 4)
-    (out/"strings_utf16le.txt").write_text("\n".join(u16), encoding="utf-8")
+    asc, u16 = res["ascii"], res["utf16le"]
+    with timed(stats, "write_strings"):
+        (out/"strings_ascii.txt").write_text("\n".join(t for _, t in asc), encoding="utf-8")
+        (out/"strings_utf16le.txt").write_text("\n".join(t for _, t in u16), encoding="utf-8")
+        with (out/"strings.csv").open("w", newline="", encoding="utf-8") as fh:
+            w = csv.writer(fh); w.writerow(["encoding","offset","text"])
+            w.writerows(("ascii", off, t) for off, t in asc)
+            w.writerows(("utf16le", off, t) for off, t in u16)
 
     # Markers
-    dfm = find_markers(b)
-    if not dfm.empty:
-        dfm.sort_values(["marker","offset"]).to_csv(out/"markers.csv", index=False)
-    (out/"markers.json").write_text(dfm.to_json(orient="records"), encoding="utf-8")
+    dfm = markers_frame(*res["markers"], cm)
+    with timed(stats, "write_markers"):
+        if nrows(dfm):
+            rank = {n: r for r, n in enumerate(sorted(set(cm["names"])))}  # Python-Stringordnung (NumPy-U kappt NULs)
+            code = np.array([rank[n] for n in cm["names"]], dtype=np.int64)[res["markers"][0]]
+            write_csv(out/"markers.csv", take(dfm, np.lexsort((dfm["offset"], code))))
+        (out/"markers.json").write_text(markers_json(dfm), encoding="utf-8")
 
     # Entropy windows + segments
-    dfw, segs = segment_entropy(b, 4096)
-    dfw.to_csv(out/"entropy_windows_4k.csv", index=False)
-    segs.to_csv(out/"segments.csv", index=False)
+    with timed(stats, "segments"):
+        dfw, segs = entropy_segments(*res["entropy"])
+        write_csv(out/"entropy_windows_4k.csv", dfw)
+        write_csv(out/"segments.csv", segs)
 
     # Histogram
-    byte_histogram_png(u8, out/"byte_histogram.png")
+    if not args.no_plots:
+        with timed(stats, "histogram_plot"): byte_histogram_png(res["histogram"], out/"byte_histogram.png")
+    for k, v in (("ascii_strings", len(asc)), ("utf16le_strings", len(u16)), ("markers", nrows(dfm)), ("segments", nrows(segs))):
+        count(stats, k, v)
+    stats["timings_s"]["total"] = round(time.perf_counter() - t0, 4)
 
     # Summary JSON
     summary = {
-        "input": p.name,
-        "size_bytes": len(b),
+        "input": dump_name(p),
+        "size_bytes": res["size"],
+        "sha256": res["sha256"],
         "strings": {"ascii_count": len(asc), "utf16le_count": len(u16)},
-        "markers_count": 0 if dfm is None or dfm.empty else int(len(dfm)),
-        "segments": {"count": 0 if segs is None or segs.empty else int(len(segs))},
+        "markers_count": nrows(dfm),
+        "segments": {"count": nrows(segs)},
         "artifacts": {
             "strings_ascii": str((out/"strings_ascii.txt").as_posix()),
             "strings_utf16le": str((out/"strings_utf16le.txt").as_posix()),
+            "strings_csv": str((out/"strings.csv").as_posix()),
             "markers_csv": str((out/"markers.csv").as_posix()),
             "markers_json": str((out/"markers.json").as_posix()),
             "entropy_windows_csv": str((out/"entropy_windows_4k.csv").as_posix()),
             "segments_csv": str((out/"segments.csv").as_posix()),
-            "byte_histogram_png": str((out/"byte_histogram.png").as_posix())
-        }
+            "byte_histogram_png": None if args.no_plots else str((out/"byte_histogram.png").as_posix())
+        },
+        "instrumentation": stats
     }
     (out/"re_summary.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
     print(json.dumps({"ok": True, "summary_path": str(out/"re_summary.json")}))
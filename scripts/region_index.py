@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Regions-Index für Annotationen (evaluate_deepseek_reports.py, hex_visualize_annotations.py)
+- Regionen als halboffene Intervalle [start, end); Report-Format (start_addr/end_addr inklusiv, hex) via parse_regions
+- Index = nach (start, end) sortierte Arrays + Präfix-Maximum der Enden -> Bereichsabfragen per searchsorted,
+  Überlappungen/Abdeckung in einem vektorisierten Durchlauf: O(n log n) statt O(Summe der Bytes)
+- build_index/insert (Bulk), clip_index (auf Dumpgröße), overlap_count, coverage, query_point/query_range, to_list
+- overlaps: viele Intervalle auf einmal gegen sortierte, disjunkte Bereiche (incremental.py, bin_diff.py)
+"""
+import numpy as np
+
+def parse_regions(regions):
+    """[{"start_addr": "0x..", "end_addr": "0x.." (inklusiv), "label": ..}] -> ([(start, end_excl, label)], unlesbare)"""
+    out, bad = [], 0
+    for r in regions or []:
+        try:
+            out.append((int(r["start_addr"], 16), int(r["end_addr"], 16) + 1, str(r.get("label", "region"))))
+        except Exception:
+            bad += 1
+    return out, bad
+
+def build_index(regions, size=None) -> dict:
+    """regions: Iterable (start, end_excl, label); size: optional auf [0, size) klippen (leere Regionen entfallen)."""
+    regions = list(regions)
+    start = np.array([r[0] for r in regions], dtype=np.int64)
+    end = np.array([r[1] for r in regions], dtype=np.int64)
+    labels = [r[2] if len(r) > 2 else "region" for r in regions]
+    if size is not None:
+        start = np.maximum(start, 0); end = np.minimum(end, size)
+        keep = np.flatnonzero(start < end)
+        start, end, labels = start[keep], end[keep], [labels[i] for i in keep.tolist()]
+    order = np.lexsort((end, start))
+    start, end = start[order], end[order]
+    return {"start": start, "end": end, "labels": [labels[i] for i in order.tolist()],
+            "maxend": np.maximum.accumulate(end) if end.size else end, "size": size}
+
+def insert(idx: dict, regions) -> dict:
+    """Bulk-Insert: neue Regionen zusammen mit den vorhandenen neu sortieren."""
+    old = zip(idx["start"].tolist(), idx["end"].tolist(), idx["labels"])
+    return build_index([*old, *regions], idx["size"])
+
+def clip_index(idx: dict, size: int) -> dict:
+    return build_index(zip(idx["start"].tolist(), idx["end"].tolist(), idx["labels"]), size)
+
+def overlap_count(idx: dict) -> int:
+    """Regionen, die vor dem Ende einer früheren (nach start sortiert) beginnen."""
+    s, m = idx["start"], idx["maxend"]
+    return int(np.count_nonzero(s[1:] < m[:-1])) if s.size else 0
+
+def coverage(idx: dict) -> int:
+    """Bytes in der Vereinigung aller (nicht leeren) Regionen."""
+    keep = idx["end"] > idx["start"]
+    s, e = idx["start"][keep], idx["end"][keep]
+    if s.size == 0: return 0
+    m = np.maximum.accumulate(e)
+    new = np.r_[True, s[1:] > m[:-1]]  # neue Gruppe, wenn der Start hinter allen bisherigen Enden liegt
+    g = np.flatnonzero(new)
+    return int((np.maximum.reduceat(e, g) - s[g]).sum())
+
+def query_range(idx: dict, lo: int, hi: int) -> np.ndarray:
+    """Indizes (Index-Reihenfolge) aller Regionen, die [lo, hi) schneiden."""
+    a = int(np.searchsorted(idx["start"], hi, "left"))      # start < hi
+    b = int(np.searchsorted(idx["maxend"][:a], lo, "right"))  # davor enden alle <= lo
+    k = np.arange(b, a)
+    return k[idx["end"][k] > lo]
+
+def query_point(idx: dict, pos: int) -> np.ndarray:
+    return query_range(idx, pos, pos + 1)
+
+def to_list(idx: dict):
+    """-> [[start, end_excl, label], ...] in Index-Reihenfolge (z.B. für den HTML-Viewer)"""
+    return [[s, e, l] for s, e, l in zip(idx["start"].tolist(), idx["end"].tolist(), idx["labels"])]
+
+def overlaps(lo, hi, rlo, rhi) -> np.ndarray:
+    """Bool-Maske: [lo, hi) schneidet einen der Bereiche [rlo, rhi) (sortiert, disjunkt)."""
+    lo = np.asarray(lo); hi = np.asarray(hi)
+    if rlo.size == 0: return np.zeros(lo.shape, dtype=bool)
+    k = np.searchsorted(rhi, lo, "right")  # erster Bereich, der nach lo endet
+    return (k < rlo.size) & (rlo[np.minimum(k, rlo.size - 1)] < hi)
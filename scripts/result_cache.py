@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Content-addressed Ergebnis-Cache für die Analyzer
+- Schlüssel: SHA-256 des Dumps + Hash der Analyse-Parameter + Tool-Version
+- Eintrag: <root>/<key>/ mit Artefakten (CSV/PNG) + meta.json ({"files": gespeicherte Artefakte, "meta": ...})
+- LRU: Treffer aktualisieren die mtime von meta.json; Einträge größer als max_bytes werden gar nicht erst gespeichert
+- Größe: laufende Summe in <root>/.size (put addiert, Räumen schreibt sie neu); gescannt wird nur, wenn die Summe
+  max_bytes übersteigt oder fehlt, dann in einem Durchgang bis LOW_WATER * max_bytes (ohne den neuen Eintrag)
+  -> put bleibt O(1) statt jedes Mal alle Einträge zu stat'en
+- .size-Updates unter flock auf <root>/.lock (ohne fcntl, z.B. Windows, ungeschützt; Abweichungen korrigiert der
+  nächste Räum-Scan)
+- Fehlt ein gespeichertes Artefakt (z.B. parallel geräumt), zählt der Eintrag als Fehlschlag statt Teil-Treffer
+- Schreiben atomar (tmp-Verzeichnis + rename), parallele Worker dürfen denselben Schlüssel liefern
+"""
+import hashlib, json, os, shutil, uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+DEFAULT_DIR = os.getenv("ECULIBRE_CACHE_DIR", ".cache/eculibre")
+DEFAULT_MAX_MB = int(os.getenv("ECULIBRE_CACHE_MAX_MB", "2048"))
+LOW_WATER = 0.9  # Räumen schafft Luft für die nächsten puts, statt bei jedem wieder knapp über die Grenze zu scannen
+
+def cache_key(content_sha256: str, params: dict, version: str) -> str:
+    ph = hashlib.sha256(json.dumps({"version": version, **params}, sort_keys=True).encode()).hexdigest()[:16]
+    return f"{content_sha256}-{ph}"
+
+def cache_get(root, key):
+    """-> (entry_dir, meta) oder None; Treffer zählen als Zugriff (LRU). Unvollständige Einträge -> None."""
+    entry = Path(root) / key; meta = entry / "meta.json"
+    try:
+        obj = json.loads(meta.read_text(encoding="utf-8"))
+        if not all((entry / n).is_file() for n in obj["files"]): return None
+        os.utime(meta)
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return entry, obj["meta"]
+
+def cache_materialize(entry: Path, out_dir: Path, names) -> bool:
+    """Gespeicherte Artefakte aus names nach out_dir kopieren; False, wenn eines inzwischen fehlt."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        stored = set(json.loads((entry / "meta.json").read_text(encoding="utf-8"))["files"])
+        for n in names:
+            if n in stored: shutil.copyfile(entry / n, out_dir / n)
+    except (OSError, ValueError, KeyError):
+        return False
+    return True
+
+@contextmanager
+def _locked(root: Path):
+    if fcntl is None:
+        yield; return
+    with open(root / ".lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def _dir_size(d: Path) -> int:
+    return sum(f.stat().st_size for f in d.iterdir())
+
+def _read_size(root: Path):
+    try:
+        return int((root / ".size").read_text(encoding="ascii"))
+    except (OSError, ValueError):
+        return None
+
+def _write_size(root: Path, total: int):
+    tmp = root / f".size-{uuid.uuid4().hex[:8]}"
+    tmp.write_text(str(max(0, total)), encoding="ascii"); os.replace(tmp, root / ".size")
+
+def _add_size(root: Path, delta: int):
+    with _locked(root):
+        total = _read_size(root)
+        if total is not None: _write_size(root, total + delta)  # fehlt -> nächstes cache_trim scannt
+
+def cache_put(root, key, files, meta: dict, max_bytes=DEFAULT_MAX_MB << 20) -> bool:
+    """-> True, wenn der Eintrag (jetzt) im Cache liegt; Einträge über max_bytes werden nicht gespeichert.
+    max_bytes=None: nicht räumen, der Aufrufer ruft danach einmal cache_trim (z.B. nach einem ProcessPool)."""
+    root = Path(root); root.mkdir(parents=True, exist_ok=True)
+    if (root / key).exists():
+        if cache_get(root, key): return True
+        try:
+            _add_size(root, -_dir_size(root / key))
+        except OSError:
+            pass
+        shutil.rmtree(root / key, ignore_errors=True)  # unvollständig oder altes Format -> neu schreiben
+    files = [Path(f) for f in files if Path(f).is_file()]
+    if max_bytes is not None and sum(f.stat().st_size for f in files) > max_bytes: return False
+    tmp = root / f".tmp-{key}-{uuid.uuid4().hex[:8]}"
+    tmp.mkdir()
+    try:
+        for f in files: shutil.copyfile(f, tmp / f.name)
+        (tmp / "meta.json").write_text(json.dumps({"files": [f.name for f in files], "meta": meta}), encoding="utf-8")
+        size = _dir_size(tmp)
+        os.replace(tmp, root / key)
+        _add_size(root, size)
+    except OSError:
+        pass  # anderer Worker war schneller
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    if max_bytes is not None: cache_trim(root, max_bytes, keep=key)
+    return (root / key).exists()
+
+def cache_trim(root, max_bytes, keep=None) -> bool:
+    """Räumen nur, wenn die laufende Summe über max_bytes liegt (oder fehlt); dann einmal bis LOW_WATER * max_bytes.
+    -> True, wenn gescannt wurde."""
+    root = Path(root)
+    if not root.is_dir(): return False
+    with _locked(root):
+        total = _read_size(root)
+        if total is not None and total <= max_bytes: return False
+        _evict(root, int(max_bytes * LOW_WATER), keep)
+    return True
+
+def cache_evict(root, max_bytes, keep=None):
+    """Älteste Einträge (mtime von meta.json) löschen, bis die Gesamtgröße <= max_bytes ist; keep bleibt stehen.
+    Scannt immer alle Einträge und schreibt .size neu."""
+    with _locked(Path(root)):
+        _evict(Path(root), max_bytes, keep)
+
+def _evict(root: Path, max_bytes, keep):
+    entries = []; total = 0
+    for e in root.iterdir():
+        if e.name.startswith(".") or not e.is_dir(): continue
+        try:
+            size = _dir_size(e)
+            if e.name != keep: entries.append(((e / "meta.json").stat().st_mtime, size, e))
+            total += size
+        except OSError:
+            continue
+    for _, size, e in sorted(entries, key=lambda x: x[0]):
+        if total <= max_bytes: break
+        shutil.rmtree(e, ignore_errors=True); total -= size
+    _write_size(root, total)
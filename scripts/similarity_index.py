@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+Ähnlichkeits-Index über den Dump-Corpus (rawdata/<Marke>/<Modell>/<Generation>/<ECU>/<Firmware>, metadata.yml)
+- Fingerabdruck je Dump: Hash je 64-KiB-Block (exakt geteilte Blöcke, z.B. Kalibrier- oder Bootloader-Bereiche) und
+  MinHash-Signatur (128 Permutationen) über inhaltsdefinierte Chunks (Gear-Rolling-Hash, ~4 KiB, 1..16 KiB) ->
+  Einfügungen/Verschiebungen verändern nur die Chunks an der Stelle; einheitliche Bereiche (gelöscht 0xFF/0x00)
+  zählen weder als Chunk noch als Block
+- Gear-Hash vektorisiert: h_i = Summe g[b_(i-k)] << k (k < 32) per Präfix-Verdopplung in 5 NumPy-Durchläufen,
+  Schnittpunkte ohne Vorgänger im Mindestabstand, Zwangsschnitte nach 16 KiB
+- Index = Verzeichnis: files.json (Pfad, Größe, SHA-256, metadata.yml-Felder) + .npy-Arrays, per mmap geladen:
+  Signaturen, LSH-Bänder (32 x 4 Zeilen, sortierte Schlüssel) und sortierte Block-Hashes -> Abfrage per
+  searchsorted statt paarweisem Vergleich; Kandidaten nach geschätzter Jaccard-Ähnlichkeit + geteilten Blöcken
+- Neuaufbau übernimmt unveränderte Dateien (Pfad, Größe, mtime) aus dem alten Index; Schreiben atomar
+  (tmp-Verzeichnis + rename)
+
+Usage:
+  python similarity_index.py --build 'rawdata/**/*.bin' --index .cache/simindex [--jobs 4]
+  python similarity_index.py --query new_dump.bin --index .cache/simindex [--top 10]
+"""
+import argparse, glob, hashlib, json, os, shutil, sys, time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import numpy as np
+from bin_loader import CHUNK, DUMP_SUFFIXES, load_bin
+
+VERSION = 1
+BLOCK = 64 * 1024
+PERMS, BANDS = 128, 32               # 32 Bänder à 4 Zeilen: Kandidat ab ~0.4 Jaccard mit hoher Wahrscheinlichkeit
+GEAR_W = 32                          # Fensterbreite des Gear-Hashs (uint32)
+CUT_MASK = np.uint32(0xFFF00000)     # 12 Bit -> Schnitt im Mittel alle 4 KiB
+MIN_CHUNK, MAX_CHUNK = 1024, 16 * 1024
+META_FIELDS = ("brand", "model", "generation", "ecu_vendor", "ecu_model", "firmware", "region")
+
+_rng = np.random.default_rng(0x5EED)
+GEAR = _rng.integers(0, 1 << 32, size=256, dtype=np.uint64).astype(np.uint32)
+PERM_A = _rng.integers(0, 1 << 63, size=PERMS, dtype=np.uint64) * np.uint64(2) + np.uint64(1)  # ungerade
+PERM_B = _rng.integers(0, 1 << 63, size=PERMS, dtype=np.uint64)
+FILES, ARRAYS = "files.json", ("sigs", "lsh_keys", "lsh_files", "block_hashes", "block_files", "block_nos")
+
+def _h64(mv) -> int:
+    return int.from_bytes(hashlib.blake2b(mv, digest_size=8).digest(), "little")
+
+def gear_candidates(buf: np.ndarray) -> np.ndarray:
+    """Positionen p, an denen (h_p & CUT_MASK) == 0; Chunkgrenze liegt hinter p. Stückweise mit Überlappung."""
+    out = []
+    for s in range(0, buf.size, CHUNK):
+        lo = max(s - (GEAR_W - 1), 0); h = GEAR[buf[lo:s + CHUNK]]
+        w = 1
+        while w < GEAR_W:  # h deckt danach 2w Bytes ab
+            t = h.copy(); t[w:] += h[:-w] << np.uint32(w); h = t; w *= 2
+        out.append(np.flatnonzero((h[s - lo:] & CUT_MASK) == 0) + s)
+    p = np.concatenate(out) if out else np.empty(0, np.int64)
+    return p[p >= GEAR_W - 1]
+
+def chunk_bounds(buf: np.ndarray) -> np.ndarray:
+    """Chunk-Enden (exklusiv, letztes = Größe): Kandidaten ohne Vorgänger näher als MIN_CHUNK, dann Zwangsschnitte
+    in Lücken > MAX_CHUNK."""
+    n = buf.size
+    if n == 0: return np.empty(0, np.int64)
+    c = gear_candidates(buf) + 1
+    c = c[np.r_[True, np.diff(c) >= MIN_CHUNK]] if c.size else c
+    c = c[(c >= MIN_CHUNK) & (c < n)]
+    ends = np.r_[c, n].astype(np.int64); starts = np.r_[0, ends[:-1]]
+    k = (ends - starts - 1) // MAX_CHUNK  # zusätzliche Schnitte je Lücke
+    forced = np.repeat(starts, k) + MAX_CHUNK * (np.arange(k.sum()) - np.repeat(np.cumsum(k) - k, k) + 1)
+    return np.sort(np.r_[ends, forced])
+
+def _uniform(buf: np.ndarray, starts, ends) -> np.ndarray:
+    """Bool je Bereich: alle Bytes gleich"""
+    brk = np.flatnonzero(buf[1:] != buf[:-1]) + 1  # Positionen, an denen sich das Byte ändert
+    return np.searchsorted(brk, ends, "left") == np.searchsorted(brk, starts, "right")
+
+def minhash(hashes: np.ndarray) -> np.ndarray:
+    """uint64-Menge -> PERMS x uint32 (obere 32 Bit von a*x+b mod 2^64, Minimum); leere Menge -> alles 0xFFFFFFFF"""
+    sig = np.full(PERMS, 0xFFFFFFFF, dtype=np.uint64)
+    for s in range(0, hashes.size, 4096):
+        x = hashes[s:s + 4096, None]
+        sig = np.minimum(sig, ((x * PERM_A + PERM_B) >> np.uint64(32)).min(axis=0))
+    return sig.astype(np.uint32)
+
+def band_keys(sigs: np.ndarray) -> np.ndarray:
+    """n x PERMS Signaturen -> n x BANDS uint64-Schlüssel (Band-Nummer eingemischt)"""
+    rows = sigs.reshape(len(sigs), BANDS, PERMS // BANDS).astype(np.uint64)
+    k = np.broadcast_to(np.arange(BANDS, dtype=np.uint64), rows.shape[:2]).copy()
+    for r in range(rows.shape[2]):
+        k = k * np.uint64(0x100000001B3) ^ rows[:, :, r]
+    return k
+
+def fingerprint(data) -> dict:
+    buf = np.frombuffer(data, dtype=np.uint8); mv = memoryview(data)
+    ends = chunk_bounds(buf); starts = np.r_[0, ends[:-1]].astype(np.int64)
+    keep = ~_uniform(buf, starts, ends)
+    ch = np.unique(np.array([_h64(mv[a:b]) for a, b in zip(starts[keep].tolist(), ends[keep].tolist())], dtype=np.uint64))
+    bs = np.arange(0, buf.size, BLOCK, dtype=np.int64); be = np.minimum(bs + BLOCK, buf.size)
+    bkeep = np.flatnonzero(~_uniform(buf, bs, be)) if bs.size else bs
+    blocks = np.array([_h64(mv[bs[i]:be[i]]) for i in bkeep.tolist()], dtype=np.uint64)
+    return {"sig": minhash(ch), "chunks": int(ch.size), "blocks": blocks, "block_nos": bkeep.astype(np.int32),
+            "blocks_total": int(bs.size)}
+
+def read_metadata(path: Path, root: Path) -> dict:
+    """Nächste metadata.yml im Verzeichnis des Dumps oder darüber (bis root) -> META_FIELDS"""
+    for d in [path.parent, *path.parent.parents]:
+        m = d / "metadata.yml"
+        if m.is_file():
+            import yaml
+            try:
+                obj = yaml.safe_load(m.read_text(encoding="utf-8")) or {}
+            except Exception:
+                return {}
+            return {"metadata": m.as_posix(), **{k: str(obj[k]) for k in META_FIELDS if obj.get(k) is not None}}
+        if d == root or d == d.parent: break
+    return {}
+
+def index_one(path: str, root: str) -> dict:
+    p = Path(path)
+    try:
+        data = load_bin(p)
+        ent = {"path": p.as_posix(), "size": len(data), "sha256": hashlib.sha256(data).hexdigest(),
+               "mtime_ns": p.stat().st_mtime_ns, **fingerprint(data), "meta": read_metadata(p, Path(root))}
+        return ent
+    except Exception as e:
+        print(f"skip {path}: {e}", file=sys.stderr); return None
+
+def _glob_root(pattern: str) -> str:
+    """Verzeichnis vor dem ersten Platzhalter (Grenze der metadata.yml-Suche)"""
+    parts = Path(pattern).parts; k = next((i for i, s in enumerate(parts) if any(c in s for c in "*?[")), len(parts))
+    return str(Path(*parts[:k])) if k else "."
+
+def load_index(index) -> dict:
+    d = Path(index)
+    idx = json.loads((d / FILES).read_text(encoding="utf-8"))
+    for a in ARRAYS: idx[a] = np.load(d / f"{a}.npy", mmap_mode="r")
+    return idx
+
+def _previous(index) -> dict:
+    """path -> Eintrag aus einem vorhandenen Index (gleiche Version), für unveränderte Dateien"""
+    try:
+        idx = load_index(index)
+    except (OSError, ValueError, KeyError):
+        return {}
+    if idx.get("version") != VERSION: return {}
+    order = np.argsort(idx["block_files"], kind="stable"); bf = idx["block_files"][order]
+    out = {}
+    for i, f in enumerate(idx["files"]):
+        a, b = np.searchsorted(bf, i, "left"), np.searchsorted(bf, i, "right"); sel = order[a:b]
+        sel = sel[np.argsort(idx["block_nos"][sel], kind="stable")]
+        out[f["path"]] = {**f, "sig": np.array(idx["sigs"][i]), "blocks": np.array(idx["block_hashes"][sel]),
+                          "block_nos": np.array(idx["block_nos"][sel])}
+    return out
+
+def write_index(index, entries):
+    d = Path(index); tmp = d.with_name(f".{d.name}.tmp-{os.getpid()}"); old = d.with_name(f".{d.name}.old-{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True); tmp.mkdir(parents=True)
+    sigs = np.array([e["sig"] for e in entries], dtype=np.uint32).reshape(len(entries), PERMS)
+    live = np.flatnonzero([e["chunks"] > 0 for e in entries])  # nur Dumps mit Inhalt in die Bänder
+    keys = band_keys(sigs[live]); lf = np.repeat(live, BANDS).astype(np.int32); keys = keys.ravel()
+    o = np.argsort(keys, kind="stable")
+    bh = np.concatenate([e["blocks"] for e in entries] or [np.empty(0, np.uint64)]).astype(np.uint64)
+    bf = np.repeat(np.arange(len(entries), dtype=np.int32), [len(e["blocks"]) for e in entries])
+    bn = np.concatenate([e["block_nos"] for e in entries] or [np.empty(0, np.int32)]).astype(np.int32)
+    ob = np.argsort(bh, kind="stable")
+    for name, arr in (("sigs", sigs), ("lsh_keys", keys[o]), ("lsh_files", lf[o]),
+                      ("block_hashes", bh[ob]), ("block_files", bf[ob]), ("block_nos", bn[ob])):
+        np.save(tmp / f"{name}.npy", arr)
+    files = [{k: v for k, v in e.items() if k not in ("sig", "blocks", "block_nos")} for e in entries]
+    params = {"block": BLOCK, "perms": PERMS, "bands": BANDS, "min_chunk": MIN_CHUNK, "max_chunk": MAX_CHUNK}
+    (tmp / FILES).write_text(json.dumps({"version": VERSION, "params": params, "files": files}), encoding="utf-8")
+    if d.exists(): d.rename(old)
+    tmp.rename(d); shutil.rmtree(old, ignore_errors=True)
+
+def build(pattern: str, index, jobs: int) -> dict:
+    paths = sorted(p for p in glob.glob(pattern, recursive=True)
+                   if Path(p).is_file() and p.lower().endswith(DUMP_SUFFIXES))
+    prev = _previous(index); root = _glob_root(pattern); entries, todo = {}, []
+    for p in paths:
+        e = prev.get(Path(p).as_posix()); st = Path(p).stat()
+        if e and e["mtime_ns"] == st.st_mtime_ns and e["size"] == st.st_size: entries[p] = e
+        else: todo.append(p)
+    if jobs == 1 or len(todo) < 2:
+        new = [index_one(p, root) for p in todo]
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(todo))) as ex:
+            new = list(ex.map(index_one, todo, [root] * len(todo)))
+    entries.update((p, e) for p, e in zip(todo, new) if e is not None)
+    write_index(index, [entries[p] for p in paths if p in entries])
+    return {"files": len(entries), "indexed": sum(e is not None for e in new), "reused": len(paths) - len(todo),
+            "failed": sum(e is None for e in new), "index": str(index)}
+
+def query(fp: dict, sha: str, idx, top: int = 10, max_pairs: int = 8) -> list:
+    """Nächste Verwandte eines Fingerabdrucks: LSH-Kandidaten (mindestens ein gleiches Band) und Dumps mit gemeinsamen
+    64-KiB-Blöcken; Rang nach geschätzter Jaccard-Ähnlichkeit, dann geteilten Blöcken."""
+    files = idx["files"]; cand = {}
+    if fp["chunks"]:
+        q = band_keys(fp["sig"][None, :])[0]; keys = idx["lsh_keys"]
+        lo, hi = np.searchsorted(keys, q, "left"), np.searchsorted(keys, q, "right")
+        for a, b in zip(lo.tolist(), hi.tolist()):
+            for f in idx["lsh_files"][a:b].tolist(): cand.setdefault(f, [])
+    bh = idx["block_hashes"]
+    lo, hi = np.searchsorted(bh, fp["blocks"], "left"), np.searchsorted(bh, fp["blocks"], "right")
+    for qn, a, b in zip(fp["block_nos"].tolist(), lo.tolist(), hi.tolist()):
+        for f, n in zip(idx["block_files"][a:b].tolist(), idx["block_nos"][a:b].tolist()): cand.setdefault(f, []).append((qn, n))
+    if not cand: return []
+    ids = np.array(sorted(cand), dtype=np.int64)
+    jac = (np.asarray(idx["sigs"][ids]) == fp["sig"]).mean(axis=1) if fp["chunks"] else np.zeros(ids.size)
+    out = []
+    for i, j in zip(ids.tolist(), jac.tolist()):
+        f = files[i]; pairs = sorted(cand[i])
+        out.append({"path": f["path"], "identical": f["sha256"] == sha, "jaccard_est": round(j, 4),
+                    "shared_blocks": len({n for _, n in pairs}), "blocks": f["blocks_total"], "meta": f["meta"],
+                    "block_pairs": [[f"0x{a * BLOCK:X}", f"0x{b * BLOCK:X}"] for a, b in pairs[:max_pairs]]})
+    out.sort(key=lambda r: (-r["identical"], -r["jaccard_est"], -r["shared_blocks"], r["path"]))
+    return out[:top]
+
+def main():
+    ap = argparse.ArgumentParser(description="MinHash/LSH-Ähnlichkeitsindex über Dumps")
+    g = ap.add_mutually_exclusive_group(required=True)
+    g.add_argument("--build", metavar="GLOB", help="Dumps indizieren, z.B. 'rawdata/**/*.bin' (auch .gz/.xz/.zst/.zip)")
+    g.add_argument("--query", metavar="DUMP", help="Nächste Verwandte dieses Dumps im Index")
+    ap.add_argument("--index", default=".cache/simindex", help="Index-Verzeichnis")
+    ap.add_argument("--jobs", type=int, default=0, help="Worker-Prozesse beim Aufbau (Default: CPU-Anzahl)")
+    ap.add_argument("--top", type=int, default=10)
+    args = ap.parse_args()
+    if args.build:
+        print(json.dumps(build(args.build, args.index, args.jobs or os.cpu_count() or 1), indent=2)); return 0
+    t0 = time.perf_counter(); idx = load_index(args.index); t1 = time.perf_counter()
+    data = load_bin(args.query); fp = fingerprint(data); t2 = time.perf_counter()
+    res = query(fp, hashlib.sha256(data).hexdigest(), idx, args.top); t3 = time.perf_counter()
+    print(json.dumps({"query": args.query, "size": len(data), "indexed_files": len(idx["files"]),
+                      "timings_s": {"load_index": round(t1 - t0, 4), "fingerprint": round(t2 - t1, 4),
+                                    "lookup": round(t3 - t2, 4)},
+                      "results": res}, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
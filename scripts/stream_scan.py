@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming-Durchlauf für die sequentiellen Stufen (re_scan.py): SHA-256, Byte-Histogramm, Entropie-Fenster,
+ASCII-/UTF-16LE-Strings, Marker - ein Durchlauf über iter_dump-Stücke, Speicher ~ Stückgröße
+- je Stufe ein Übertrag über Stückgrenzen: Entropie ab dem nächsten noch unvollständigen Fenster, Strings ab dem
+  letzten nicht druckbaren Zeichen (UTF-16LE in 2-Byte-Einheiten), Marker die letzten (längstes Pattern - 1) Bytes
+- Ergebnisse identisch zu den Einzelstufen auf dem ganzen Dump (window_entropy, ascii_strings/utf16le_strings,
+  scan_markers inkl. Sortierung nach Pattern, Offset)
+- optional stats (instrument.py): Zeit je Stufe über alle Stücke summiert (read = Lesen/Entpacken), Stückzähler
+"""
+import hashlib
+import numpy as np
+from entropy_engine import window_entropy
+from instrument import count, timed
+from marker_scan import scan_markers
+from string_scan import ascii_strings, utf16le_strings
+
+def _entropy_step(st, window, stride, final):
+    buf = st["buf"]; n = len(buf)
+    if final: k = -(-n // stride)  # restliche Fenster, letzte ggf. kürzer
+    else: k = 0 if n < window else (n - window) // stride + 1  # nur vollständige Fenster
+    if not k: return
+    off, length, ent = window_entropy(bytes(buf[:n if final else (k - 1) * stride + window]), window, stride)
+    st["off"].append(off[:k] + st["pos"]); st["len"].append(length[:k]); st["H"].append(ent[:k])
+    del buf[:min(n, k * stride)]; st["pos"] += k * stride
+
+def _strings_step(st, unit, final):
+    buf = st["buf"]
+    if final:
+        cut = len(buf)
+    else:
+        dt = "<u1" if unit == 1 else "<u2"
+        v = np.frombuffer(bytes(buf[:len(buf) - len(buf) % unit]), dtype=dt)
+        stop = np.flatnonzero((v < 32) | (v >= 127))  # Läufe bis hierhin sind abgeschlossen
+        if not stop.size: return
+        cut = int(stop[-1] + 1) * unit
+    fn = ascii_strings if unit == 1 else utf16le_strings
+    st["out"] += [(st["pos"] + o, t) for o, t in fn(bytes(buf[:cut]), st["minlen"])]
+    del buf[:cut]; st["pos"] += cut
+
+def _marker_step(st, cm, final):
+    buf = st["buf"]
+    keep = len(buf) if final else len(buf) - (st["P"] - 1)  # Treffer müssen vor keep beginnen
+    if keep <= 0: return
+    pidx, offs = scan_markers(bytes(buf), cm)
+    sel = offs < keep
+    st["p"].append(pidx[sel]); st["o"].append(offs[sel] + st["pos"])
+    del buf[:keep]; st["pos"] += keep
+
+def stream_scan(chunks, window=4096, stride=None, cm=None, minlen=4, stats=None) -> dict:
+    """chunks: Iterable von bytes (z.B. bin_loader.iter_dump) ->
+    {"size", "sha256", "histogram", "entropy": (offsets, lengths, H), "ascii", "utf16le", "markers": (pattern_index, offset)}"""
+    stride = stride or window
+    sha = hashlib.sha256(); hist = np.zeros(256, dtype=np.int64); size = 0
+    ent = {"buf": bytearray(), "pos": 0, "off": [], "len": [], "H": []}
+    asc = {"buf": bytearray(), "pos": 0, "out": [], "minlen": minlen}
+    u16 = {"buf": bytearray(), "pos": 0, "out": [], "minlen": minlen}
+    mk = {"buf": bytearray(), "pos": 0, "p": [], "o": [], "P": max(len(p) for p in cm["patterns"])} if cm else None
+    it = iter(chunks)
+    while True:
+        with timed(stats, "read"): chunk = next(it, None)
+        if chunk is None: break
+        count(stats, "chunks")
+        with timed(stats, "hash_histogram"):
+            size += len(chunk); sha.update(chunk)
+            hist += np.bincount(np.frombuffer(chunk, dtype=np.uint8), minlength=256)
+        for st in (ent, asc, u16, mk):
+            if st is not None: st["buf"] += chunk
+        with timed(stats, "entropy"): _entropy_step(ent, window, stride, False)
+        with timed(stats, "strings"): _strings_step(asc, 1, False); _strings_step(u16, 2, False)
+        if mk:
+            with timed(stats, "markers"): _marker_step(mk, cm, False)
+    with timed(stats, "entropy"): _entropy_step(ent, window, stride, True)
+    with timed(stats, "strings"): _strings_step(asc, 1, True); _strings_step(u16, 2, True)
+    if mk:
+        with timed(stats, "markers"): _marker_step(mk, cm, True)
+    cat = lambda xs, dt: np.concatenate(xs) if xs else np.empty(0, dt)
+    markers = (np.empty(0, np.int64), np.empty(0, np.int64))
+    if mk:
+        p, o = cat(mk["p"], np.int64), cat(mk["o"], np.int64); order = np.lexsort((o, p)); markers = (p[order], o[order])
+    return {"size": size, "sha256": sha.hexdigest(), "histogram": hist,
+            "entropy": (cat(ent["off"], np.int64), cat(ent["len"], np.int64), cat(ent["H"], np.float64)),
+            "ascii": asc["out"], "utf16le": u16["out"], "markers": markers}
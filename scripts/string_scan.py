@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""
+String-Extraktion (gemeinsam für re_scan.py und tools/mapviz.py)
+- ASCII (0x20..0x7E) und UTF-16LE (2-Byte-Einheiten ab geraden Offsets)
+- Druckbare Läufe per NumPy-Maske + Lauf-Grenzen (flatnonzero), kein Python-Loop pro Byte
+- Ergebnis: Liste von (offset, text), offset in Bytes ab Dateianfang
+"""
+import numpy as np
+
+def printable_runs(mask: np.ndarray, minlen=4):
+    """Start/Ende (exklusiv) aller True-Läufe mit Länge >= minlen, in Element-Indizes."""
+    if mask.size == 0: return np.empty(0, np.int64), np.empty(0, np.int64)
+    edges = np.flatnonzero(np.diff(mask.astype(np.int8), prepend=0, append=0))
+    starts, ends = edges[0::2], edges[1::2]
+    keep = (ends - starts) >= minlen
+    return starts[keep], ends[keep]
+
+def ascii_strings(b, minlen=4, limit=None):
+    u8 = np.frombuffer(b, dtype=np.uint8)
+    starts, ends = printable_runs((u8 >= 32) & (u8 < 127), minlen)
+    if limit is not None: starts, ends = starts[:limit], ends[:limit]
+    mv = memoryview(b)
+    return [(int(s), mv[s:e].tobytes().decode("ascii")) for s, e in zip(starts.tolist(), ends.tolist())]
+
+def utf16le_strings(b, minlen=4, limit=None):
+    mv = memoryview(b)
+    u16 = np.frombuffer(mv[:len(mv) - (len(mv) % 2)], dtype="<u2")
+    starts, ends = printable_runs((u16 >= 32) & (u16 < 127), minlen)
+    if limit is not None: starts, ends = starts[:limit], ends[:limit]
+    return [(2 * s, mv[2 * s:2 * e].tobytes().decode("utf-16-le")) for s, e in zip(starts.tolist(), ends.tolist())]
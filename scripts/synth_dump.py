@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Deterministische synthetische ECU-Dumps (für benchmark.py; teilbar statt echter Dumps aus rawdata/)
+- je MiB: Code-ähnlicher Bereich (schiefe Byte-Verteilung, dazwischen ASCII-/UTF-16LE-Kennungen wie BOSCH/MG1/UDS),
+  Kalibrierbereich (kleine int16-Werte) mit eingebetteten Maps, Rest gelöscht (0xFF)
+- Maps an bekannten Offsets: Trennwort 0x7FFF7FFF, streng steigende Achse(n), direkt dahinter die Matrix (Gap 0,
+  glatte int16-Werte unterhalb der Achsenwerte -> Läufe brechen an den Grenzen); 2D mit int16- oder float32-Achse,
+  3D mit zwei int16-Achsen
+- planted: Maps mit Offsets/Form/Werten -> recall() gegen maps_summary-Spalten (map_search) und Vergleich für
+  mapviz.extract_maps
+
+Usage:
+  python synth_dump.py --size-mib 8 --out synth_8m.bin [--seed 1]   # + synth_8m.planted.json
+"""
+import argparse, json, sys
+from pathlib import Path
+import numpy as np
+
+MIB = 1 << 20
+CODE, CAL = 448 << 10, 192 << 10  # je MiB: Code, Kalibrierung, Rest gelöscht
+MAPS_PER_MIB = 48
+KINDS = ["2D", "3D", "2D_f32"]
+IDENTS = [b"BOSCH", b"MG1CS003", b"MED17.2", b"UDS", b"XCP", b"CBOOT", b"SWFL_00001234", b"TRICORE", b"FLASH"]
+SEP = np.array([0x7FFF, 0x7FFF], "<i2").tobytes()  # int16: über jeder Achse, float32: NaN
+
+def _code(rng, n: int) -> np.ndarray:
+    w = 1.0 / np.arange(1, 257) ** 0.8
+    buf = rng.permutation(256).astype(np.uint8)[rng.choice(256, size=n, p=w / w.sum())]
+    for k, pos in enumerate(rng.integers(0, max(1, n - 64), size=max(1, n // 16384)).tolist()):
+        s = IDENTS[k % len(IDENTS)] + b"_" + str(pos).encode()
+        if k % 3 == 2: s = s.decode("ascii").encode("utf-16-le")
+        buf[pos:pos + len(s)] = np.frombuffer(s, dtype=np.uint8)
+    return buf
+
+def _axis(rng, n: int, f32=False) -> np.ndarray:
+    if f32: return np.cumsum(rng.uniform(0.5, 25.0, size=n)).astype("<f4")
+    return (1000 + np.cumsum(rng.integers(5, 200, size=n))).astype("<i2")
+
+def _map(rng, kind: str):
+    """-> (Bytes ab dem Trennwort, Eintrag mit Offsets relativ dazu)"""
+    parts = [SEP]; pos = len(SEP)
+    if kind == "3D":
+        dims = [int(x) for x in rng.integers(8, 17, size=2)]; ent = {"type": "3D"}
+        for k, n in zip(("axis1", "axis2"), dims):
+            ax = _axis(rng, n); ent[f"{k}_offset"], ent[f"{k}_dtype"] = pos, "int16_le"
+            parts.append(ax.tobytes()); pos += ax.nbytes
+        rows, cols = dims
+    else:
+        n = int(rng.integers(8, 33)); ax = _axis(rng, n, kind == "2D_f32")
+        ent = {"type": "2D", "axis_offset": pos, "axis_dtype": "float32_le" if ax.dtype.kind == "f" else "int16_le"}
+        parts.append(ax.tobytes()); pos += ax.nbytes; rows, cols = 1, n
+    y, x = np.mgrid[0:rows, 0:cols]
+    z = rng.integers(0, 200) + x * rng.integers(1, 20) + y * rng.integers(1, 20) + rng.integers(0, 3, size=(rows, cols))
+    z = np.minimum(z, 999).astype("<i2")  # unter jeder Achse (>= 1005)
+    ent.update(data_offset=pos, shape=[rows, cols] if kind == "3D" else [cols], values=z.tolist())
+    parts.append(z.tobytes())
+    return b"".join(parts), ent
+
+def synth_dump(size: int, seed: int = 1):
+    """-> (bytes, planted); gleiche (size, seed) -> gleiche Bytes"""
+    rng = np.random.default_rng(seed)
+    out = np.full(size, 0xFF, dtype=np.uint8); planted = []
+    for base in range(0, size, MIB):
+        n = min(MIB, size - base); c = min(CODE, n)
+        out[base:base + c] = _code(rng, c)
+        lo, hi = base + c, base + min(CODE + CAL, n)
+        if hi - lo < 4096: continue
+        out[lo:hi] = rng.integers(0, 64, size=-(-(hi - lo) // 2)).astype("<i2").view(np.uint8)[:hi - lo]
+        step = (hi - lo) // MAPS_PER_MIB
+        for k in range(MAPS_PER_MIB):
+            blob, ent = _map(rng, KINDS[len(planted) % len(KINDS)])
+            at = lo + k * step; at += -at % 4  # float32-Achsen 4-Byte-aligned
+            if at + len(blob) > hi: break
+            out[at:at + len(blob)] = np.frombuffer(blob, dtype=np.uint8)
+            for key in ("axis_offset", "axis1_offset", "axis2_offset", "data_offset"):
+                if key in ent: ent[key] += at
+            planted.append(ent)
+    return out.tobytes(), planted
+
+OFFSET_KEYS = ("axis_offset", "axis1_offset", "axis2_offset", "data_offset")
+
+def recall(planted, maps: dict) -> dict:
+    """planted gegen maps_summary-Spalten (type + Offsets; fehlend/NaN = -1) -> je Typ {"planted", "found"}"""
+    keys = [k for k in OFFSET_KEYS if k in maps]
+    num = lambda v: -1 if v != v else int(v)
+    seen = set(zip(list(maps["type"]), *([num(v) for v in maps[k]] for k in keys))) if maps else set()
+    out = {}
+    for p in planted:
+        st = out.setdefault(p["type"], {"planted": 0, "found": 0})
+        st["planted"] += 1; st["found"] += (p["type"], *(p.get(k, -1) for k in keys)) in seen
+    return out
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--size-mib", type=int, default=2)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--out", required=True, help="Dump (.bin); daneben <stem>.planted.json")
+    a = ap.parse_args()
+    data, planted = synth_dump(a.size_mib * MIB, a.seed)
+    out = Path(a.out); out.parent.mkdir(parents=True, exist_ok=True); out.write_bytes(data)
+    out.with_suffix(".planted.json").write_text(json.dumps(planted), encoding="utf-8")
+    print(json.dumps({"bin": str(out), "size": len(data), "maps": len(planted)}))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
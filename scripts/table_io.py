@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Spalten-Tabellen ohne pandas (dict Spaltenname -> ndarray/Liste), für die Hot-Paths von analyze_med17/re_scan
+- write_csv: wie DataFrame.to_csv(index=False) (Floats per repr, NaN leer, Listen als "[..]"); raw= übernimmt
+  fertige Zeilen unverändert (inkrementelle Analyse)
+- concat_columns: wie pd.concat(ignore_index=True): Spalten in Reihenfolge des ersten Auftretens, fehlende Werte
+  NaN; Ganzzahl-Spalten, die nicht in allen Teilen vorkommen, werden float
+- take/records/nrows: Zeilen auswählen, Zeilen als dicts (Python-Skalare, wie to_dict(orient="records"))
+"""
+import csv, io, math, os
+import numpy as np
+
+def nrows(cols: dict) -> int:
+    return len(next(iter(cols.values()))) if cols else 0
+
+def _numeric(v) -> bool:
+    return isinstance(v, np.ndarray) and v.dtype.kind in "iuf"
+
+def concat_columns(parts) -> dict:
+    parts = [p for p in parts if nrows(p)]
+    names = list(dict.fromkeys(k for p in parts for k in p))
+    out = {}
+    for k in names:
+        have = [p[k] for p in parts if k in p]
+        if all(_numeric(v) for v in have):
+            full = len(have) == len(parts) and all(v.dtype.kind != "f" for v in have)
+            out[k] = np.concatenate([np.asarray(p[k], np.float64) if k in p else np.full(nrows(p), np.nan)
+                                     for p in parts] if not full else have)
+        else:
+            out[k] = [x for p in parts for x in (_items(p[k]) if k in p else [math.nan] * nrows(p))]
+    return out
+
+def _items(v) -> list:
+    return v.tolist() if isinstance(v, np.ndarray) else list(v)
+
+def take(cols: dict, idx) -> dict:
+    idx = np.asarray(idx, dtype=np.int64)
+    return {k: v[idx] if isinstance(v, np.ndarray) else [v[i] for i in idx.tolist()] for k, v in cols.items()}
+
+def records(cols: dict, n=None) -> list:
+    lists = {k: _items(v[:n] if n is not None else v) for k, v in cols.items()}
+    return [dict(zip(lists, row)) for row in zip(*lists.values())]
+
+def _csv_column(v) -> list:
+    """Werte als Liste, NaN -> "" (nur float-/Objekt-Spalten können NaN enthalten)"""
+    xs = _items(v)
+    if isinstance(v, np.ndarray) and v.dtype.kind != "O":
+        nan = np.flatnonzero(np.isnan(v)).tolist() if v.dtype.kind == "f" else []
+    else:
+        nan = [i for i, x in enumerate(xs) if isinstance(x, float) and math.isnan(x)]
+    for i in nan: xs[i] = ""
+    return xs
+
+def write_csv(path, cols: dict, raw=None):
+    """raw: optional je Zeile fertige CSV-Zeile (mit Zeilenende, z.B. aus einer früheren Ausgabe) oder None ->
+    nur die None-Zeilen werden aus cols formatiert"""
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        w = csv.writer(fh, lineterminator=os.linesep); w.writerow(list(cols))
+        if raw is None:
+            w.writerows(zip(*(_csv_column(v) for v in cols.values()))); return
+        buf = io.StringIO(newline="")
+        csv.writer(buf, lineterminator=os.linesep).writerows(
+            zip(*(_csv_column(v) for v in take(cols, [i for i, r in enumerate(raw) if r is None]).values())))
+        fmt = iter(buf.getvalue().splitlines(keepends=True))
+        fh.writelines(r if r is not None else next(fmt) for r in raw)
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+"""Gemeinsame Fixtures: scripts/ und tools/ importierbar, deterministische synthetische Dumps (synth_dump.py)"""
+import sys
+from pathlib import Path
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT / "scripts"), str(ROOT / "tools")]
+
+from synth_dump import MIB, synth_dump  # noqa: E402
+
+@pytest.fixture(scope="session")
+def synth():
+    """(bytes, planted) eines 2-MiB-Dumps"""
+    return synth_dump(2 * MIB, seed=1)
+
+BMW = ROOT / "rawdata" / "BMW" / "BMW_4-serie_2013_(F32-F33-F36)_40i_326_hp_Bosch_MG1CS003_OBD_VR.bin"
+
+@pytest.fixture(scope="session")
+def real_dump():
+    """Echter Dump aus rawdata/ (übersprungen, wenn nicht vorhanden)"""
+    if not BMW.is_file(): pytest.skip("rawdata dump not available")
+    return BMW.read_bytes()
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+import argparse, json, math, sys
+import numpy as np
+import pytest
+import bin_diff
+from bin_diff import GAPS, _map_entry, diff_dumps, diff_ranges, map_deltas
+
+def args(**kw):
+    return argparse.Namespace(**{"specs": None, "analysis": None, "no_detect": False, "gap_candidates": GAPS, "merge_gap": 16,
+                                 "max_cells": 32, "max_maps": 50, "max_ranges": 1000, **kw})
+
+def naive_ranges(a, b, gap):
+    n = min(len(a), len(b))
+    pos = [i for i in range(n) if a[i] != b[i]] + list(range(n, max(len(a), len(b))))
+    out = []
+    for p in pos:
+        if out and p - out[-1][1] <= gap: out[-1][1] = p + 1
+        else: out.append([p, p + 1])
+    return out
+
+@pytest.mark.parametrize("gap,size_b", [(0, None), (16, None), (4, -5), (0, 3)])
+def test_diff_ranges_exact(synth, gap, size_b):
+    a = synth[0][:300_001]
+    rng = np.random.default_rng(7); b = bytearray(a)
+    for p in rng.integers(0, len(a), 40).tolist() + [0, 7, 8, len(a) - 1]: b[p] ^= 0x5A
+    b[1000:1013] = bytes(13)  # Lauf über Wortgrenzen
+    if size_b: b = b[:size_b] if size_b < 0 else b + bytes(size_b)
+    lo, hi = diff_ranges(a, bytes(b), gap, chunk=4096)
+    assert [[x, y] for x, y in zip(lo.tolist(), hi.tolist())] == naive_ranges(a, bytes(b), gap)
+
+def test_planted_edits_attributed(synth):
+    data, planted = synth
+    m2 = next(p for p in planted if p["type"] == "2D" and p["axis_dtype"] == "int16_le")
+    m3 = next(p for p in planted if p["type"] == "3D")
+    z3 = np.array(m3["values"]); cols3 = z3.shape[1]
+    b = bytearray(data)
+    for off, k, dv in ((m2["data_offset"], 3, 7), (m3["data_offset"], cols3 + 2, -4), (m3["data_offset"], 5 * cols3, 11)):
+        v = int.from_bytes(b[off + 2 * k:off + 2 * k + 2], "little", signed=True) + dv
+        b[off + 2 * k:off + 2 * k + 2] = v.to_bytes(2, "little", signed=True)
+    res = diff_dumps(data, bytes(b), args())
+    assert res["unattributed_bytes"] == 0 and res["ranges_count"] == 3
+    by = {m["name"]: m for m in res["maps"]}
+    n2 = f"2D@0x{m2['data_offset']:X}[{m2['shape'][0]}]"
+    n3 = f"3D@0x{m3['data_offset']:X}[{m3['shape'][0]}x{m3['shape'][1]}]"
+    assert by[n2]["changed_cells"] == 1 and by[n2]["max_abs_delta"] == 7 and by[n2]["changes"] == [[0, 3, m2["values"][0][3], m2["values"][0][3] + 7]]
+    assert by[n3]["changed_cells"] == 2 and by[n3]["max_abs_delta"] == 11
+    assert by[n3]["changes"] == [[1, 2, z3[1, 2], z3[1, 2] - 4], [5, 0, z3[5, 0], z3[5, 0] + 11]]
+    assert not any(by[n2]["axes_changed"] + by[n3]["axes_changed"])
+    json.dumps(res, allow_nan=False)
+
+def float_map(vals):
+    return np.array(vals, "<f4").tobytes()
+
+def test_map_deltas_non_finite():
+    m = _map_entry("spec", "f", "spec", 0, "<f4", [1, 5], [])
+    a = float_map([1.0, np.nan, 2.0, np.nan, 4.0]); b = float_map([1.0, np.nan, 5.0, 3.0, np.inf])
+    d = map_deltas(a, b, m, 32)
+    assert d["changed_cells"] == 3 and d["max_abs_delta"] == 3.0  # NaN->NaN unverändert, NaN->3 und 4->inf nicht endlich
+    assert d["changes"] == [[0, 2, 2.0, 5.0], [0, 3, None, 3.0], [0, 4, 4.0, None]]
+    d = map_deltas(float_map([np.nan, 1.0]), float_map([2.0, np.nan]), _map_entry("spec", "g", "spec", 0, "<f4", [1, 2], []), 32)
+    assert d["changed_cells"] == 2 and d["max_abs_delta"] is None
+    json.dumps(d, allow_nan=False)
+
+def test_cli_writes_strict_json(tmp_path, monkeypatch):
+    a = float_map([1.0, 2.0, 3.0, 4.0]) * 256; b = bytearray(a); b[4:8] = float_map([np.nan])
+    (tmp_path / "a.bin").write_bytes(a); (tmp_path / "b.bin").write_bytes(bytes(b))
+    out = tmp_path / "d.json"
+    monkeypatch.setattr(sys, "argv", ["bin_diff.py", str(tmp_path / "a.bin"), str(tmp_path / "b.bin"), "--out", str(out)])
+    assert bin_diff.main() == 0
+    def bad(c): raise AssertionError(c)
+    res = json.loads(out.read_text(encoding="utf-8"), parse_constant=bad)
+    assert res["changed_bytes"] == 2 and res["ranges"][0]["start"] == "0x6"  # 2.0 -> NaN: 0x40000000 -> 0x7FC00000
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+import zlib
+import pytest
+from checksums import ALGORITHMS, checksum_rows, compute_checksums, parse_range, stream_checksum_rows
+
+CHECK = b"123456789"
+
+@pytest.mark.parametrize("algo,value", [("crc32", 0xCBF43926), ("crc32_bzip2", 0xFC891918), ("crc32_mpeg2", 0x0376E6E7)])
+def test_crc_check_values(algo, value):
+    assert int(compute_checksums(CHECK, [0], [len(CHECK)], [algo])[algo][0]) == value
+
+def reference(b: bytes, algo: str) -> int:
+    if algo.startswith("additive"): return sum(b) & ((1 << int(algo[8:])) - 1)
+    if algo == "crc32": return zlib.crc32(b)
+    size, order = (2 if algo.startswith("word16") else 4), ("little" if algo.endswith("_le") else "big")
+    b = b + bytes(-len(b) % size)
+    return sum(int.from_bytes(b[i:i + size], order) for i in range(0, len(b), size)) & ((1 << (8 * size)) - 1)
+
+def crc32_msb(b: bytes, xorout: int) -> int:
+    """bitweise, nicht reflektiert (Polynom 0x04C11DB7, Init 0xFFFFFFFF)"""
+    c = 0xFFFFFFFF
+    for x in b:
+        c ^= x << 24
+        for _ in range(8): c = ((c << 1) ^ 0x04C11DB7 if c & 0x80000000 else c << 1) & 0xFFFFFFFF
+    return c ^ xorout
+
+def test_unreflected_crcs_against_bitwise(synth):
+    data = synth[0][:4096]; starts, ends = [0, 3, 1000], [4096, 50, 1001]
+    got = compute_checksums(data, starts, ends, ["crc32_bzip2", "crc32_mpeg2"])
+    assert got["crc32_bzip2"].tolist() == [crc32_msb(data[s:e], 0xFFFFFFFF) for s, e in zip(starts, ends)]
+    assert got["crc32_mpeg2"].tolist() == [crc32_msb(data[s:e], 0) for s, e in zip(starts, ends)]
+
+def test_sums_against_reference(synth):
+    data = synth[0][:300_000]
+    starts, ends = [0, 1, 65536, 12345, 299_990, 7], [65536, 4097, 131072, 12346, 300_000, 7]  # ungerade, leer
+    got = compute_checksums(data, starts, ends, ALGORITHMS)
+    for a in ALGORITHMS:
+        if a in ("crc32_bzip2", "crc32_mpeg2"): continue
+        assert got[a].tolist() == [reference(data[s:e], a) for s, e in zip(starts, ends)], a
+
+def test_block_additive32_parity(synth):
+    data = synth[0][:262_144 + 100]
+    rows = checksum_rows(data, 65536, ["additive32"])
+    assert rows["additive32"] == [f"0x{sum(data[s:s + 65536]) & 0xFFFFFFFF:08X}" for s in range(0, len(data), 65536)]
+
+def test_stream_equals_whole(synth):
+    data = synth[0][:5 * 65536 + 10]
+    whole = checksum_rows(data, 65536)
+    streamed = stream_checksum_rows([data[i:i + 2 * 65536] for i in range(0, len(data), 2 * 65536)], 65536)
+    assert {k: list(v) for k, v in streamed.items()} == {k: list(v) for k, v in whole.items()}
+
+def test_ranges():
+    rows = checksum_rows(CHECK, 4, ["crc32"], [parse_range("0x0:9")])
+    assert rows["block_start"].tolist() == [0, 4, 8, 0] and rows["crc32"][-1] == "0xCBF43926"
+    with pytest.raises(ValueError): checksum_rows(CHECK, 4, ["crc32"], [(0, 10)])
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""deepseek_submit_annotations.py gegen den lokalen Stand-in (tools/deepseek_standin.py): 200, 429 mit
+Retry-After, Cache-Treffer beim zweiten Lauf, nach 1-Byte-Änderung nur der betroffene Chunk neu gesendet"""
+import json, sys, threading
+import pytest
+
+import deepseek_submit_annotations as ds
+from deepseek_standin import make_server
+from ihex import write_hex
+from synth_dump import CODE
+
+BASE = 0x80000000
+
+@pytest.fixture
+def standin():
+    def start(fail_first=0, retry_after="0"):
+        srv = make_server(0, fail_first, retry_after)
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        started.append(srv)
+        return srv
+    started = []
+    yield start
+    for srv in started: srv.shutdown(); srv.server_close()
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch, synth):
+    """HEX aus dem Kalibrierbereich des synthetischen Dumps, kleine Chunks -> mehrere Anfragen je Datei"""
+    data, _ = synth
+    (tmp_path / "in").mkdir()
+    write_hex(tmp_path / "in" / "cal.hex", data[CODE:CODE + (64 << 10)], BASE)
+    monkeypatch.setattr(ds, "IN_DIR", tmp_path / "in")
+    monkeypatch.setattr(ds, "OUT_DIR", tmp_path / "out")
+    monkeypatch.setattr(ds, "API_KEY", "test")
+    monkeypatch.setattr(ds, "CHUNK_CHARS", 20000)
+    return tmp_path
+
+def run(monkeypatch, srv, tmp_path, *extra):
+    monkeypatch.setattr(ds, "BASE_URL", f"http://127.0.0.1:{srv.server_address[1]}")
+    monkeypatch.setattr(sys, "argv", ["deepseek_submit_annotations.py", "--rate", "0", "--concurrency", "2",
+                                      "--cache-dir", str(tmp_path / "cache"), *extra])
+    return ds.main()
+
+def test_ok_and_cache_hit(standin, workdir, monkeypatch, capsys):
+    srv = standin()
+    assert run(monkeypatch, srv, workdir) == 0
+    n = srv.state["ok"]
+    assert n > 2 and srv.state["throttled"] == 0
+    assert f"chunks sent: {n}, from cache: 0" in capsys.readouterr().out
+    res = json.loads((workdir / "out" / "cal.json").read_text(encoding="utf-8"))
+    assert res["regions"] and res["dropped_regions"] == 0
+    assert res["hashes"]["hex_lines"] == (workdir / "in" / "cal.hex").read_bytes().count(b"\n")
+
+    assert run(monkeypatch, srv, workdir) == 0  # zweiter Lauf: alles aus dem Cache
+    assert srv.state["requests"] == n
+    assert f"chunks sent: 0, from cache: {n}" in capsys.readouterr().out
+    assert json.loads((workdir / "out" / "cal.json").read_text(encoding="utf-8")) == res
+
+def test_retry_after(standin, workdir, monkeypatch):
+    srv = standin(fail_first=1, retry_after="1")
+    assert run(monkeypatch, srv, workdir, "--no-cache") == 0
+    log = srv.state["log"]
+    assert srv.state["throttled"] == srv.state["ok"] > 0
+    for key in {k for _, _, k in log}:
+        (t0, s0, _), (t1, s1, _) = [e for e in log if e[2] == key]
+        assert (s0, s1) == (429, 200) and t1 - t0 >= 0.9  # Retry-After abgewartet
+
+def test_one_byte_edit_resends_one_chunk(standin, workdir, monkeypatch, capsys):
+    srv = standin()
+    assert run(monkeypatch, srv, workdir) == 0
+    n = srv.state["ok"]; capsys.readouterr()
+    hp = workdir / "in" / "cal.hex"
+    _, data, _ = ds.read_hex(hp)
+    data = bytearray(data); data[len(data) // 2] ^= 0x01
+    write_hex(hp, data, BASE)
+    assert run(monkeypatch, srv, workdir) == 0
+    assert srv.state["ok"] == n + 1
+    assert f"chunks sent: 1, from cache: {n - 1}" in capsys.readouterr().out
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+from entropy_engine import shannon_entropy, window_entropy
+from re_scan import entropy_segments
+
+def reference_entropy(arr):
+    """frühere Einzelfenster-Version (analyze_med17.py / re_scan.py)"""
+    counts = np.bincount(arr, minlength=256)
+    p = counts / float(arr.size); nz = p[p > 0]
+    return float(-(nz * np.log2(nz)).sum())
+
+@pytest.mark.parametrize("window,stride", [(4096, None), (4096, 256), (1000, 300)])
+def test_window_entropy_bit_identical(synth, window, stride):
+    data, _ = synth; arr = np.frombuffer(data, np.uint8)
+    off, length, H = window_entropy(data, window, stride)
+    assert off.tolist() == list(range(0, arr.size, stride or window))
+    ref = [reference_entropy(arr[o:o + window]) for o in off.tolist()]
+    assert H.tolist() == ref
+    assert length.tolist() == [min(window, arr.size - o) for o in off.tolist()]
+
+def test_shannon_entropy_edges():
+    assert shannon_entropy(b"") == 0.0
+    assert shannon_entropy(b"\xff" * 100) == 0.0
+    assert shannon_entropy(bytes(range(256))) == 8.0
+
+def test_segment_means_match_pandas(synth):
+    pd = pytest.importorskip("pandas")
+    data, _ = synth
+    off, length, H = window_entropy(data, 4096)
+    _, segs = entropy_segments(off, length, H)
+    s = pd.Series(H)
+    for a, b, m in zip(segs["start"].tolist(), segs["end"].tolist(), segs["entropy_mean"].tolist()):
+        i, j = a // 4096, -(-b // 4096)
+        assert m == float(s.iloc[i:j].mean())
+
+@pytest.mark.parametrize("window,stride", [(4096, 4095), (4096, 4097), (1000, 999)])
+def test_coprime_stride(window, stride):
+    data = np.random.default_rng(5).integers(0, 256, (2 << 20) + 123, dtype=np.uint8).tobytes()
+    off, length, H = window_entropy(data, window, stride)
+    assert off.tolist() == list(range(0, len(data), stride))
+    assert length.tolist() == [min(window, len(data) - o) for o in off.tolist()]
+    sel = list(range(0, off.size, 97)) + [off.size - 2, off.size - 1]
+    assert [H[i] for i in sel] == [shannon_entropy(data[o:o + window]) for o in off[sel].tolist()]
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import pytest
+from ihex import hex_segments, load_hex, read_hex, write_hex
+
+intelhex = pytest.importorskip("intelhex")
+
+def intelhex_file(path, data, base, byte_count=16):
+    ih = intelhex.IntelHex(); ih.frombytes(data, offset=base)
+    ih.write_hex_file(str(path), byte_count=byte_count)
+
+@pytest.mark.parametrize("size,base,record_len", [
+    (1000, 0, 16),               # < 64 KiB: ohne Typ-04-Satz
+    (200_003, 0, 16),            # mehrere Segmente, Rest-Satz
+    (70_000, 0x80000000, 16),    # hohe Basis (Tricore-Flash)
+    (100, 0xFFF0, 16),           # Satz über die 64-KiB-Grenze
+    (5000, 0x7FFFFFF8, 32),      # Wechsel der oberen 16 Bit mitten im Satz, andere Satzlänge
+])
+def test_write_identical_to_intelhex(synth, tmp_path, size, base, record_len):
+    data = synth[0][:size]
+    write_hex(tmp_path / "a.hex", data, base, record_len)
+    intelhex_file(tmp_path / "b.hex", data, base, record_len)
+    assert (tmp_path / "a.hex").read_bytes() == (tmp_path / "b.hex").read_bytes()
+    start, buf, segs = read_hex(tmp_path / "a.hex")
+    assert start == base and bytes(buf) == data and segs == [(base, base + size)]
+
+def record(rtype, addr, payload):
+    raw = bytes((len(payload), addr >> 8, addr & 0xFF, rtype)) + payload
+    return ":" + (raw + bytes(((-sum(raw)) & 0xFF,))).hex().upper()
+
+def test_read_type02_and_gaps(tmp_path):
+    lines = [record(2, 0, b"\x12\x34"),                      # Typ 02: Segment 0x1234 -> Basis 0x12340
+             record(0, 0x0000, b"ABCDEFGH" * 2), record(0, 0x0010, b"ABCDEFGH" * 2), record(0, 0x0020, b"ABCDEFGH"),
+             record(0, 0x00C0, b"\x01\x02\x03"),               # 0x12340 + 0xC0 = 0x12400
+             record(2, 0, b"\x20\x00"), record(0, 0, b"xyz"),   # Segment 0x2000 -> 0x20000
+             ":00000001FF"]
+    p = tmp_path / "t02.hex"; p.write_text("\n".join(lines) + "\n")
+    ref = intelhex.IntelHex(str(p))
+    start, buf, segs = read_hex(p)
+    assert start == ref.minaddr() and bytes(buf) == ref.tobinstr(start=ref.minaddr(), end=ref.maxaddr())
+    assert segs == [(0x12340, 0x12368), (0x12400, 0x12403), (0x20000, 0x20003)]
+    assert hex_segments(p) == segs
+    assert buf[0x12368 - start:0x12400 - start] == b"\xff" * (0x12400 - 0x12368)
+    st = {}; read_hex(p, stats=st); assert st["records"] == len(lines)
+
+def test_record_count_across_text_chunks(synth, tmp_path):
+    p = tmp_path / "big.hex"; write_hex(p, synth[0][:3 << 20 >> 1], 0x80000000)  # > 1-MiB-Textstücke
+    st = {}; read_hex(p, stats=st)
+    assert st["records"] == p.read_bytes().count(b"\n")
+
+def test_bad_checksum(synth, tmp_path):
+    p = tmp_path / "bad.hex"; write_hex(p, synth[0][:4096], 0)
+    lines = p.read_text().splitlines(); l = lines[7]
+    lines[7] = l[:-2] + f"{(int(l[-2:], 16) + 1) & 0xFF:02X}"
+    p.write_text("\n".join(lines) + "\n")
+    with pytest.raises(ValueError, match=r"bad\.hex:8: .*checksum"):
+        read_hex(p)
+
+def test_load_hex_memo(synth, tmp_path):
+    p = tmp_path / "m.hex"; write_hex(p, synth[0][:1000], 0x1000)
+    a = load_hex(p); assert load_hex(p) is a
+    write_hex(p, synth[0][:2000], 0x1000)
+    assert load_hex(p)[1] == synth[0][:2000]
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+import subprocess, sys
+import numpy as np
+import pytest
+from analyze_med17 import map_sort_keys
+from conftest import ROOT
+from incremental import _read_maps, _reused_part, merge_maps, top_records
+from table_io import concat_columns, records, take, write_csv
+
+ARTIFACTS = ("block_checksums.csv", "entropy_windows.csv", "axis_candidates.csv", "maps_summary.csv")
+
+def analyze(dump, out, *extra):
+    subprocess.run([sys.executable, str(ROOT / "scripts" / "analyze_med17.py"), str(dump), "--out", str(out),
+                    "--no-cache", "--no-plots", *map(str, extra)], check=True, capture_output=True)
+
+def test_incremental_equals_full(synth, tmp_path):
+    data, planted = synth
+    old = tmp_path / "old.bin"; old.write_bytes(data)
+    b = bytearray(data)
+    for p in planted[::17]:  # Map-Werte, eine Achse und ein Stück Code ändern
+        o = p["data_offset"]; b[o:o + 8] = bytes(x ^ 0x5A for x in b[o:o + 8])
+    o = planted[5].get("axis_offset", planted[5].get("axis1_offset")); b[o:o + 2] = b"\x00\x00"
+    b[0x1000:0x1008] = bytes(8)
+    new = tmp_path / "new.bin"; new.write_bytes(bytes(b))
+    analyze(old, tmp_path / "a_old")
+    analyze(new, tmp_path / "a_inc", "--incremental-from", tmp_path / "a_old")
+    analyze(new, tmp_path / "a_full")
+    summary = (tmp_path / "a_inc" / "analysis_summary.yaml").read_text(encoding="utf-8")
+    assert "maps_reused:" in summary and "maps_reused: 0\n" not in summary  # Wiederverwendung wirklich genutzt
+    for n in ARTIFACTS:
+        assert (tmp_path / "a_inc" / n).read_bytes() == (tmp_path / "a_full" / n).read_bytes(), n
+
+def instrumentation(out):
+    yaml = pytest.importorskip("yaml")
+    return yaml.safe_load((out / "analysis_summary.yaml").read_text(encoding="utf-8"))["med17_analysis"]["instrumentation"]
+
+SCALING = ("entropy", "axis_search", "map_search", "write_csv")  # Stufen, die mit dem Dump/der Änderung wachsen
+
+def test_small_edit_cheaper_than_full(real_dump, tmp_path):
+    old = tmp_path / "old.bin"; old.write_bytes(real_dump)
+    b = bytearray(real_dump)
+    for k in (3, 7, 11, 20, 28): b[k * 65536 + 100] ^= 0x11  # 5 geänderte Blöcke
+    new = tmp_path / "new.bin"; new.write_bytes(bytes(b))
+    analyze(old, tmp_path / "a_old")
+    analyze(new, tmp_path / "a_full")
+    analyze(new, tmp_path / "a_inc", "--incremental-from", tmp_path / "a_old")
+    for n in ARTIFACTS:
+        assert (tmp_path / "a_inc" / n).read_bytes() == (tmp_path / "a_full" / n).read_bytes(), n
+    full, inc = instrumentation(tmp_path / "a_full"), instrumentation(tmp_path / "a_inc")
+    for c in ("map_jobs_2d", "map_jobs_3d", "int16_windows"):
+        assert inc["counters"][c] * 5 < full["counters"][c], c
+    assert sum(inc["timings_s"][k] for k in SCALING) < sum(full["timings_s"][k] for k in SCALING)
+
+def test_map_order_independent_of_input_order():
+    rng = np.random.default_rng(0); n = 200
+    maps = {"type": np.array(["2D", "3D"], dtype=object)[rng.integers(0, 2, n)],
+            "data_dtype": np.array(["int16_le", "uint16_le"], dtype=object)[rng.integers(0, 2, n)],
+            "axis_offset": rng.integers(0, 5, n).astype(float), "data_offset": rng.integers(0, 5, n),
+            "score": rng.integers(0, 3, n).astype(float)}  # viele Gleichstände
+    a = take(maps, np.lexsort(map_sort_keys(maps)))
+    perm = take(maps, rng.permutation(n))
+    b = take(perm, np.lexsort(map_sort_keys(perm)))
+    for c in maps: assert list(a[c]) == list(b[c])
+    assert list(a["type"]) == sorted(a["type"])
+
+def maps_2d(offs, std):
+    n = len(offs)
+    return {"type": ["2D"] * n, "axis_dtype": ["int16_le"] * n, "data_dtype": ["uint16_le"] * n,
+            "axis_offset": np.array(offs, np.int64), "data_offset": np.array(offs, np.int64) + 40,
+            "shape": [[8 + i] for i in range(n)], "std": np.array(std, np.float64), "mean": np.arange(n) / 3}
+
+def maps_3d(offs, std):
+    n = len(offs)
+    return {"type": ["3D"] * n, "axis1_dtype": ["int16_le"] * n, "axis2_dtype": ["float32_le"] * n, "data_dtype": ["int16_le"] * n,
+            "axis1_offset": np.array(offs, np.int64), "axis2_offset": np.array(offs, np.int64) + 20,
+            "data_offset": np.array(offs, np.int64) + 90, "shape": [[4, 5 + i] for i in range(n)],
+            "std": np.array(std, np.float64), "mean": np.arange(n) / 7}
+
+def sorted_maps(parts):
+    m = concat_columns(parts); m["score"] = m["std"]
+    o = np.lexsort(map_sort_keys(m)); return take(m, o), o
+
+@pytest.mark.parametrize("old_3d", [True, False])  # False: alte Datei ohne 3D-Spalten -> Zeilen werden geparst
+def test_merge_maps_copies_rows_like_full_run(tmp_path, old_3d):
+    old2, old3 = maps_2d([100, 200, 300], [1.5, 0.1, 1 / 3]), maps_3d([1000, 2000], [2.5, 0.1])
+    prev, _ = sorted_maps([old2, old3] if old_3d else [old2]); write_csv(tmp_path / "old.csv", prev)
+    header, lines, df = _read_maps(tmp_path / "old.csv")
+    keep = np.flatnonzero(np.isin(df["axis_offset"].to_numpy(), [100, 300]))  # Achse 200 geändert
+    new = {"2D": maps_2d([250], [1 / 3]), "3D": maps_3d([1000, 2000, 3000], [2.5, 0.1, 7.0])}
+    maps, raw = merge_maps(new, [_reused_part("2D", header, lines, df, keep)])
+    assert (raw is not None) == old_3d
+    maps["score"] = maps["std"]; o = np.lexsort(map_sort_keys(maps)); maps = take(maps, o)
+    if raw: raw = [raw[i] for i in o.tolist()]
+    write_csv(tmp_path / "inc.csv", maps, raw)
+    full, _ = sorted_maps([concat_columns([take(old2, [0, 2]), new["2D"]]), new["3D"]])
+    write_csv(tmp_path / "full.csv", full)
+    assert (tmp_path / "inc.csv").read_bytes() == (tmp_path / "full.csv").read_bytes()
+    assert repr(top_records(maps, raw, 20) if raw else records(maps, 20)) == repr(records(full, 20))  # NaN != NaN
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+from instrument import count, new_stats, peak_rss_mb, timed
+
+def test_maxrss_delta_per_stage():
+    if peak_rss_mb() is None: pytest.skip("resource module not available")
+    st = new_stats()
+    with timed(st, "small"): np.ones(1 << 10)
+    n = int(peak_rss_mb() + 128) << 20  # sicher über dem bisherigen Prozess-Peak
+    with timed(st, "big"): a = np.ones(n, np.uint8); del a
+    with timed(st, "big"): pass            # erneut betreten: Maximum der Anstiege bleibt
+    with timed(st, "after"): np.ones(1 << 20, np.uint8)
+    d = st["maxrss_delta_mb"]
+    assert d["small"] < 16 and d["after"] == 0.0
+    assert d["big"] >= 100 and st["peak_rss_mb"] >= n >> 20
+    assert set(st["timings_s"]) == {"small", "big", "after"}
+
+def test_disabled_and_count():
+    with timed(None, "x"): pass
+    st = new_stats(); count(st, "k", 3); count(st, "k"); count(None, "k")
+    assert st["counters"] == {"k": 4}
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+from analyze_med17 import axes_frame, find_axes, parse_gaps
+from map_search import axis_pairs, search_maps
+from synth_dump import recall
+from table_io import concat_columns, records
+
+GAPS = parse_gaps("0,16,32,64,128,256")
+ISZ = {"int16_le": 2, "uint16_le": 2, "float32_le": 4}
+NP = {"int16_le": "<i2", "uint16_le": "<u2", "float32_le": "<f4"}
+
+def reference_stats(data, start, n, dtype):
+    """frühere extract_block_stats (je Fenster np.std/np.mean)"""
+    end = start + n * ISZ[dtype]
+    if end > len(data) or start < 0: return None
+    arr = np.frombuffer(memoryview(data)[start:end], dtype=NP[dtype])
+    if arr.size == 0 or not np.all(np.isfinite(arr)): return None
+    with np.errstate(all="ignore"):  # float32-Überläufe wie früher still
+        std = float(np.std(arr)); mean = float(np.mean(arr))
+    return (std, mean) if np.isfinite(std) and std > 1e-3 else None
+
+def reference_search(data, axes, gaps):
+    """frühere 2D/3D-Schleifen aus analyze_med17.py -> Zeilen in Erzeugungsreihenfolge"""
+    out = []
+    def first(start_of_gap, n):
+        for gap in gaps:
+            for dt in ISZ:
+                st = reference_stats(data, start_of_gap + gap, n, dt)
+                if st: return start_of_gap + gap, dt, st
+    for ax in axes:
+        hit = first(ax["offset"] + ax["length"] * ISZ[ax["dtype"]], ax["length"])
+        if hit: out.append(("2D", ax["offset"], -1, hit[0], hit[1], (ax["length"],), *hit[2]))
+    for i in range(len(axes) - 1):
+        a1 = axes[i]
+        for j in range(i + 1, min(i + 50, len(axes))):
+            a2 = axes[j]; dist = a2["offset"] - (a1["offset"] + a1["length"] * ISZ[a1["dtype"]])
+            if dist < 0 or dist > 2048: continue
+            hit = first(a2["offset"] + a2["length"] * ISZ[a2["dtype"]], a1["length"] * a2["length"])
+            if hit: out.append(("3D", a1["offset"], a2["offset"], hit[0], hit[1], (a1["length"], a2["length"]), *hit[2]))
+    return out
+
+def rows(found):
+    out = []
+    for r in records(found["2D"]) if len(found["2D"].get("type", ())) else []:
+        out.append(("2D", int(r["axis_offset"]), -1, int(r["data_offset"]), r["data_dtype"], tuple(r["shape"]), r["std"], r["mean"]))
+    for r in records(found["3D"]) if len(found["3D"].get("type", ())) else []:
+        out.append(("3D", int(r["axis1_offset"]), int(r["axis2_offset"]), int(r["data_offset"]), r["data_dtype"],
+                    tuple(r["shape"]), r["std"], r["mean"]))
+    return out
+
+def check_parity(data):
+    axes = records(axes_frame(find_axes(data)))
+    got, ref = rows(search_maps(data, axes, GAPS)), reference_search(data, axes, GAPS)
+    assert len(ref) > 40
+    assert [g[:6] for g in got] == [r[:6] for r in ref]
+    np.testing.assert_allclose([g[6:] for g in got], [r[6:] for r in ref], rtol=1e-9, atol=1e-9)
+
+def test_parity_with_loops(synth):
+    check_parity(synth[0][:640 * 1024])  # Code + Kalibrierbereich des ersten MiB
+
+def test_parity_with_loops_real(real_dump):
+    check_parity(real_dump[0x80000:0xC0000])
+
+def test_recall_on_synth(synth):
+    data, planted = synth
+    found = search_maps(data, records(axes_frame(find_axes(data))), GAPS)
+    got = recall(planted, concat_columns([c for c in found.values() if len(c.get("type", ()))]))
+    assert all(r["found"] == r["planted"] for r in got.values())
+
+def test_select_and_pairs():
+    offs = np.array([0, 40, 100, 5000]); ends = np.array([32, 72, 132, 5032])
+    pi, pj = axis_pairs(offs, ends, max_dist=2048)
+    assert list(zip(pi.tolist(), pj.tolist())) == [(0, 1), (0, 2), (1, 2)]
+    assert search_maps(b"", [], GAPS) == {"2D": {}, "3D": {}}
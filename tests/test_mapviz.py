@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""mapviz.render_one: PNGs landen im Cache, ohne dass die Worker den Cache scannen/räumen"""
+import numpy as np
+
+import mapviz, result_cache
+
+def tasks(tmp_path, n):
+    X, Y = np.meshgrid(np.arange(4.0), np.arange(3.0))
+    return [(str(tmp_path / f"m{i}.pair.png"), f"m{i}", X, Y, X * Y + i, None, "heatmap", 20, str(tmp_path / "c"))
+            for i in range(n)]
+
+def test_render_one_stores_without_eviction(tmp_path, monkeypatch):
+    scans = []; evict = result_cache._evict
+    monkeypatch.setattr(result_cache, "_evict", lambda *a: (scans.append(a), evict(*a)))
+    assert [mapviz.render_one(t) for t in tasks(tmp_path, 4)] == [False] * 4
+    assert not scans and len([e for e in (tmp_path / "c").iterdir() if not e.name.startswith(".")]) == 4
+    for t in tasks(tmp_path, 4): (tmp_path / f"{t[1]}.pair.png").unlink()
+    assert [mapviz.render_one(t) for t in tasks(tmp_path, 4)] == [True] * 4 and not scans
+    assert all((tmp_path / f"m{i}.pair.png").is_file() for i in range(4))
+    assert result_cache.cache_trim(tmp_path / "c", 1) and len(scans) == 1  # einmal im Elternprozess
+    assert not [e for e in (tmp_path / "c").iterdir() if not e.name.startswith(".")]
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+import os
+import result_cache
+from result_cache import LOW_WATER, cache_evict, cache_get, cache_key, cache_materialize, cache_put, cache_trim
+
+def put(root, tmp_path, key, size, name="a.csv"):
+    f = tmp_path / name; f.write_bytes(b"x" * size)
+    return cache_put(root, key, [f, tmp_path / "missing.png"], {"k": key}, max_bytes=1000)
+
+def test_roundtrip(tmp_path):
+    root = tmp_path / "c"; key = cache_key("ab" * 32, {"p": 1}, "1")
+    assert key != cache_key("ab" * 32, {"p": 2}, "1")
+    assert put(root, tmp_path, key, 10)
+    entry, meta = cache_get(root, key)
+    assert meta == {"k": key}
+    out = tmp_path / "out"
+    assert cache_materialize(entry, out, ["a.csv", "missing.png"])
+    assert (out / "a.csv").read_bytes() == b"x" * 10 and not (out / "missing.png").exists()
+
+def test_eviction_keeps_new_entry(tmp_path):
+    root = tmp_path / "c"
+    assert put(root, tmp_path, "old", 600)
+    os.utime(root / "old" / "meta.json", (1, 1))
+    assert put(root, tmp_path, "new", 600)
+    assert cache_get(root, "new") and cache_get(root, "old") is None
+    assert not (root / "old").exists()
+    cache_evict(root, 0, keep="new")
+    assert cache_get(root, "new")
+
+def test_oversized_entry_not_stored(tmp_path):
+    root = tmp_path / "c"
+    assert put(root, tmp_path, "small", 100)
+    assert not put(root, tmp_path, "huge", 5000)
+    assert cache_get(root, "huge") is None and cache_get(root, "small")
+
+def test_missing_artifact_is_miss(tmp_path):
+    root = tmp_path / "c"
+    assert put(root, tmp_path, "k", 10)
+    entry, _ = cache_get(root, "k")
+    (entry / "a.csv").unlink()
+    assert cache_get(root, "k") is None
+    assert not cache_materialize(entry, tmp_path / "out", ["a.csv"])
+    assert put(root, tmp_path, "k", 10) and cache_get(root, "k")  # unvollständiger Eintrag wird ersetzt
+
+def stored(root):
+    return sum(f.stat().st_size for e in root.iterdir() if not e.name.startswith(".") for f in e.iterdir())
+
+def test_puts_keep_running_total(tmp_path, monkeypatch):
+    root = tmp_path / "c"; f = tmp_path / "a.png"; f.write_bytes(b"x" * 100); scans = []
+    evict = result_cache._evict
+    monkeypatch.setattr(result_cache, "_evict", lambda *a: (scans.append(a), evict(*a)))
+    for i in range(200): assert cache_put(root, f"k{i:03d}", [f], {}, max_bytes=1 << 20)
+    assert len(scans) == 1  # nur der erste put (noch keine .size), danach kein Scan mehr
+    assert int((root / ".size").read_text()) == stored(root)
+    for i in range(200): os.utime(root / f"k{i:03d}" / "meta.json", (i + 1, i + 1))
+    assert cache_put(root, "new", [f], {}, max_bytes=10000) and len(scans) == 2  # ein Durchgang räumt
+    assert int((root / ".size").read_text()) == stored(root) <= LOW_WATER * 10000
+    assert cache_get(root, "new") and cache_get(root, "k199") and cache_get(root, "k000") is None
+    assert not cache_trim(root, 10000) and len(scans) == 2  # unter der Grenze: kein Scan
+
+def test_put_without_eviction(tmp_path):
+    root = tmp_path / "c"
+    for i in range(5): assert cache_put(root, f"k{i}", [tmp_path / "missing.png"], {}, max_bytes=None)
+    size = stored(root)
+    assert cache_trim(root, size - 1) and stored(root) <= LOW_WATER * (size - 1)
+    assert int((root / ".size").read_text()) == stored(root)
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+import hashlib, os
+from pathlib import Path
+import numpy as np
+import pytest
+import similarity_index as si
+from synth_dump import CODE, MIB, synth_dump
+
+CAL_AT = CODE + 1000  # im Kalibrierbereich des ersten MiB
+
+def name(p):
+    return Path(p).name
+
+def naive_candidates(buf):
+    g = si.GEAR.astype(np.uint64); out = []
+    for p in range(si.GEAR_W - 1, buf.size):
+        h = sum(int(g[buf[p - k]]) << k for k in range(si.GEAR_W)) & 0xFFFFFFFF
+        if h & int(si.CUT_MASK) == 0: out.append(p)
+    return out
+
+def test_gear_candidates_across_pieces(monkeypatch):
+    buf = np.random.default_rng(3).integers(0, 256, 60_000).astype(np.uint8)
+    ref = naive_candidates(buf)
+    assert si.gear_candidates(buf).tolist() == ref
+    monkeypatch.setattr(si, "CHUNK", 4099)  # Stückgrenzen mitten in Gear-Fenstern
+    assert si.gear_candidates(buf).tolist() == ref
+
+def test_chunk_bounds_local_after_insert(synth):
+    buf = np.frombuffer(synth[0], np.uint8)
+    ends = si.chunk_bounds(buf); sizes = np.diff(np.r_[0, ends])
+    assert ends[-1] == buf.size and (sizes > 0).all() and sizes.max() <= si.MAX_CHUNK
+    ins = np.r_[buf[:1000], np.full(77, 0x42, np.uint8), buf[1000:]]
+    shifted = set((si.chunk_bounds(ins) - 77).tolist())
+    assert len(shifted & set(ends.tolist())) >= 0.98 * ends.size  # nur die Chunks an der Einfügestelle ändern sich
+
+@pytest.fixture(scope="module")
+def corpus(tmp_path_factory, synth):
+    data = synth[0]; root = tmp_path_factory.mktemp("corpus")
+    (root / "bmw").mkdir(); (root / "bmw" / "metadata.yml").write_text("brand: BMW\necu_model: MG1CS003\n", encoding="utf-8")
+    edit = bytearray(data); edit[CAL_AT] ^= 0xFF; edit[CAL_AT + 1] ^= 0x0F
+    files = {"bmw/a.bin": data, "bmw/b.bin": bytes(edit), "c_shift.bin": b"\x5A" * 100 + data[:-100],
+             "d_other.bin": synth_dump(2 * MIB, seed=2)[0], "e_erased.bin": b"\xFF" * MIB}
+    for name, blob in files.items(): (root / name).write_bytes(blob)
+    return root, files
+
+def test_build_and_query(corpus, tmp_path):
+    root, files = corpus; index = tmp_path / "idx"
+    res = si.build(str(root / "**" / "*.bin"), index, 1)
+    assert res == {"files": 5, "indexed": 5, "reused": 0, "failed": 0, "index": str(index)}
+    idx = si.load_index(index)
+    erased = next(f for f in idx["files"] if f["path"].endswith("e_erased.bin"))
+    assert erased["chunks"] == 0 and not np.isin(idx["files"].index(erased), idx["lsh_files"]).any()
+
+    a = files["bmw/a.bin"]; fp = si.fingerprint(a)
+    out = si.query(fp, hashlib.sha256(a).hexdigest(), idx, top=10)
+    by = {name(r["path"]): r for r in out}
+    assert name(out[0]["path"]) == "a.bin" and out[0]["identical"] and out[0]["jaccard_est"] == 1.0
+    assert out[0]["meta"]["brand"] == "BMW" and out[0]["meta"]["ecu_model"] == "MG1CS003"
+    assert by["b.bin"]["jaccard_est"] > 0.9 and by["b.bin"]["shared_blocks"] == len(fp["blocks"]) - 1
+    assert by["c_shift.bin"]["jaccard_est"] > 0.9 and by["c_shift.bin"]["shared_blocks"] == 0  # Verschiebung: nur MinHash
+    assert [name(r["path"]) for r in out[:3]] == ["a.bin", "b.bin", "c_shift.bin"]
+    assert "e_erased.bin" not in by and by.get("d_other.bin", {"jaccard_est": 0})["jaccard_est"] < 0.2
+    assert by["b.bin"]["block_pairs"][0] == ["0x0", "0x0"]
+
+def test_rebuild_reuses_unchanged(corpus, tmp_path):
+    root, files = corpus; index = tmp_path / "idx"; pattern = str(root / "**" / "*.bin")
+    si.build(pattern, index, 1)
+    before = si.load_index(index)
+    res = si.build(pattern, index, 1)
+    assert (res["reused"], res["indexed"]) == (5, 0)
+    after = si.load_index(index)
+    for a in si.ARRAYS: assert np.array_equal(before[a], after[a])
+    p = root / "bmw" / "b.bin"; st = p.stat(); os.utime(p, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert (si.build(pattern, index, 1)["reused"], si.build(pattern, index, 1)["reused"]) == (4, 5)
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+from string_scan import ascii_strings, printable_runs, utf16le_strings
+
+def reference_ascii(b, minlen=4):
+    """frühere Byte-Schleife aus re_scan.py (ohne Offsets)"""
+    out = []; cur = []
+    for x in b:
+        if 32 <= x < 127: cur.append(x)
+        else:
+            if len(cur) >= minlen: out.append(bytes(cur).decode("ascii", "ignore"))
+            cur = []
+    if len(cur) >= minlen: out.append(bytes(cur).decode("ascii", "ignore"))
+    return out
+
+def reference_utf16le(b, minlen=4):
+    out = []; cur = []
+    for i in range(0, len(b) - 1, 2):
+        ch = int.from_bytes(b[i:i + 2], "little", signed=False)
+        if 32 <= ch < 127: cur.append(ch)
+        else:
+            if len(cur) >= minlen: out.append("".join(map(chr, cur)))
+            cur = []
+    if len(cur) >= minlen: out.append("".join(map(chr, cur)))
+    return out
+
+@pytest.mark.parametrize("minlen", [4, 8])
+def test_parity_with_byte_loop(synth, minlen):
+    data = synth[0][:512 * 1024]
+    asc, u16 = ascii_strings(data, minlen), utf16le_strings(data, minlen)
+    assert [t for _, t in asc] == reference_ascii(data, minlen)
+    assert [t for _, t in u16] == reference_utf16le(data, minlen)
+    assert all(data[o:o + len(t)].decode("ascii") == t for o, t in asc)
+    assert all(o % 2 == 0 and data[o:o + 2 * len(t)].decode("utf-16-le") == t for o, t in u16)
+    assert len(asc) > 10 and len(u16) > 3
+
+def test_edges():
+    b = b"ABCD\x00xyz\x00" + b"EFGH"
+    assert ascii_strings(b) == [(0, "ABCD"), (9, "EFGH")]
+    assert ascii_strings(b, limit=1) == [(0, "ABCD")]
+    assert ascii_strings(b"") == [] and utf16le_strings(b"") == []
+    assert utf16le_strings("TEST".encode("utf-16-le") + b"\x00") == [(0, "TEST")]  # ungerade Länge
+    s, e = printable_runs(np.array([1, 1, 0, 1, 1, 1, 1], bool), 2)
+    assert s.tolist() == [0, 3] and e.tolist() == [2, 7]
@@ -3,15 +3,28 @@ set -euo pipefail
 COMMIT_MSG="${COMMIT_MSG:-}"
 MODE="power"; if echo "$COMMIT_MSG" | grep -qi '\[smooth\]'; then MODE="smooth"; fi
 mkdir -p med17_analysis reports recon
-mapfile -t BINS < <(find rawdata -type f -name '*.bin' -print | sort)
-for f in "${BINS[@]}"; do
-  base="$(basename "$f")"; stem="${base%.*}"
-  out="med17_analysis/$stem"; rep="reports/$stem"; rec="recon/$stem"
+# analyze: ein Interpreter, Dumps parallel (Corpus-Modus) -> med17_analysis/<stem>/ + index.csv
+if [ -f scripts/analyze_med17.py ]; then python scripts/analyze_med17.py 'rawdata/**/*.bin' --out med17_analysis || true; fi
+# Dump -> Ausgabeverzeichnis aus index.csv (doppelte Stems: <stem>-2, ...); ohne Index gleiche Regel, Python-Sortierung
+mapfile -d '' PAIRS < <(python - <<'PY'
+import csv, glob, os, sys
+if os.path.isfile("med17_analysis/index.csv"):
+    with open("med17_analysis/index.csv", newline="", encoding="utf-8") as fh:
+        pairs = [(r["input"], r["out_dir"]) for r in csv.DictReader(fh)]
+else:
+    seen, pairs = {}, []
+    for p in sorted(p for p in glob.glob("rawdata/**/*.bin", recursive=True) if os.path.isfile(p)):
+        stem = os.path.splitext(os.path.basename(p))[0]; seen[stem] = seen.get(stem, 0) + 1
+        pairs.append((p, os.path.join("med17_analysis", stem if seen[stem] == 1 else f"{stem}-{seen[stem]}")))
+for f, out in pairs: sys.stdout.write(f"{f}\0{out}\0")
+PY
+)
+for ((i = 0; i < ${#PAIRS[@]}; i += 2)); do
+  f="${PAIRS[i]}"; out="${PAIRS[i+1]}"; name="$(basename "$out")"
+  rep="reports/$name"; rec="recon/$name"
   mkdir -p "$out" "$rep" "$rec"
   # hex
   python scripts/dump_hex.py "$f" > "$rep/dump.hex"
-  # analyze (optional)
-  if [ -f scripts/analyze_med17.py ]; then python scripts/analyze_med17.py "$f" --out "$out" || true; fi
   if [ -f scripts/analyze_and_report.py ]; then python scripts/analyze_and_report.py --bin "$f" --analysis-dir "$out" --reports-root reports --mode "$MODE" || true; fi
   # yaml->json
   if [ -f "$out/analysis_summary.yaml" ]; then cp -f "$out/analysis_summary.yaml" "$rep/analysis_summary.yaml"; python scripts/emit_json.py "$out/analysis_summary.yaml" > "$rep/analysis_summary.json" || true; fi
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lokaler Stand-in für die DeepSeek-Chat-API (nur stdlib, für Tests von scripts/deepseek_submit_annotations.py)
+- POST /chat/completions: Antwort im OpenAI-Format, content = JSON mit je einer Region pro RANGES-Eintrag des Chunks
+  (label "standin"), hashes.hex_lines = Anzahl der HEX-Zeilen im Chunk
+- --fail-first N: die ersten N Anfragen je Chunk (SHA-256 des Nachrichtentexts) mit 429 + Retry-After beantworten
+- GET /stats: {"requests", "ok", "throttled", "log": [[t, status, chunk-hash], ...]} (t = monotonic Sekunden)
+- läuft als eigenes Skript oder per make_server() im Test-Thread
+
+Usage:
+  python tools/deepseek_standin.py --port 8099 [--fail-first 1 --retry-after 1]
+  DEEPSEEK_BASE_URL=http://127.0.0.1:8099 DEEPSEEK_API_KEY=x python scripts/deepseek_submit_annotations.py
+"""
+import argparse, hashlib, json, re, sys, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RANGE_RE = re.compile(r"(0x[0-9A-Fa-f]+)-(0x[0-9A-Fa-f]+)")
+
+def answer(messages) -> dict:
+    user = next((m["content"] for m in messages if m.get("role") == "user"), "")
+    name = re.search(r"^FILE: (.*)$", user, re.M)
+    ranges = re.search(r"^RANGES: (.*)$", user, re.M)
+    regions = [{"label": "standin", "start_addr": a, "end_addr": b} for a, b in RANGE_RE.findall(ranges.group(1) if ranges else "")]
+    return {"file": name.group(1) if name else "", "summary": "stand-in", "regions": regions,
+            "hashes": {"hex_lines": sum(1 for l in user.splitlines() if l.startswith(":"))}}
+
+def make_server(port: int = 0, fail_first: int = 0, retry_after: str = "0"):
+    """-> ThreadingHTTPServer (server.state: Zähler + Log); port 0 = frei wählen (server.server_address[1])"""
+    state = {"requests": 0, "ok": 0, "throttled": 0, "log": [], "seen": {}, "lock": threading.Lock()}
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *a): pass
+
+        def _send(self, code, obj, headers=()):
+            body = json.dumps(obj).encode("utf-8")
+            self.send_response(code)
+            for k, v in headers: self.send_header(k, v)
+            self.send_header("Content-Type", "application/json"); self.send_header("Content-Length", str(len(body)))
+            self.end_headers(); self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path != "/stats": return self._send(404, {"error": "not found"})
+            with state["lock"]:
+                self._send(200, {k: state[k] for k in ("requests", "ok", "throttled", "log")})
+
+        def do_POST(self):
+            if self.path != "/chat/completions": return self._send(404, {"error": "not found"})
+            req = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            key = hashlib.sha256(json.dumps(req.get("messages"), sort_keys=True).encode("utf-8")).hexdigest()
+            with state["lock"]:
+                state["requests"] += 1; n = state["seen"][key] = state["seen"].get(key, 0) + 1
+                throttle = n <= fail_first
+                state["throttled" if throttle else "ok"] += 1
+                state["log"].append([time.monotonic(), 429 if throttle else 200, key])
+            if throttle:
+                return self._send(429, {"error": "rate limited"}, [("Retry-After", retry_after)])
+            content = json.dumps(answer(req.get("messages") or []))
+            self._send(200, {"choices": [{"message": {"role": "assistant", "content": content}}]})
+
+    srv = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    srv.state = state
+    return srv
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=8099)
+    ap.add_argument("--fail-first", type=int, default=0, help="erste N Anfragen je Chunk mit 429 beantworten")
+    ap.add_argument("--retry-after", default="1", help="Retry-After-Header der 429-Antworten (Sekunden)")
+    a = ap.parse_args()
+    srv = make_server(a.port, a.fail_first, a.retry_after)
+    print(f"stand-in on http://127.0.0.1:{srv.server_address[1]}", file=sys.stderr)
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
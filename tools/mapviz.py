@@ -1,21 +1,35 @@
 #!/usr/bin/env python3
 """
 Minimaler ECU-Reporter/Visualizer:
-- findet .bin-Dateien (glob)
+- findet .bin-Dateien (glob; auch .gz/.xz/.zst/.zip über bin_loader)
 - optional lädt Maps aus YAML-Specs
 - erzeugt Histogramm + Markdown-Report (+ CSV je Map)
+- Map-Bilder: erst alle Figuren sammeln, dann im ProcessPool rendern (--jobs); je Figur Hash über
+  (Map-Werte, Achsen, DeepSeek-Overlay, Titel, Stil, dpi) -> PNG aus dem Ergebnis-Cache (result_cache.py),
+  nur geänderte Maps werden neu gerendert; Worker speichern ohne zu räumen, geräumt wird einmal nach dem Pool
+- --style surface (3D plot_surface) oder heatmap (imshow, deutlich schneller)
+- matplotlib/yaml erst in den Stufen, die sie brauchen; --no-plots: nur CSV + Report, ohne matplotlib
 """
 import argparse, glob, os, pathlib, re, sys, json, math, hashlib
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, Any, List
 import numpy as np
-import yaml
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent / "scripts"))
+from bin_loader import dump_name, load_bin
+from string_scan import ascii_strings
+from result_cache import DEFAULT_DIR, DEFAULT_MAX_MB, cache_get, cache_key, cache_materialize, cache_put, cache_trim
 
 DTYPES = {"u8": np.uint8, "s8": np.int8, "u16": np.uint16, "s16": np.int16,
           "u32": np.uint32, "s32": np.int32, "f32": np.float32}
 ENDIANS = {"little": "<", "big": ">"}
+RENDER_VERSION = "1"
+
+def _plt():
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
 
 def to_int(x): 
     return int(x,16) if isinstance(x,str) and x.lower().startswith("0x") else int(x)
@@ -23,6 +37,8 @@ def to_int(x):
 def load_specs(patterns: List[str]) -> List[Dict[str, Any]]:
     files=[]
     for pat in patterns: files.extend(glob.glob(pat, recursive=True))
+    if not files: return []
+    import yaml
     specs=[]
     for p in files:
         try:
@@ -73,44 +89,71 @@ def mesh_axes(m, rows, cols):
     X = axbuild(m.get("x_axis"), cols); Y = axbuild(m.get("y_axis"), rows)
     return np.meshgrid(X, Y)
 
-def read_map_from_bin(bin_path, m):
-    off = to_int(m["offset"]); rows = int(m["rows"]); cols = int(m["cols"])
-    dtype = m.get("dtype","u16"); endian=m.get("endian","little")
-    scale=float(m.get("scale",1.0)); add=float(m.get("add",0.0))
-    if dtype not in DTYPES or endian not in ENDIANS: raise ValueError("bad dtype/endian")
-    bsize = np.dtype(DTYPES[dtype]).itemsize; need = rows*cols*bsize
-    with open(bin_path, "rb") as f:
-        f.seek(off); buf=f.read(need)
-        if len(buf)<need: raise ValueError(f"Not enough bytes at 0x{off:X} need {need} got {len(buf)}")
-        arr = np.frombuffer(buf, dtype=np.dtype(ENDIANS[endian]+DTYPES[dtype].name))
-        arr = arr.reshape((rows, cols)).astype(float)
-        return arr*scale + add
+def compile_maps(specs) -> Dict[str, Any]:
+    """Alle Spec-Maps einmal übersetzen (statt je Bin): Felder prüfen, Achsen bauen, Sub-Array-Dtype je Map
+    (Basistyp + Byte-Order, Form rows x cols); gültige Maps nach Dtype gruppiert, je Gruppe nach Offset sortiert."""
+    maps, by_dt = [], {}
+    for m in (m for spec in specs for m in (spec.get("maps") or [])):
+        name = str(m.get("name","<unnamed>"))
+        ent = {"name": name, "safe": re.sub(r'[^a-zA-Z0-9_.-]+', '_', name), "error": None}
+        try:
+            off = to_int(m["offset"]); rows = int(m["rows"]); cols = int(m["cols"])
+            dtype = m.get("dtype","u16"); endian=m.get("endian","little")
+            scale=float(m.get("scale",1.0)); add=float(m.get("add",0.0))
+            if dtype not in DTYPES or endian not in ENDIANS: raise ValueError("bad dtype/endian")
+            if off < 0 or rows <= 0 or cols <= 0: raise ValueError(f"bad offset/shape 0x{off:X} {rows}x{cols}")
+            dt = np.dtype(DTYPES[dtype]).newbyteorder(ENDIANS[endian])
+            X, Y = mesh_axes(m, rows, cols)
+            ent.update(off=off, rec=np.dtype((dt, (rows, cols))), scale=scale, add=add, X=X, Y=Y)
+            by_dt.setdefault(dt.str, []).append(len(maps))
+        except Exception as e:
+            ent["error"] = str(e)
+        maps.append(ent)
+    groups = []
+    for key, pos in sorted(by_dt.items()):
+        pos = np.array(sorted(pos, key=lambda k: maps[k]["off"]), dtype=np.int64)
+        groups.append({"dt": np.dtype(key), "pos": pos,
+                       "off": np.array([maps[k]["off"] for k in pos], dtype=np.int64),
+                       "nbytes": np.array([maps[k]["rec"].itemsize for k in pos], dtype=np.int64),
+                       "scale": np.array([maps[k]["scale"] for k in pos]), "add": np.array([maps[k]["add"] for k in pos])})
+    return {"maps": maps, "groups": groups}
+
+def extract_maps(data, index) -> List[Any]:
+    """Alle Maps eines Bins -> Liste in Spec-Reihenfolge (ndarray rows x cols, skaliert, oder Fehlertext).
+    Je Dtype-Gruppe ein Gather über den Puffer (mmap), ein astype, ein vektorisiertes scale/add."""
+    buf = np.frombuffer(data, dtype=np.uint8); maps = index["maps"]
+    out = [m["error"] for m in maps]
+    for g in index["groups"]:
+        fits = g["off"] + g["nbytes"] <= buf.size
+        for k, off, need in zip(g["pos"][~fits].tolist(), g["off"][~fits].tolist(), g["nbytes"][~fits].tolist()):
+            out[k] = f"Not enough bytes at 0x{off:X} need {need} got {max(0, min(need, buf.size - off))}"
+        if not fits.any(): continue
+        pos, off, nb = g["pos"][fits], g["off"][fits], g["nbytes"][fits]
+        gather = np.arange(int(nb.sum())) + np.repeat(off - (np.cumsum(nb) - nb), nb)
+        cells = nb // g["dt"].itemsize
+        vals = buf[gather].view(g["dt"]).astype(float) * np.repeat(g["scale"][fits], cells) + np.repeat(g["add"][fits], cells)
+        for k, z in zip(pos.tolist(), np.split(vals, np.cumsum(cells)[:-1])):
+            out[k] = z.reshape(maps[k]["rec"].shape)
+    return out
 
 def byte_histogram(data: bytes, png: str):
     arr = np.frombuffer(data, dtype=np.uint8)
     hist, _ = np.histogram(arr, bins=256, range=(0,256))
+    plt = _plt()
     fig = plt.figure(figsize=(10,4)); ax = fig.add_subplot(111)
     ax.bar(np.arange(256), hist, width=1.0)
     ax.set_title("Byte histogram"); ax.set_xlabel("byte"); ax.set_ylabel("count")
     fig.tight_layout(); fig.savefig(png, dpi=150); plt.close(fig)
 
-def analyze_file(bin_path: str, outdir: str):
-    dat = pathlib.Path(bin_path).read_bytes()
+def analyze_file(bin_path: str, outdir: str, dat=None, plots=True):
+    if dat is None: dat = load_bin(bin_path)
     sha = hashlib.sha256(dat).hexdigest()
     png_hist = os.path.join(outdir, "histogram.png")
-    byte_histogram(dat, png_hist)
-    # simple strings
-    s_out=[]; cur=[]
-    for b in dat:
-        if 32 <= b <= 126: cur.append(chr(b))
-        else:
-            if len(cur)>=6: s_out.append("".join(cur))
-            cur=[]
-    if len(cur)>=6: s_out.append("".join(cur))
+    if plots: byte_histogram(dat, png_hist)
     return {
         "path": bin_path, "size": len(dat), "sha256": sha,
-        "hist_png": os.path.relpath(png_hist),
-        "strings": s_out[:40],
+        "hist_png": os.path.relpath(png_hist) if plots else None,
+        "strings": ascii_strings(dat, 6, limit=40),
     }
 
 def save_csv(path, X, Y, Z):
@@ -119,8 +162,9 @@ def save_csv(path, X, Y, Z):
         for r in range(Z.shape[0]):
             f.write(str(Y[r,0]) + "," + ",".join(f"{v:.6g}" for v in Z[r,:]) + "\n")
 
-def surface_pair(outpng, title, X, Y, Zbin, Zds=None):
+def surface_pair(outpng, title, X, Y, Zbin, Zds=None, dpi=200):
     if Zds is not None and Zds.shape != Zbin.shape: Zds=None
+    plt = _plt()
     if Zds is None:
         fig = plt.figure(figsize=(9,7)); ax = fig.add_subplot(111, projection="3d")
         ax.plot_surface(X, Y, Zbin, cmap="viridis", linewidth=0, antialiased=True)
@@ -133,7 +177,49 @@ def surface_pair(outpng, title, X, Y, Zbin, Zds=None):
     for ax in fig.axes:
         try: ax.set_xlabel("X"); ax.set_ylabel("Y"); ax.set_zlabel("Z")
         except Exception: pass
-    fig.tight_layout(); fig.savefig(outpng, dpi=200); plt.close(fig)
+    fig.tight_layout(); fig.savefig(outpng, dpi=dpi); plt.close(fig)
+
+def _ticks(ax, X, Y):
+    xs, ys = X[0], Y[:, 0]
+    xi = np.arange(0, len(xs), -(-len(xs) // 10)); yi = np.arange(0, len(ys), -(-len(ys) // 10))
+    ax.set_xticks(xi); ax.set_xticklabels([f"{v:.4g}" for v in xs[xi]], rotation=45)
+    ax.set_yticks(yi); ax.set_yticklabels([f"{v:.4g}" for v in ys[yi]])
+    ax.set_xlabel("X"); ax.set_ylabel("Y")
+
+def heatmap_pair(outpng, title, X, Y, Zbin, Zds=None, dpi=100):
+    """2D-Variante von surface_pair: imshow je Map (Zellen in Index-Raster, Achsenwerte als Ticks); feste Ränder
+    statt tight_layout."""
+    if Zds is not None and Zds.shape != Zbin.shape: Zds=None
+    plt = _plt()
+    panels = [(Zbin, "viridis", " (BIN)")] + ([(Zds, "plasma", " (DeepSeek)")] if Zds is not None else [])
+    fig, axes = plt.subplots(1, len(panels), figsize=(6.5 * len(panels), 5), squeeze=False)
+    fig.subplots_adjust(left=0.08, right=0.97, bottom=0.15, top=0.92, wspace=0.25)
+    for ax, (Z, cmap, suffix) in zip(axes[0], panels):
+        im = ax.imshow(Z, cmap=cmap, origin="lower", aspect="auto", interpolation="nearest")
+        fig.colorbar(im, ax=ax); ax.set_title(title + suffix); _ticks(ax, X, Y)
+    fig.savefig(outpng, dpi=dpi); plt.close(fig)
+
+RENDERERS = {"surface": surface_pair, "heatmap": heatmap_pair}
+DEFAULT_DPI = {"surface": 200, "heatmap": 100}
+
+def render_key(title, X, Y, Zbin, Zds, style, dpi):
+    h = hashlib.sha256(title.encode("utf-8"))
+    for a in (X, Y, Zbin, Zds):
+        if a is None: h.update(b"-"); continue
+        a = np.ascontiguousarray(a, dtype=float); h.update(repr(a.shape).encode()); h.update(a.tobytes())
+    return cache_key(h.hexdigest(), {"style": style, "dpi": dpi, "tool": "mapviz"}, RENDER_VERSION)
+
+def render_one(task):
+    """task: (png, title, X, Y, Zbin, Zds, style, dpi, cache_dir) -> True bei Cache-Treffer"""
+    png, title, X, Y, Zbin, Zds, style, dpi, cache_dir = task
+    png = pathlib.Path(png)
+    key = render_key(title, X, Y, Zbin, Zds, style, dpi) if cache_dir else None
+    hit = cache_get(cache_dir, key) if key else None
+    if hit and (hit[0] / png.name).is_file() and cache_materialize(hit[0], png.parent, [png.name]):
+        return True  # Dateiname folgt aus dem Titel, steckt also im Schlüssel
+    RENDERERS[style](str(png), title, X, Y, Zbin, Zds, dpi=dpi)
+    if key: cache_put(cache_dir, key, [png], {"map": title, "style": style}, max_bytes=None)  # räumt main()
+    return False
 
 def main():
     ap = argparse.ArgumentParser(description="ECU map visualize/analyze")
@@ -141,65 +227,64 @@ def main():
     ap.add_argument("--specs", default="mapspecs/**/*.y?(a)ml")
     ap.add_argument("--deepseek", default="deepseek/maps/**/*.json")
     ap.add_argument("--outdir", default="out/mapviz")
+    ap.add_argument("--style", choices=sorted(RENDERERS), default="surface", help="Map-Bilder: 3D-Fläche oder 2D-Heatmap")
+    ap.add_argument("--dpi", type=int, default=None, help="Default: 200 (surface) bzw. 100 (heatmap)")
+    ap.add_argument("--jobs", type=int, default=0, help="Render-Prozesse (Default: CPU-Anzahl)")
+    ap.add_argument("--cache-dir", default=DEFAULT_DIR, help="PNG-Cache (Default: $ECULIBRE_CACHE_DIR oder .cache/eculibre)")
+    ap.add_argument("--no-cache", action="store_true")
+    ap.add_argument("--no-plots", action="store_true", help="Keine PNGs (Histogramm, Map-Bilder); matplotlib wird nicht importiert")
     a = ap.parse_args()
+    cache_dir = None if a.no_cache else a.cache_dir
+    dpi = a.dpi or DEFAULT_DPI[a.style]
 
     bin_paths = glob.glob(a.bins, recursive=True)
     specs = load_specs([a.specs])
+    map_index = compile_maps(specs)
     ds_idx = index_deepseek([a.deepseek])
 
     pathlib.Path(a.outdir).mkdir(parents=True, exist_ok=True)
-    index_lines = ["# Index", ""]
+    index_lines = ["# Index", ""]; tasks = []
     for binp in bin_paths:
-        base = pathlib.Path(binp).name
+        base = dump_name(binp)  # x.bin.gz / ZIP-Paket -> Name des Dumps
         dst = pathlib.Path(a.outdir) / pathlib.Path(base).with_suffix("")
         dst.mkdir(parents=True, exist_ok=True)
 
-        info = analyze_file(binp, str(dst))
+        dat = load_bin(binp)
+        info = analyze_file(binp, str(dst), dat, plots=not a.no_plots)
         md = [f"# Report for `{base}`", "",
               "## File", f"- Path: `{info['path']}`",
               f"- Size: `{info['size']}` bytes",
-              f"- SHA256: `{info['sha256']}`", "",
-              "### Histogram", f"![histogram]({info['hist_png']})", ""]
-
+              f"- SHA256: `{info['sha256']}`", ""]
+        if info["hist_png"]: md += ["### Histogram", f"![histogram]({info['hist_png']})", ""]
 
-    if info["strings"]:
-        md.append("### Strings (first 40)")
-        for s in info["strings"]:
-            s = s.replace("|","\\|")
-            md.append(f"- `{s}`")
-        md.append("")
+        if info["strings"]:
+            md.append("### Strings (first 40)")
+            for off, s in info["strings"]:
+                s = s.replace("|","\\|")
+                md.append(f"- `0x{off:08X}` `{s}`")
+            md.append("")
 
-#        if info["strings"]:
-#            md.append("### Strings (first 40)")
-#            md += [f"- `{s.replace('|','\\|')}`" for s in info["strings"]]
-#            md.append("")
-
-        # flatten spec maps
-        all_maps=[m for spec in specs for m in (spec.get("maps") or [])]
-        if all_maps:
+        if map_index["maps"]:
             md.append("## Maps")
-            for m in all_maps:
-                name = str(m.get("name","<unnamed>"))
-                safe = re.sub(r'[^a-zA-Z0-9_.-]+', '_', name)
-                try:
-                    Zbin = read_map_from_bin(binp, m)
-                except Exception as e:
-                    md.append(f"### {name}\n- ⚠️ {e}\n"); continue
-                rows, cols = Zbin.shape
-                X, Y = mesh_axes(m, rows, cols)
+            for m, Zbin in zip(map_index["maps"], extract_maps(dat, map_index)):
+                name, safe = m["name"], m["safe"]
+                if isinstance(Zbin, str):
+                    md.append(f"### {name}\n- ⚠️ {Zbin}\n"); continue
+                X, Y = m["X"], m["Y"]
                 Zds = None
                 if name in ds_idx:
                     try:
                         z = np.array(ds_idx[name]["array"], dtype=float)
                         if z.shape == Zbin.shape: Zds = z
                     except Exception: pass
-                png_pair = os.path.join(dst, f"{safe}.pair.png")
-                surface_pair(str(png_pair), name, X, Y, Zbin, Zds)
                 csv_path = os.path.join(dst, f"{safe}.csv")
                 save_csv(str(csv_path), X, Y, Zbin)
-                md += [f"### {name}", "",
-                       f"[CSV]({os.path.relpath(csv_path)})  ",
-                       f"![{name}]({os.path.relpath(png_pair)})", ""]
+                md += [f"### {name}", "", f"[CSV]({os.path.relpath(csv_path)})  "]
+                if not a.no_plots:
+                    png_pair = os.path.join(dst, f"{safe}.pair.png")
+                    tasks.append((str(png_pair), name, X, Y, Zbin, Zds, a.style, dpi, cache_dir))
+                    md.append(f"![{name}]({os.path.relpath(png_pair)})")
+                md.append("")
         rep = os.path.join(dst, "REPORT.md")
         with open(rep, "w", encoding="utf-8") as f: f.write("\n".join(md) + "\n")
         index_lines.append(f"- [{base}]({os.path.relpath(rep, a.outdir)})")
@@ -207,5 +292,15 @@ def main():
     with open(os.path.join(a.outdir, "INDEX.md"), "w", encoding="utf-8") as f:
         f.write("\n".join(index_lines) + "\n")
 
+    # Render-Stufe: Figuren unabhängig voneinander -> ProcessPool, Cache-Treffer ohne matplotlib
+    jobs = min(a.jobs or os.cpu_count() or 1, len(tasks))
+    if jobs <= 1:
+        hits = [render_one(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as ex:
+            hits = list(ex.map(render_one, tasks, chunksize=max(1, len(tasks) // (4 * jobs))))
+    if cache_dir and hits.count(False): cache_trim(cache_dir, DEFAULT_MAX_MB << 20)
+    print(f"maps rendered: {hits.count(False)}, from cache: {hits.count(True)}")
+
 if __name__ == "__main__":
     main()